@@ -11,15 +11,60 @@ Binance MCP Server - 币安加密货币数据服务器
 - Alpha空投/竞赛追踪
 """
 
-from .config import *
-from .utils import *
-from .indicators import *
-from .api import *
-from .analysis import *
-from .alpha_realtime import *
-from .alpha_config import *
-from .alpha import *
-from .server import handle_mcp_request, main
+import importlib
+import importlib.util
+
+# 子模块按需导入：`import binance_mcp` 不再加载 requests、分析模块与 Alpha 配置，
+# 首次访问 binance_mcp.get_klines 等名称时才导入对应模块（PEP 562）
+_EXPORTS = {
+    "api": (
+        "make_spot_request", "make_futures_request", "make_futures_data_request",
+        "get_spot_price", "get_ticker_24h", "get_multiple_tickers",
+        "get_klines", "get_futures_price", "get_futures_ticker_24h", "get_futures_klines",
+        "get_futures_multiple_tickers", "get_funding_rate", "get_realtime_funding_rate",
+        "get_extreme_funding_rates", "get_mark_price", "get_open_interest",
+        "get_open_interest_hist", "get_top_long_short_ratio",
+        "get_top_long_short_position_ratio", "get_global_long_short_ratio",
+        "get_taker_buy_sell_ratio", "analyze_spot_vs_futures",
+        "search_symbols", "search_futures_symbols", "get_top_gainers_losers",
+        "get_futures_top_gainers_losers", "get_market_rankings",
+    ),
+    "funding_store": ("get_funding_rate_percentile", "get_funding_stats_overview"),
+    "alpha": (
+        "get_alpha_tokens_list", "analyze_alpha_token",
+        "get_active_alpha_competitions", "add_alpha_competition",
+    ),
+    "server": ("handle_mcp_request", "main"),
+}
+_LAZY_NAMES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+# 其余名称（配置常量、工具函数等）依次在这些模块中查找，顺序与原先的 from .xxx import * 一致
+_STAR_MODULES = ("config", "utils", "indicators", "api", "analysis", "alpha_realtime", "alpha_config", "alpha")
+
+
+def __getattr__(name):
+    if name.startswith("_"):
+        raise AttributeError(name)
+    module_name = _LAZY_NAMES.get(name)
+    if module_name is not None:
+        value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    elif importlib.util.find_spec(f"{__name__}.{name}") is not None:
+        value = importlib.import_module(f".{name}", __name__)  # 子模块（from binance_mcp import api）
+    else:
+        for module_name in _STAR_MODULES:
+            module = importlib.import_module(f".{module_name}", __name__)
+            if hasattr(module, name):
+                value = getattr(module, name)
+                break
+        else:
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
 
 __version__ = "1.1.0"
 __all__ = [
@@ -44,12 +89,15 @@ __all__ = [
     "get_top_long_short_position_ratio", "get_global_long_short_ratio",
     "get_taker_buy_sell_ratio", "analyze_spot_vs_futures",
     "search_symbols", "search_futures_symbols", "get_top_gainers_losers",
-    "get_futures_top_gainers_losers",
+    "get_futures_top_gainers_losers", "get_market_rankings",
+
+    # Funding History
+    "get_funding_rate_percentile", "get_funding_stats_overview",
 
     # Analysis
     "comprehensive_analysis", "analyze_market_factors", "analyze_kline_patterns",
     "comprehensive_analysis_futures", "analyze_futures_kline_patterns",
-    "analyze_futures_market_factors",
+    "analyze_futures_market_factors", "multi_timeframe_analysis",
     
     # Alpha Realtime
     "fetch_realtime_alpha_airdrops", "fetch_alpha_token_price_from_alpha123",
@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
 """
 入口文件 - 支持 python -m binance_mcp 运行
+python -m binance_mcp --import-time 测量冷启动导入耗时（见 import_bench.py）
 """
 
-from .server import main
+import sys
 
 if __name__ == "__main__":
-    main()
-
+    if "--import-time" in sys.argv[1:]:
+        from .import_bench import main as import_bench_main
+        sys.exit(import_bench_main(sys.argv[1:]))
 
+    from .server import main
+    main()
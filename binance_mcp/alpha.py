@@ -3,25 +3,40 @@
 Alpha空投/竞赛分析 - 统一入口
 """
 
+import contextvars
+import json
+import threading
+import time
 import requests
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any
 from datetime import datetime
 
-from .config import COINGECKO_API, ALPHA_TOKEN_COINGECKO_IDS
-from .utils import calculate_time_remaining
-from .api import get_ticker_24h
+from .config import COINGECKO_API, ALPHA_TOKEN_COINGECKO_IDS, COINGECKO_PRICE_CACHE_TTL
+from .utils import calculate_time_remaining, format_percent, format_usd, safe_float
+from .api import (
+    get_ticker_24h, make_spot_request, make_futures_request, get_alpha_token_list, _futures_trading_symbol_set
+)
 from .analysis import comprehensive_analysis
 from .alpha_realtime import get_realtime_alpha_airdrops
+from .competition_volume import competition_volume
+from .context import memoize_per_call, request_timeout
 from .alpha_config import (
     auto_detect_alpha_competitions, get_alpha_airdrops_config,
-    add_alpha_competition as _add_alpha_competition
+    add_alpha_competition as _add_alpha_competition, alpha_config_store
 )
 
-# 初始化配置
-ALPHA_COMPETITIONS = auto_detect_alpha_competitions()
-ALPHA_AIRDROPS = get_alpha_airdrops_config()
 
+# 竞赛 / 空投配置由 alpha_config_store 缓存（文件未变化时不重新读取），每次访问都是最新内容
+def _competitions() -> Dict[str, Any]:
+    return auto_detect_alpha_competitions()
+
+
+def _airdrops() -> Dict[str, Any]:
+    return get_alpha_airdrops_config()
 
+
+@memoize_per_call
 def get_token_price_from_coingecko(coin_id: str) -> Dict[str, Any]:
     """从CoinGecko获取代币价格"""
     if not coin_id:
@@ -35,7 +50,7 @@ def get_token_price_from_coingecko(coin_id: str) -> Dict[str, Any]:
     }
     
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = requests.get(url, params=params, timeout=request_timeout(10))
         response.raise_for_status()
         data = response.json()
         
@@ -50,6 +65,7 @@ def get_token_price_from_coingecko(coin_id: str) -> Dict[str, Any]:
         return {"error": str(e)}
 
 
+@memoize_per_call
 def get_alpha_token_price(symbol: str) -> Dict[str, Any]:
     """获取Alpha代币价格（优先币安，备用CoinGecko）"""
     symbol = symbol.upper()
@@ -72,12 +88,149 @@ def get_alpha_token_price(symbol: str) -> Dict[str, Any]:
     return {"error": f"无法获取{symbol}价格", "source": None}
 
 
+# CoinGecko 批量价格缓存：coin_id → (获取时间, 价格数据)
+_coingecko_price_cache: Dict[str, Any] = {}
+_coingecko_price_lock = threading.Lock()
+
+
+def get_token_prices_from_coingecko(coin_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """批量从CoinGecko获取代币价格（一次 simple/price 请求，ids 逗号拼接）；返回 coin_id → 价格数据，缺失的不返回"""
+    now = time.time()
+    prices = {}
+    with _coingecko_price_lock:
+        for coin_id in coin_ids:
+            cached = _coingecko_price_cache.get(coin_id)
+            if cached and now - cached[0] < COINGECKO_PRICE_CACHE_TTL:
+                prices[coin_id] = cached[1]
+    missing = sorted({coin_id for coin_id in coin_ids if coin_id and coin_id not in prices})
+    if not missing:
+        return prices
+    
+    try:
+        response = requests.get(f"{COINGECKO_API}/simple/price", params={
+            "ids": ",".join(missing),
+            "vs_currencies": "usd",
+            "include_24hr_change": "true"
+        }, timeout=request_timeout(10))
+        response.raise_for_status()
+        data = response.json()
+    except Exception:
+        return prices
+    
+    with _coingecko_price_lock:
+        for coin_id in missing:
+            if coin_id in data:
+                prices[coin_id] = {
+                    "price": data[coin_id].get("usd", 0),
+                    "change_24h": data[coin_id].get("usd_24h_change", 0),
+                    "source": "CoinGecko"
+                }
+                _coingecko_price_cache[coin_id] = (now, prices[coin_id])
+    return prices
+
+
+def _ticker_price_data(t: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "price": safe_float(t.get("lastPrice")),
+        "change_24h": safe_float(t.get("priceChangePercent")),
+        "volume_24h": safe_float(t.get("quoteVolume")),
+        "source": "Binance"
+    }
+
+
+def _spot_prices(pairs: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    现货行情：symbols 列表一次请求（≤20 个 weight=2，而全市场为 80）：交易对 → 价格数据。
+    列表中有不存在的交易对时币安整批返回 400，先按 exchangeInfo（长缓存）过滤出在交易的。
+    """
+    info = make_spot_request("/exchangeInfo", {})
+    if info["success"]:
+        trading = {s["symbol"] for s in info["data"].get("symbols", []) if s.get("status") == "TRADING"}
+        pairs = [p for p in pairs if p in trading]
+    if not pairs:
+        return {}
+    result = make_spot_request("/ticker/24hr", {"symbols": json.dumps(sorted(pairs), separators=(",", ":"))})
+    if not result["success"]:
+        return {}
+    return {t["symbol"]: _ticker_price_data(t) for t in result["data"] if t.get("symbol")}
+
+
+def _alpha_list_prices() -> Dict[str, Dict[str, Any]]:
+    """Alpha 代币列表中的行情（一次请求）：代币符号 / 名称（大写）→ 价格数据"""
+    result = get_alpha_token_list()
+    if not result.get("success"):
+        return {}
+    prices = {}
+    for t in result.get("data", []):
+        price_data = {
+            "price": safe_float(t.get("price")),
+            "change_24h": safe_float(t.get("percentChange24h")),
+            "volume_24h": safe_float(t.get("volume24h")),
+            "source": "Binance"
+        }
+        for key in (t.get("name", "").upper(), t.get("symbol", "").upper()):  # 符号优先（后写覆盖）
+            if key:
+                prices[key] = price_data
+    return prices
+
+
+def _futures_prices(pairs: List[str]) -> Dict[str, Dict[str, Any]]:
+    """合约行情：只请求合约 exchangeInfo 中在交易的交易对，逐个请求（单个 symbol weight=1）"""
+    info = make_futures_request("/exchangeInfo", {})
+    if info["success"]:
+        trading = _futures_trading_symbol_set(info["data"])
+        pairs = [p for p in pairs if p in trading]
+    prices = {}
+    for pair in pairs:
+        result = make_futures_request("/ticker/24hr", {"symbol": pair})
+        if result["success"]:
+            prices[pair] = _ticker_price_data(result["data"])
+    return prices
+
+
+def get_alpha_token_prices(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    批量获取Alpha代币价格，顺序与 get_alpha_token_price 相同（现货 → Alpha → 合约 → CoinGecko），
+    但按来源合并请求：现货（symbols 列表一次请求）与 Alpha 代币列表并发获取，
+    合约只查询两者都没有的代币，剩余代币合并为一次 CoinGecko 请求。
+    返回 symbol → 价格数据（找不到时为带 error 的字典）。
+    """
+    symbols = [s.upper() for s in symbols]
+    pairs = [f"{s}USDT" for s in symbols]
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="binance-mcp-alpha-prices") as executor:
+        # 每个任务使用当前上下文的副本（取消标记、调用内备忘、时间预算随之传入）
+        spot_future = executor.submit(contextvars.copy_context().run, _spot_prices, pairs)
+        alpha_future = executor.submit(contextvars.copy_context().run, _alpha_list_prices)
+        spot, alpha = spot_future.result(), alpha_future.result()
+    
+    prices = {}
+    for symbol in symbols:
+        price_data = spot.get(f"{symbol}USDT") or alpha.get(symbol)
+        if price_data:
+            prices[symbol] = price_data
+    
+    unresolved = [s for s in symbols if s not in prices]
+    if unresolved:
+        futures_prices = _futures_prices([f"{s}USDT" for s in unresolved])
+        for symbol in unresolved:
+            if f"{symbol}USDT" in futures_prices:
+                prices[symbol] = futures_prices[f"{symbol}USDT"]
+    
+    coin_ids = {s: ALPHA_TOKEN_COINGECKO_IDS.get(s) for s in symbols if s not in prices}
+    coingecko = get_token_prices_from_coingecko([c for c in coin_ids.values() if c])
+    for symbol, coin_id in coin_ids.items():
+        prices[symbol] = coingecko.get(coin_id) or {"error": f"无法获取{symbol}价格", "source": None}
+    return prices
+
+
 def get_alpha_tokens_list() -> Dict[str, Any]:
-    """获取Alpha代币列表（空投类）"""
+    """获取Alpha代币列表（空投类）；价格批量获取，耗时不随代币数量增长"""
     tokens_info = []
+    airdrops = _airdrops()
+    prices = get_alpha_token_prices(list(airdrops))
     
-    for symbol, info in ALPHA_AIRDROPS.items():
-        price_data = get_alpha_token_price(symbol)
+    for symbol, info in airdrops.items():
+        price_data = prices[symbol.upper()]
         
         if "error" not in price_data:
             price = price_data["price"]
@@ -89,9 +242,9 @@ def get_alpha_tokens_list() -> Dict[str, Any]:
                 "launch_date": info["launch_date"],
                 "min_points_required": info["min_points"],
                 "airdrop_amount": info["airdrop_amount"],
-                "current_price": f"${price:,.6f}",
-                "airdrop_value": f"${total_value:,.2f}",
-                "change_24h": f"{price_data.get('change_24h', 0):+.2f}%",
+                "current_price": format_usd(price, 6),
+                "airdrop_value": format_usd(total_value, 2),
+                "change_24h": format_percent(price_data.get('change_24h', 0)),
                 "data_source": price_data.get("source", "Unknown"),
                 "status": info["status"]
             })
@@ -127,14 +280,14 @@ def analyze_alpha_token(symbol: str) -> Dict[str, Any]:
         if coingecko_id:
             try:
                 url = f"{COINGECKO_API}/coins/{coingecko_id}"
-                response = requests.get(url, timeout=10)
+                response = requests.get(url, timeout=request_timeout(10))
                 if response.status_code == 200:
                     cg_data = response.json()
                     market_data = cg_data.get("market_data", {})
                     price = market_data.get("current_price", {}).get("usd", 0)
                     
-                    comp_info = ALPHA_COMPETITIONS.get(symbol, {})
-                    airdrop_info = ALPHA_AIRDROPS.get(symbol, {})
+                    comp_info = _competitions().get(symbol, {})
+                    airdrop_info = _airdrops().get(symbol, {})
                     
                     per_user_reward = comp_info.get("per_user_reward") or airdrop_info.get("airdrop_amount") or 0
                     reward_value = price * per_user_reward if per_user_reward else 0
@@ -143,18 +296,18 @@ def analyze_alpha_token(symbol: str) -> Dict[str, Any]:
                         "symbol": symbol,
                         "data_source": "CoinGecko",
                         "market_data": {
-                            "price": f"${price:,.6f}",
-                            "change_24h": f"{market_data.get('price_change_percentage_24h', 0):+.2f}%",
-                            "market_cap": f"${market_data.get('market_cap', {}).get('usd', 0):,.0f}",
-                            "volume_24h": f"${market_data.get('total_volume', {}).get('usd', 0):,.0f}",
-                            "high_24h": f"${market_data.get('high_24h', {}).get('usd', 0):,.6f}",
-                            "low_24h": f"${market_data.get('low_24h', {}).get('usd', 0):,.6f}",
-                            "ath": f"${market_data.get('ath', {}).get('usd', 0):,.6f}",
-                            "atl": f"${market_data.get('atl', {}).get('usd', 0):,.6f}"
+                            "price": format_usd(price, 6),
+                            "change_24h": format_percent(market_data.get('price_change_percentage_24h', 0)),
+                            "market_cap": format_usd(market_data.get('market_cap', {}).get('usd', 0), 0),
+                            "volume_24h": format_usd(market_data.get('total_volume', {}).get('usd', 0), 0),
+                            "high_24h": format_usd(market_data.get('high_24h', {}).get('usd', 0), 6),
+                            "low_24h": format_usd(market_data.get('low_24h', {}).get('usd', 0), 6),
+                            "ath": format_usd(market_data.get('ath', {}).get('usd', 0), 6),
+                            "atl": format_usd(market_data.get('atl', {}).get('usd', 0), 6)
                         },
                         "competition_info": comp_info if comp_info else None,
                         "per_user_reward": per_user_reward if per_user_reward else "N/A",
-                        "reward_value": f"${reward_value:,.2f}" if reward_value else "N/A",
+                        "reward_value": format_usd(reward_value, 2) if reward_value else "N/A",
                         "note": "数据来自CoinGecko，技术分析需要币安API支持"
                     }
             except:
@@ -169,8 +322,8 @@ def analyze_alpha_token(symbol: str) -> Dict[str, Any]:
         has_analysis = False
         analysis = {}
     
-    comp_info = ALPHA_COMPETITIONS.get(symbol, {})
-    airdrop_info = ALPHA_AIRDROPS.get(symbol, {})
+    comp_info = _competitions().get(symbol, {})
+    airdrop_info = _airdrops().get(symbol, {})
     
     price = ticker["price"] if has_full_ticker else price_data.get("price", 0)
     per_user_reward = comp_info.get("per_user_reward") or airdrop_info.get("airdrop_amount") or 0
@@ -180,23 +333,24 @@ def analyze_alpha_token(symbol: str) -> Dict[str, Any]:
         "symbol": symbol,
         "data_source": price_data.get("source", "Binance"),
         "market_data": {
-            "price": f"${price:,.6f}",
-            "change_24h": ticker["price_change_display"] if has_full_ticker else f"{price_data.get('change_24h', 0):+.2f}%",
+            "price": format_usd(price, 6),
+            "change_24h": ticker["price_change_display"] if has_full_ticker else format_percent(price_data.get('change_24h', 0)),
             "volume_24h": ticker["quote_volume_formatted"] if has_full_ticker else "N/A",
-            "high_24h": f"${ticker['high_24h']:,.6f}" if has_full_ticker else "N/A",
-            "low_24h": f"${ticker['low_24h']:,.6f}" if has_full_ticker else "N/A"
+            "high_24h": format_usd(ticker['high_24h'], 6) if has_full_ticker else "N/A",
+            "low_24h": format_usd(ticker['low_24h'], 6) if has_full_ticker else "N/A"
         },
         "value_analysis": {
             "per_user_reward": f"{per_user_reward:,}" if per_user_reward else "N/A",
-            "per_user_value": f"${price * per_user_reward:,.2f}" if per_user_reward and price else "N/A",
+            "per_user_value": format_usd(price * per_user_reward, 2) if per_user_reward and price else "N/A",
             "total_reward": f"{total_reward:,}" if total_reward else "N/A",
-            "total_value": f"${price * total_reward:,.2f}" if total_reward and price else "N/A"
+            "total_value": format_usd(price * total_reward, 2) if total_reward and price else "N/A"
         },
         "competition_info": {
             "name": comp_info.get("name", "N/A"),
             "end_time": comp_info.get("end_time", "N/A"),
             "time_remaining": calculate_time_remaining(comp_info["end_time"]) if comp_info.get("end_time") else "N/A",
-            "status": comp_info.get("status", "未知")
+            "status": comp_info.get("status", "未知"),
+            "window_stats": competition_volume.stats(symbol, comp_info)
         } if comp_info else None
     }
     
@@ -210,11 +364,12 @@ def analyze_alpha_token(symbol: str) -> Dict[str, Any]:
 
 
 def get_active_alpha_competitions() -> Dict[str, Any]:
-    """获取进行中的Alpha竞赛"""
+    """获取进行中的Alpha竞赛（只查询进行中的竞赛与最近结束的 3 个的价格）"""
     active_competitions = []
     ended_competitions = []
+    active, recently_ended = alpha_config_store.scheduled_competitions(ended_limit=3)
     
-    for symbol, comp in ALPHA_COMPETITIONS.items():
+    for symbol, comp in active + recently_ended:
         price_data = get_alpha_token_price(symbol.replace("_ALPHA", ""))
         
         price = price_data.get("price", 0) if "error" not in price_data else 0
@@ -240,10 +395,10 @@ def get_active_alpha_competitions() -> Dict[str, Any]:
             "total_reward": f"{total_reward:,}" if total_reward else "待公布",
             "winner_count": f"{comp.get('winner_count', 0):,}" if comp.get("winner_count") else "待公布",
             "per_user_reward": f"{per_user_reward:,}" if per_user_reward else "待公布",
-            "current_price": f"${price:,.6f}" if price else "获取中...",
-            "price_change_24h": f"{change_24h:+.2f}%" if change_24h else "N/A",
-            "total_value": f"${total_value:,.2f}" if total_value else "待计算",
-            "per_user_value": f"${per_user_value:,.2f}" if per_user_value else "待计算",
+            "current_price": format_usd(price, 6) if price else "获取中...",
+            "price_change_24h": format_percent(change_24h) if change_24h else "N/A",
+            "total_value": format_usd(total_value, 2) if total_value else "待计算",
+            "per_user_value": format_usd(per_user_value, 2) if per_user_value else "待计算",
             "data_source": data_source,
             "status": comp["status"],
             "note": comp.get("note", "")
@@ -254,8 +409,6 @@ def get_active_alpha_competitions() -> Dict[str, Any]:
         else:
             ended_competitions.append(competition_info)
     
-    active_competitions.sort(key=lambda x: x["end_time"])
-    
     return {
         "query_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "active_count": len(active_competitions),
@@ -270,14 +423,7 @@ def add_alpha_competition(symbol: str, name: str, start_time: str, end_time: str
                           total_reward: int = None, winner_count: int = None,
                           per_user_reward: int = None, note: str = "") -> Dict[str, Any]:
     """添加新的Alpha竞赛到配置"""
-    global ALPHA_COMPETITIONS
-    
-    result = _add_alpha_competition(
+    return _add_alpha_competition(
         symbol, name, start_time, end_time,
         total_reward, winner_count, per_user_reward, note
     )
-    
-    if result.get("success"):
-        ALPHA_COMPETITIONS = auto_detect_alpha_competitions()
-    
-    return result
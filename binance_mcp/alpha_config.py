@@ -1,120 +1,303 @@
 #!/usr/bin/env python3
 """
 Alpha竞赛配置管理 - 文件读写、配置加载
+
+AlphaConfigStore 缓存解析后的 alpha_competitions.json：
+1. 按文件 (mtime_ns, size, inode) 判断是否变化，未变化时不重新读取和解析（每次只 stat 一次）
+2. 竞赛按 symbol 建字典；结束时间加载时解析一次，进行中的竞赛按结束时间入堆（CompetitionSchedule），
+   越过结束时间时才转为已结束，进行中列表的查询只涉及进行中的竞赛
+3. 写入：文件锁（fcntl.flock，跨进程）内重新读取最新内容 → 修改 → 写临时文件并 fsync → os.replace 原子替换，
+   并发写入不会互相覆盖，读者也不会读到写了一半的文件
+4. 失效：原子替换会改变 inode 与 mtime，其他 worker 下次访问时 stat 即可发现变化并重新加载
 """
 
+import bisect
+import copy
+import heapq
 import os
 import json
-from typing import Dict, Any
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:  # 非 POSIX 平台：仅保留进程内的锁
+    fcntl = None
+
 from .config import DEFAULT_ALPHA_COMPETITIONS, DEFAULT_ALPHA_AIRDROPS
 
 # 配置文件路径
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 ALPHA_CONFIG_FILE = os.path.join(os.path.dirname(SCRIPT_DIR), "alpha_competitions.json")
 
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 
-def load_alpha_config_from_file() -> Dict[str, Any]:
-    """从外部JSON文件加载Alpha竞赛配置"""
+
+def _competition_entry(comp: Dict[str, Any], symbol: str, status: str) -> Dict[str, Any]:
+    return {
+        "name": comp.get("name", f"{symbol} Alpha 竞赛"),
+        "token_name": comp.get("token_name", symbol),
+        "start_time": comp.get("start_time", ""),
+        "end_time": comp.get("end_time", ""),
+        "timezone": comp.get("timezone", "UTC+8"),
+        "total_reward": comp.get("total_reward"),
+        "winner_count": comp.get("winner_count"),
+        "per_user_reward": comp.get("per_user_reward"),
+        "status": status,
+        "note": comp.get("note", "")
+    }
+
+
+def _parse_competitions(file_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not (file_config and "active_competitions" in file_config):
+        return DEFAULT_ALPHA_COMPETITIONS
+
+    competitions = {}
+    for comp in file_config.get("active_competitions", []):
+        symbol = comp.get("symbol", "").upper()
+        if symbol:
+            competitions[symbol] = _competition_entry(comp, symbol, comp.get("status", "进行中"))
+
+    for comp in file_config.get("ended_competitions", []):
+        symbol = comp.get("symbol", "").upper()
+        if symbol and symbol not in competitions:
+            competitions[symbol] = _competition_entry(comp, symbol, "已结束")
+
+    return competitions
+
+
+def _parse_airdrops(file_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not (file_config and "alpha_airdrops" in file_config):
+        return DEFAULT_ALPHA_AIRDROPS
+
+    airdrops = {}
+    for airdrop in file_config.get("alpha_airdrops", []):
+        symbol = airdrop.get("symbol", "").upper()
+        if symbol:
+            airdrops[symbol] = {
+                "name": airdrop.get("name", symbol),
+                "launch_date": airdrop.get("launch_date", ""),
+                "min_points": airdrop.get("min_points", 0),
+                "airdrop_amount": airdrop.get("airdrop_amount", 0),
+                "status": airdrop.get("status", "已结束")
+            }
+    return airdrops if airdrops else DEFAULT_ALPHA_AIRDROPS
+
+
+def _parse_time(value: Any) -> Optional[datetime]:
     try:
-        if os.path.exists(ALPHA_CONFIG_FILE):
-            with open(ALPHA_CONFIG_FILE, 'r', encoding='utf-8') as f:
+        return datetime.strptime(value, _TIME_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+
+class CompetitionSchedule:
+    """
+    竞赛的时间索引：end_time 只在加载时解析一次。
+    标记为进行中的竞赛按结束时间放入最小堆，advance(now) 只弹出已越过的边界（每个竞赛的状态转换只计算一次），
+    进行中列表的查询只涉及进行中的竞赛。now 应单调递增（按当前时间调用）。
+    """
+
+    def __init__(self, competitions: Dict[str, Any]) -> None:
+        self.competitions = competitions
+        self._order = {symbol: i for i, symbol in enumerate(competitions)}
+        self._active: Dict[str, Any] = {}
+        self._ended: List[Tuple[int, str]] = []   # (文件中的顺序, symbol)，保持原顺序
+        self._expired = set()                     # 由 advance 转为已结束的竞赛
+        self._heap: List[Tuple[datetime, int, str]] = []
+        for symbol, comp in competitions.items():
+            order = self._order[symbol]
+            if comp.get("status") == "进行中":
+                self._active[symbol] = comp
+                end_time = _parse_time(comp.get("end_time"))
+                if end_time is not None:
+                    self._heap.append((end_time, order, symbol))
+            else:
+                self._ended.append((order, symbol))
+        heapq.heapify(self._heap)
+
+    def advance(self, now: datetime) -> None:
+        """结束时间早于 now 的竞赛转为已结束"""
+        heap = self._heap
+        while heap and heap[0][0] < now:
+            _, order, symbol = heapq.heappop(heap)
+            del self._active[symbol]
+            self._expired.add(symbol)
+            bisect.insort(self._ended, (order, symbol))
+
+    def _copy(self, symbol: str) -> Dict[str, Any]:
+        comp = dict(self.competitions[symbol])
+        if symbol in self._expired:
+            comp["status"] = "已结束"
+        return comp
+
+    def all(self) -> Dict[str, Any]:
+        return {symbol: self._copy(symbol) for symbol in self.competitions}
+
+    def active(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """进行中的竞赛，按结束时间排序"""
+        items = [(symbol, dict(comp)) for symbol, comp in self._active.items()]
+        items.sort(key=lambda item: item[1].get("end_time", ""))
+        return items
+
+    def ended(self, limit: Optional[int] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """已结束（及其他非进行中状态）的竞赛，按文件中的顺序"""
+        selected = self._ended if limit is None else self._ended[:limit]
+        return [(symbol, self._copy(symbol)) for _, symbol in selected]
+
+
+class AlphaConfigStore:
+    """alpha_competitions.json 的缓存与原子写入（线程安全，多进程安全）"""
+
+    def __init__(self, path: str = ALPHA_CONFIG_FILE) -> None:
+        self.path = path
+        self._lock = threading.RLock()
+        self._signature = None
+        self._raw: Optional[Dict[str, Any]] = None
+        self._competitions: Dict[str, Any] = DEFAULT_ALPHA_COMPETITIONS
+        self._airdrops: Dict[str, Any] = DEFAULT_ALPHA_AIRDROPS
+        self._schedule = CompetitionSchedule(DEFAULT_ALPHA_COMPETITIONS)
+
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _read_file(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
                 return json.load(f)
-    except Exception:
-        pass
-    return None
+        except (OSError, ValueError):
+            return None
+
+    def _refresh(self) -> None:
+        """文件变化（或首次访问）时重新加载；调用方持有 self._lock"""
+        signature = self._stat()
+        if signature is not None and signature == self._signature:
+            return
+        raw = self._read_file() if signature is not None else None
+        self._raw = raw
+        self._competitions = _parse_competitions(raw)
+        self._airdrops = _parse_airdrops(raw)
+        self._schedule = CompetitionSchedule(self._competitions)
+        self._signature = signature
+
+    def raw(self) -> Optional[Dict[str, Any]]:
+        """原始文件内容（副本）；文件不存在或无法解析时返回 None"""
+        with self._lock:
+            self._refresh()
+            return copy.deepcopy(self._raw)
+
+    def _current_schedule(self, now: Optional[datetime] = None) -> CompetitionSchedule:
+        """调用方持有 self._lock"""
+        self._refresh()
+        self._schedule.advance(now or datetime.now())
+        return self._schedule
+
+    def competitions(self, detect_ended: bool = True, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """竞赛配置副本；detect_ended 时，结束时间已过但仍标记为进行中的状态改为已结束"""
+        with self._lock:
+            if not detect_ended:
+                self._refresh()
+                return {symbol: dict(comp) for symbol, comp in self._competitions.items()}
+            return self._current_schedule(now).all()
+
+    def scheduled_competitions(self, ended_limit: Optional[int] = None, now: Optional[datetime] = None
+                               ) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[Tuple[str, Dict[str, Any]]]]:
+        """
+        (进行中, 已结束)：进行中的按结束时间排序；已结束的按文件中的顺序，最多 ended_limit 个。
+        元素为 (symbol, 配置副本)。
+        """
+        with self._lock:
+            schedule = self._current_schedule(now)
+            return schedule.active(), schedule.ended(ended_limit)
+
+    def airdrops(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh()
+            return {symbol: dict(item) for symbol, item in self._airdrops.items()}
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """跨进程写锁（锁文件与配置文件同目录，替换配置文件不影响锁）"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(f"{self.path}.lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(self, config: Dict[str, Any]) -> None:
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(config, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def save(self, config: Dict[str, Any]) -> bool:
+        """整体写入配置文件"""
+        try:
+            with self._file_lock():
+                self._write(config)
+                self._signature = None
+            return True
+        except OSError:
+            return False
+
+    def update(self, mutate: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]]) -> bool:
+        """
+        读取-修改-写入：在文件锁内读取磁盘上的最新内容（文件不存在时为 None），
+        mutate 返回新的配置后原子写入。其他进程的并发修改不会丢失。
+        """
+        try:
+            with self._file_lock():
+                self._write(mutate(self._read_file()))
+                self._signature = None
+            return True
+        except OSError:
+            return False
+
+
+# 全局单例
+alpha_config_store = AlphaConfigStore()
+
+
+def load_alpha_config_from_file() -> Dict[str, Any]:
+    """从外部JSON文件加载Alpha竞赛配置（文件未变化时使用缓存）"""
+    return alpha_config_store.raw()
 
 
 def save_alpha_config_to_file(config: Dict[str, Any]) -> bool:
-    """保存Alpha竞赛配置到外部JSON文件"""
-    try:
-        with open(ALPHA_CONFIG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
-        return True
-    except Exception:
-        return False
+    """保存Alpha竞赛配置到外部JSON文件（文件锁 + 原子替换）"""
+    return alpha_config_store.save(config)
 
 
 def get_alpha_competitions_config() -> Dict[str, Any]:
     """获取Alpha竞赛配置（优先从文件加载）"""
-    file_config = load_alpha_config_from_file()
-    
-    if file_config and "active_competitions" in file_config:
-        competitions = {}
-        for comp in file_config.get("active_competitions", []):
-            symbol = comp.get("symbol", "").upper()
-            if symbol:
-                competitions[symbol] = {
-                    "name": comp.get("name", f"{symbol} Alpha 竞赛"),
-                    "token_name": comp.get("token_name", symbol),
-                    "start_time": comp.get("start_time", ""),
-                    "end_time": comp.get("end_time", ""),
-                    "timezone": comp.get("timezone", "UTC+8"),
-                    "total_reward": comp.get("total_reward"),
-                    "winner_count": comp.get("winner_count"),
-                    "per_user_reward": comp.get("per_user_reward"),
-                    "status": comp.get("status", "进行中"),
-                    "note": comp.get("note", "")
-                }
-        
-        for comp in file_config.get("ended_competitions", []):
-            symbol = comp.get("symbol", "").upper()
-            if symbol and symbol not in competitions:
-                competitions[symbol] = {
-                    "name": comp.get("name", f"{symbol} Alpha 竞赛"),
-                    "token_name": comp.get("token_name", symbol),
-                    "start_time": comp.get("start_time", ""),
-                    "end_time": comp.get("end_time", ""),
-                    "timezone": comp.get("timezone", "UTC+8"),
-                    "total_reward": comp.get("total_reward"),
-                    "winner_count": comp.get("winner_count"),
-                    "per_user_reward": comp.get("per_user_reward"),
-                    "status": "已结束",
-                    "note": comp.get("note", "")
-                }
-        
-        return competitions
-    
-    return DEFAULT_ALPHA_COMPETITIONS
+    return alpha_config_store.competitions(detect_ended=False)
 
 
 def auto_detect_alpha_competitions() -> Dict[str, Any]:
     """自动检测Alpha竞赛信息"""
-    config = get_alpha_competitions_config()
-    now = datetime.now()
-    
-    for symbol, comp in config.items():
-        if comp.get("status") == "进行中":
-            try:
-                end_time = datetime.strptime(comp["end_time"], "%Y-%m-%d %H:%M:%S")
-                if end_time < now:
-                    comp["status"] = "已结束"
-            except:
-                pass
-    
-    return config
+    return alpha_config_store.competitions()
 
 
 def get_alpha_airdrops_config() -> Dict[str, Any]:
     """获取Alpha空投配置"""
-    file_config = load_alpha_config_from_file()
-    
-    if file_config and "alpha_airdrops" in file_config:
-        airdrops = {}
-        for airdrop in file_config.get("alpha_airdrops", []):
-            symbol = airdrop.get("symbol", "").upper()
-            if symbol:
-                airdrops[symbol] = {
-                    "name": airdrop.get("name", symbol),
-                    "launch_date": airdrop.get("launch_date", ""),
-                    "min_points": airdrop.get("min_points", 0),
-                    "airdrop_amount": airdrop.get("airdrop_amount", 0),
-                    "status": airdrop.get("status", "已结束")
-                }
-        return airdrops if airdrops else DEFAULT_ALPHA_AIRDROPS
-    
-    return DEFAULT_ALPHA_AIRDROPS
+    return alpha_config_store.airdrops()
 
 
 def add_alpha_competition(symbol: str, name: str, start_time: str, end_time: str,
@@ -123,14 +306,6 @@ def add_alpha_competition(symbol: str, name: str, start_time: str, end_time: str
     """添加新的Alpha竞赛到配置"""
     symbol = symbol.upper()
     
-    file_config = load_alpha_config_from_file() or {
-        "last_updated": "",
-        "active_competitions": [],
-        "ended_competitions": [],
-        "alpha_airdrops": [],
-        "coingecko_id_mapping": {}
-    }
-    
     new_competition = {
         "symbol": symbol,
         "name": name,
@@ -144,22 +319,32 @@ def add_alpha_competition(symbol: str, name: str, start_time: str, end_time: str
         "status": "进行中",
         "note": note
     }
-    
     existing = False
-    for i, comp in enumerate(file_config.get("active_competitions", [])):
-        if comp.get("symbol", "").upper() == symbol:
-            file_config["active_competitions"][i] = new_competition
-            existing = True
-            break
-    
-    if not existing:
-        if "active_competitions" not in file_config:
-            file_config["active_competitions"] = []
-        file_config["active_competitions"].append(new_competition)
-    
-    file_config["last_updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def mutate(file_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        nonlocal existing
+        file_config = file_config or {
+            "last_updated": "",
+            "active_competitions": [],
+            "ended_competitions": [],
+            "alpha_airdrops": [],
+            "coingecko_id_mapping": {}
+        }
+        for i, comp in enumerate(file_config.get("active_competitions", [])):
+            if comp.get("symbol", "").upper() == symbol:
+                file_config["active_competitions"][i] = new_competition
+                existing = True
+                break
+        
+        if not existing:
+            if "active_competitions" not in file_config:
+                file_config["active_competitions"] = []
+            file_config["active_competitions"].append(new_competition)
+        
+        file_config["last_updated"] = datetime.now().strftime(_TIME_FORMAT)
+        return file_config
     
-    if save_alpha_config_to_file(file_config):
+    if alpha_config_store.update(mutate):
         return {
             "success": True,
             "message": f"已{'更新' if existing else '添加'}竞赛: {name}",
@@ -170,5 +355,3 @@ def add_alpha_competition(symbol: str, name: str, start_time: str, end_time: str
             "success": False,
             "message": "保存配置文件失败"
         }
-
-
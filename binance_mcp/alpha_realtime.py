@@ -8,6 +8,8 @@ from typing import Dict, Any
 from datetime import datetime, timedelta
 
 from .config import ALPHA123_API, ALPHA123_HEADERS
+from .context import request_timeout
+from .utils import format_usd
 
 
 def fetch_realtime_alpha_airdrops() -> Dict[str, Any]:
@@ -15,7 +17,7 @@ def fetch_realtime_alpha_airdrops() -> Dict[str, Any]:
     url = f"{ALPHA123_API}/data?t={int(datetime.now().timestamp() * 1000)}&fresh=1"
     
     try:
-        response = requests.get(url, headers=ALPHA123_HEADERS, timeout=15)
+        response = requests.get(url, headers=ALPHA123_HEADERS, timeout=request_timeout(15))
         response.raise_for_status()
         data = response.json()
         
@@ -52,7 +54,7 @@ def fetch_alpha_token_price_from_alpha123(token: str) -> Dict[str, Any]:
     url = f"{ALPHA123_API}/price/{token}?t={int(datetime.now().timestamp() * 1000)}&fresh=1"
     
     try:
-        response = requests.get(url, headers=ALPHA123_HEADERS, timeout=10)
+        response = requests.get(url, headers=ALPHA123_HEADERS, timeout=request_timeout(10))
         response.raise_for_status()
         data = response.json()
         
@@ -118,8 +120,8 @@ def get_realtime_alpha_airdrops() -> Dict[str, Any]:
             "amount": amount,
             "phase": phase,
             "type": airdrop_type,
-            "current_price": f"${price:.6f}" if price else "获取中...",
-            "total_value": f"${total_value:.2f}" if total_value else "待计算",
+            "current_price": format_usd(price, 6, grouping=False) if price else "获取中...",
+            "total_value": format_usd(total_value, 2, grouping=False) if total_value else "待计算",
             "status": "已完成" if completed else status
         }
         
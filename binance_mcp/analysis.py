@@ -3,10 +3,11 @@
 综合分析功能 - 技术分析、市场因素、K线形态
 """
 
-from typing import Dict, Any
+from typing import Dict, List, Any
 from datetime import datetime
 
-from .utils import format_number
+from .utils import format_number, format_percent, format_usd, safe_float
+from .resample import can_resample, resample_klines, compare_klines
 from .indicators import (
     calculate_rsi, calculate_macd, calculate_bollinger_bands,
     calculate_support_resistance, analyze_trend_pattern, predict_price_probability
@@ -14,7 +15,8 @@ from .indicators import (
 from .api import (
     get_ticker_24h, get_klines, get_futures_ticker_24h, get_futures_klines,
     get_mark_price, get_open_interest, get_open_interest_hist,
-    get_top_long_short_ratio, get_global_long_short_ratio, get_taker_buy_sell_ratio
+    get_top_long_short_ratio, get_global_long_short_ratio, get_taker_buy_sell_ratio,
+    get_raw_klines
 )
 
 
@@ -122,28 +124,28 @@ def comprehensive_analysis(symbol: str) -> Dict[str, Any]:
                 "description": f"MACD柱状图{'为正，多头动能' if macd['histogram'] > 0 else '为负，空头动能'}（1小时K线）"
             },
             "bollinger_bands": {
-                "upper": f"${bb['upper']:,.4f}",
-                "middle": f"${bb['middle']:,.4f}",
-                "lower": f"${bb['lower']:,.4f}",
-                "bandwidth": f"{bb['bandwidth']:.2f}%",
+                "upper": format_usd(bb['upper']),
+                "middle": format_usd(bb['middle']),
+                "lower": format_usd(bb['lower']),
+                "bandwidth": format_percent(bb['bandwidth'], signed=False),
                 "position": "上轨附近" if closes[-1] > bb["upper"] * 0.98 else (
                     "下轨附近" if closes[-1] < bb["lower"] * 1.02 else "中轨区域"
                 ),
                 "note": "基于1小时K线"
             },
             "moving_averages": {
-                "ma7": f"${ma7:,.4f}",
-                "ma20": f"${ma20:,.4f}",
-                "ma50": f"${ma50:,.4f}",
-                "price_vs_ma7": f"{(closes[-1] / ma7 - 1) * 100:+.2f}%",
-                "price_vs_ma20": f"{(closes[-1] / ma20 - 1) * 100:+.2f}%",
+                "ma7": format_usd(ma7),
+                "ma20": format_usd(ma20),
+                "ma50": format_usd(ma50),
+                "price_vs_ma7": format_percent((closes[-1] / ma7 - 1) * 100),
+                "price_vs_ma20": format_percent((closes[-1] / ma20 - 1) * 100),
                 "note": "均线基于1小时K线计算"
             }
         },
         
         "support_resistance": {
-            "resistance_levels": [f"${r:,.4f}" for r in sr["resistance"][:3]],
-            "support_levels": [f"${s:,.4f}" for s in sr["support"][:3]],
+            "resistance_levels": [format_usd(r) for r in sr["resistance"][:3]],
+            "support_levels": [format_usd(s) for s in sr["support"][:3]],
             "note": "基于1小时K线的高低点计算"
         },
         
@@ -200,10 +202,10 @@ def analyze_market_factors(symbol: str) -> Dict[str, Any]:
         "price": ticker["price_formatted"],
         "change_24h": ticker["price_change_display"],
         "market_comparison": {
-            "btc_change_24h": f"{btc_change:+.2f}%",
-            "eth_change_24h": f"{eth_change:+.2f}%",
-            "vs_btc": f"{vs_btc:+.2f}%",
-            "vs_eth": f"{vs_eth:+.2f}%",
+            "btc_change_24h": format_percent(btc_change),
+            "eth_change_24h": format_percent(eth_change),
+            "vs_btc": format_percent(vs_btc),
+            "vs_eth": format_percent(vs_eth),
             "relative_strength": "强于大盘" if vs_btc > 0 else "弱于大盘"
         },
         "factors": factors if factors else ["市场平稳，无特殊因素"],
@@ -319,10 +321,10 @@ def analyze_kline_patterns(symbol: str, interval: str = "4h") -> Dict[str, Any]:
         "pattern_count": len(patterns),
         "latest_kline": {
             "time": klines[-1]["open_time"],
-            "open": f"${klines[-1]['open']:,.4f}",
-            "high": f"${klines[-1]['high']:,.4f}",
-            "low": f"${klines[-1]['low']:,.4f}",
-            "close": f"${klines[-1]['close']:,.4f}",
+            "open": format_usd(klines[-1]['open']),
+            "high": format_usd(klines[-1]['high']),
+            "low": format_usd(klines[-1]['low']),
+            "close": format_usd(klines[-1]['close']),
             "volume": format_number(klines[-1]["volume"])
         },
         "analysis_summary": f"当前处于{overall_pattern}（基于{interval}K线），" + (
@@ -331,6 +333,97 @@ def analyze_kline_patterns(symbol: str, interval: str = "4h") -> Dict[str, Any]:
     }
 
 
+def _timeframe_indicators(rows: List[List[Any]]) -> Dict[str, Any]:
+    """对一个周期的原始K线计算指标集"""
+    closes = [safe_float(r[4]) for r in rows]
+    if len(closes) < 20:
+        return {"bars": len(closes), "sufficient_data": False, "note": "K线数量不足20根，指标不可靠"}
+
+    rsi = calculate_rsi(closes)
+    macd = calculate_macd(closes)
+    bb = calculate_bollinger_bands(closes)
+    trend = analyze_trend_pattern(closes)
+    prediction = predict_price_probability(closes, rsi, macd, bb)
+    ma20 = sum(closes[-20:]) / 20
+
+    return {
+        "bars": len(closes),
+        "sufficient_data": len(closes) >= 50,
+        "close": format_usd(closes[-1]),
+        "trend": trend["trend"],
+        "trend_score": trend["trend_score"],
+        "rsi": rsi,
+        "rsi_signal": "超卖" if rsi < 30 else ("超买" if rsi > 70 else "中性"),
+        "macd_histogram": macd["histogram"],
+        "macd_signal": "多头" if macd["histogram"] > 0 else "空头",
+        "bollinger_position": "上轨附近" if closes[-1] > bb["upper"] * 0.98 else (
+            "下轨附近" if closes[-1] < bb["lower"] * 1.02 else "中轨区域"
+        ),
+        "price_vs_ma20": format_percent((closes[-1] / ma20 - 1) * 100),
+        "up_probability": prediction["up_probability"],
+        "summary": generate_analysis_summary(trend, prediction, rsi, macd),
+    }
+
+
+def multi_timeframe_analysis(symbol: str, timeframes: List[str] = None, base_interval: str = "1h",
+                             market: str = "spot", verify: bool = False) -> Dict[str, Any]:
+    """
+    多周期技术分析（一次拉取基础周期K线，本地合成更高周期）
+
+    参数：
+    - symbol: 交易对符号
+    - timeframes: 分析周期列表，默认 ["1h", "4h", "1d"]，须为 base_interval 的整数倍（支持到1w）
+    - base_interval: 基础周期，默认"1h"（1000根约41天）；需要更短周期时可用"1m"/"15m"
+    - market: "spot" 或 "futures"
+    - verify: 为 True 时额外拉取币安原生周期K线，逐根核对合成结果（会增加请求）
+    """
+    timeframes = timeframes or ["1h", "4h", "1d"]
+    invalid = [tf for tf in timeframes if not can_resample(base_interval, tf)]
+    if invalid:
+        return {"error": f"周期 {invalid} 无法由{base_interval}合成，须为{base_interval}的整数倍且不超过1w"}
+
+    base = get_raw_klines(symbol, base_interval, 1000, market)
+    if "error" in base:
+        return base
+    if not base["rows"]:
+        return {"error": "未获取到K线数据", "symbol": base["symbol"]}
+
+    results = {}
+    verification = {}
+    for tf in timeframes:
+        rows = resample_klines(base["rows"], base_interval, tf)
+        results[tf] = _timeframe_indicators(rows)
+
+        if verify and tf != base_interval:
+            native = get_raw_klines(base["symbol"], tf, len(rows), "futures" if base["market"] == "合约" else "spot")
+            if "error" in native:
+                verification[tf] = {"error": native["error"]}
+            else:
+                verification[tf] = compare_klines(rows, native["rows"])
+
+    scores = [r["trend_score"] for r in results.values() if "trend_score" in r]
+    if scores and all(s >= 1 for s in scores):
+        alignment = "多周期共振向上"
+    elif scores and all(s <= -1 for s in scores):
+        alignment = "多周期共振向下"
+    else:
+        alignment = "周期间方向分歧"
+
+    response = {
+        "symbol": base["symbol"],
+        "market": base["market"],
+        "base_interval": base_interval,
+        "base_bars": len(base["rows"]),
+        "timeframes": results,
+        "alignment": alignment,
+        "note": f"⚠️ 各周期K线由{len(base['rows'])}根{base_interval}K线合成，只请求一次币安；"
+                f"高周期K线数量有限（sufficient_data=false 时指标仅供参考）",
+    }
+    if verify:
+        response["verification"] = verification
+    return response
+
+
 def comprehensive_analysis_futures(symbol: str) -> Dict[str, Any]:
     """
     合约版综合技术分析（基于1小时K线）
@@ -380,8 +473,8 @@ def comprehensive_analysis_futures(symbol: str) -> Dict[str, Any]:
         funding_time = mark_price_data.get("next_funding_time", "未知")
         
         futures_indicators["funding_rate"] = {
-            "current_rate": f"{funding_rate_pct:.4f}%",
-            "annual_rate": f"{funding_rate_pct * 3 * 365:.2f}%",
+            "current_rate": format_percent(funding_rate_pct, 4, signed=False),
+            "annual_rate": format_percent(funding_rate_pct * 3 * 365, signed=False),
             "next_settlement": funding_time,
             "signal": "多头支付空头" if funding_rate > 0 else "空头支付多头",
             "description": (
@@ -405,7 +498,7 @@ def comprehensive_analysis_futures(symbol: str) -> Dict[str, Any]:
             last = hist_list[-1]
             oi_value_usd = last.get("open_interest_value")
             if oi_value_usd and oi_value_usd > 0:
-                oi_value_usd = f"${oi_value_usd:,.0f}"
+                oi_value_usd = format_usd(oi_value_usd, 0)
         if "error" not in oi_hist_data and len(hist_list) >= 2:
             recent_oi = hist_list[-1].get("open_interest_value", 0)
             past_oi = hist_list[0].get("open_interest_value", 0)
@@ -423,7 +516,7 @@ def comprehensive_analysis_futures(symbol: str) -> Dict[str, Any]:
             "value": oi_formatted if oi_formatted != "N/A" else f"{oi:,.2f}",
             "value_usd": oi_value_usd,
             "trend_24h": oi_trend,
-            "change_24h": f"{oi_change_pct:+.2f}%",
+            "change_24h": format_percent(oi_change_pct),
             "description": (
                 f"持仓量{oi_trend}，"
                 f"{'市场参与度提升，趋势可能延续' if oi_change_pct > 5 else ('持仓量减少，可能面临反转' if oi_change_pct < -5 else '持仓量稳定')}"
@@ -457,28 +550,28 @@ def comprehensive_analysis_futures(symbol: str) -> Dict[str, Any]:
                 "description": f"MACD柱状图{'为正，多头动能' if macd['histogram'] > 0 else '为负，空头动能'}（1小时K线）"
             },
             "bollinger_bands": {
-                "upper": f"${bb['upper']:,.4f}",
-                "middle": f"${bb['middle']:,.4f}",
-                "lower": f"${bb['lower']:,.4f}",
-                "bandwidth": f"{bb['bandwidth']:.2f}%",
+                "upper": format_usd(bb['upper']),
+                "middle": format_usd(bb['middle']),
+                "lower": format_usd(bb['lower']),
+                "bandwidth": format_percent(bb['bandwidth'], signed=False),
                 "position": "上轨附近" if closes[-1] > bb["upper"] * 0.98 else (
                     "下轨附近" if closes[-1] < bb["lower"] * 1.02 else "中轨区域"
                 ),
                 "note": "基于1小时K线"
             },
             "moving_averages": {
-                "ma7": f"${ma7:,.4f}",
-                "ma20": f"${ma20:,.4f}",
-                "ma50": f"${ma50:,.4f}",
-                "price_vs_ma7": f"{(closes[-1] / ma7 - 1) * 100:+.2f}%",
-                "price_vs_ma20": f"{(closes[-1] / ma20 - 1) * 100:+.2f}%",
+                "ma7": format_usd(ma7),
+                "ma20": format_usd(ma20),
+                "ma50": format_usd(ma50),
+                "price_vs_ma7": format_percent((closes[-1] / ma7 - 1) * 100),
+                "price_vs_ma20": format_percent((closes[-1] / ma20 - 1) * 100),
                 "note": "均线基于1小时K线计算"
             }
         },
 
         "support_resistance": {
-            "resistance_levels": [f"${r:,.4f}" for r in sr["resistance"][:3]],
-            "support_levels": [f"${s:,.4f}" for s in sr["support"][:3]],
+            "resistance_levels": [format_usd(r) for r in sr["resistance"][:3]],
+            "support_levels": [format_usd(s) for s in sr["support"][:3]],
             "note": "基于1小时K线的高低点计算"
         },
 
@@ -546,10 +639,10 @@ def analyze_futures_kline_patterns(symbol: str, interval: str = "4h") -> Dict[st
         "pattern_count": len(patterns),
         "latest_kline": {
             "time": klines[-1]["open_time"],
-            "open": f"${klines[-1]['open']:,.4f}",
-            "high": f"${klines[-1]['high']:,.4f}",
-            "low": f"${klines[-1]['low']:,.4f}",
-            "close": f"${klines[-1]['close']:,.4f}",
+            "open": format_usd(klines[-1]['open']),
+            "high": format_usd(klines[-1]['high']),
+            "low": format_usd(klines[-1]['low']),
+            "close": format_usd(klines[-1]['close']),
             "volume": format_number(klines[-1]["volume"])
         },
         "analysis_summary": f"当前处于{overall_pattern}（基于{interval}K线），" + (
@@ -670,10 +763,10 @@ def analyze_futures_market_factors(symbol: str) -> Dict[str, Any]:
         "price": ticker["price_formatted"],
         "change_24h": ticker["price_change_display"],
         "market_comparison": {
-            "btc_change_24h": f"{btc_change:+.2f}%",
-            "eth_change_24h": f"{eth_change:+.2f}%",
-            "vs_btc": f"{vs_btc:+.2f}%",
-            "vs_eth": f"{vs_eth:+.2f}%",
+            "btc_change_24h": format_percent(btc_change),
+            "eth_change_24h": format_percent(eth_change),
+            "vs_btc": format_percent(vs_btc),
+            "vs_eth": format_percent(vs_eth),
             "relative_strength": "强于大盘" if vs_btc > 0 else "弱于大盘"
         },
         "factors": factors if factors else ["市场平稳，无特殊因素"],
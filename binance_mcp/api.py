@@ -3,13 +3,19 @@
 币安API调用 - 现货、合约、K线等接口
 """
 
+import heapq
 import requests
 from typing import Dict, List, Any
 from datetime import datetime
 
 from .config import SPOT_BASE_URLS, FUTURES_BASE_URLS, FUTURES_DATA_BASE_URLS, HEADERS, KLINE_INTERVALS, ALPHA_BASE_URL
-from .utils import format_number, timestamp_to_datetime, safe_float
-from .request_pool import fetch_spot_with_dedup, fetch_futures_with_dedup, fetch_futures_data_with_dedup
+from .utils import format_number, format_percent, format_usd, format_usd_short, timestamp_to_datetime, safe_float
+from .request_pool import fetch_spot_with_dedup, fetch_futures_with_dedup, fetch_futures_data_with_dedup, observe_used_weight
+from .rankings import get_market_ranking, RANK_TYPES
+from .funding_store import funding_store as _funding_store
+from .futures_data_store import futures_data_store as _futures_data_store
+from .streams import spot_stream as _spot_stream, futures_stream as _futures_stream
+from .context import check_cancelled, memoize_per_call, request_timeout, DeadlineExceeded
 
 
 # Alpha代币符号缓存
@@ -19,6 +25,24 @@ _alpha_token_list_cache = None
 _alpha_token_list_cache_time = None
 
 
+def _deadline_error(e: DeadlineExceeded, last_error: str = None) -> Dict[str, Any]:
+    """时间预算用完：不再尝试其余域名（network_error 使请求池在 sie 内返回旧值）"""
+    error = f"请求超时：{e}" + (f"（此前错误：{last_error}）" if last_error else "")
+    return {"success": False, "error": error, "network_error": True, "deadline_exceeded": True}
+
+
+def _with_streamed_kline(rows: List[List[Any]], streamed: List[Any] = None) -> List[List[Any]]:
+    """用推流的最新一根 K 线（订阅了该标的/周期时才有）更新 REST 结果的最后一根或追加一根；不修改传入的列表"""
+    if not streamed or not rows:
+        return rows
+    last = rows[-1]
+    if int(streamed[0]) == int(last[0]):
+        return rows[:-1] + [streamed]
+    if int(streamed[0]) > int(last[6]):
+        return rows[1:] + [streamed]  # REST 缓存后新开了一根，保持条数不变
+    return rows
+
+
 def _do_spot_request(endpoint: str, params: Dict = None) -> Dict[str, Any]:
     """实际发起现货API请求（供 request_pool 合并/缓存后调用）"""
     last_error = None
@@ -27,7 +51,8 @@ def _do_spot_request(endpoint: str, params: Dict = None) -> Dict[str, Any]:
     for base_url in SPOT_BASE_URLS:
         url = f"{base_url}{endpoint}"
         try:
-            response = requests.get(url, params=params, headers=HEADERS, timeout=10)
+            response = requests.get(url, params=params, headers=HEADERS, timeout=request_timeout(10))
+            observe_used_weight(response.headers.get("X-MBX-USED-WEIGHT-1M"), "spot")
             
             # 检查地区限制
             if response.status_code == 451:
@@ -35,12 +60,16 @@ def _do_spot_request(endpoint: str, params: Dict = None) -> Dict[str, Any]:
             
             response.raise_for_status()
             return {"success": True, "data": response.json()}
+        except DeadlineExceeded as e:
+            return _deadline_error(e, last_error)
         except requests.exceptions.HTTPError as e:
             if response.status_code == 451:
                 last_error = "API访问受地区限制，请使用VPN或代理"
                 is_network_error = True
                 continue
             last_error = f"HTTP错误: {response.status_code}"
+            if response.status_code < 500:
+                break  # 参数 / 交易对错误，其他域名结果相同
         except requests.exceptions.ConnectionError as e:
             last_error = "网络连接失败，请检查网络或代理设置"
             is_network_error = True
@@ -64,8 +93,10 @@ def _do_spot_request(endpoint: str, params: Dict = None) -> Dict[str, Any]:
     }
 
 
+@memoize_per_call
 def make_spot_request(endpoint: str, params: Dict = None) -> Dict[str, Any]:
     """发起现货API请求，自动尝试备用域名；经请求合并与缓存，多用户同机访问时减少对币安API调用"""
+    check_cancelled()
     return fetch_spot_with_dedup(endpoint, params, lambda: _do_spot_request(endpoint, params))
 
 
@@ -77,18 +108,23 @@ def _do_futures_request(endpoint: str, params: Dict = None) -> Dict[str, Any]:
     for base_url in FUTURES_BASE_URLS:
         url = f"{base_url}{endpoint}"
         try:
-            response = requests.get(url, params=params, headers=HEADERS, timeout=10)
+            response = requests.get(url, params=params, headers=HEADERS, timeout=request_timeout(10))
+            observe_used_weight(response.headers.get("X-MBX-USED-WEIGHT-1M"), "futures")
 
             if response.status_code == 451:
                 continue
             response.raise_for_status()
             return {"success": True, "data": response.json()}
+        except DeadlineExceeded as e:
+            return _deadline_error(e, last_error)
         except requests.exceptions.HTTPError as e:
             if response.status_code == 451:
                 last_error = "API访问受地区限制，请使用VPN或代理"
                 is_network_error = True
                 continue
             last_error = f"HTTP错误: {response.status_code}"
+            if response.status_code < 500:
+                break  # 参数 / 交易对错误，其他域名结果相同
         except requests.exceptions.ConnectionError as e:
             last_error = "网络连接失败，请检查网络或代理设置"
             is_network_error = True
@@ -112,8 +148,10 @@ def _do_futures_request(endpoint: str, params: Dict = None) -> Dict[str, Any]:
     }
 
 
+@memoize_per_call
 def make_futures_request(endpoint: str, params: Dict = None) -> Dict[str, Any]:
     """发起合约API请求，自动尝试备用域名；经请求合并与缓存，多用户同机访问时减少对币安API调用"""
+    check_cancelled()
     return fetch_futures_with_dedup(endpoint, params, lambda: _do_futures_request(endpoint, params))
 
 
@@ -125,18 +163,23 @@ def _do_futures_data_request(endpoint: str, params: Dict = None) -> Dict[str, An
     for base_url in FUTURES_DATA_BASE_URLS:
         url = f"{base_url.rstrip('/')}/{endpoint.lstrip('/')}"
         try:
-            response = requests.get(url, params=params, headers=HEADERS, timeout=10)
+            response = requests.get(url, params=params, headers=HEADERS, timeout=request_timeout(10))
+            observe_used_weight(response.headers.get("X-MBX-USED-WEIGHT-1M"), "futures_data")
 
             if response.status_code == 451:
                 continue
             response.raise_for_status()
             return {"success": True, "data": response.json()}
+        except DeadlineExceeded as e:
+            return _deadline_error(e, last_error)
         except requests.exceptions.HTTPError as e:
             if response.status_code == 451:
                 last_error = "API访问受地区限制，请使用VPN或代理"
                 is_network_error = True
                 continue
             last_error = f"HTTP错误: {response.status_code}"
+            if response.status_code < 500:
+                break  # 参数 / 交易对错误，其他域名结果相同
         except requests.exceptions.ConnectionError as e:
             last_error = "网络连接失败，请检查网络或代理设置"
             is_network_error = True
@@ -160,8 +203,10 @@ def _do_futures_data_request(endpoint: str, params: Dict = None) -> Dict[str, An
     }
 
 
+@memoize_per_call
 def make_futures_data_request(endpoint: str, params: Dict = None) -> Dict[str, Any]:
     """发起合约数据API请求（/futures/data/* 持仓量、多空比等）；经请求合并与缓存，多用户同机访问时减少对币安API调用"""
+    check_cancelled()
     return fetch_futures_data_with_dedup(endpoint, params, lambda: _do_futures_data_request(endpoint, params))
 
 
@@ -177,23 +222,28 @@ def _futures_trading_symbol_set(exchange_info_data: Dict) -> set:
     }
 
 
+@memoize_per_call
 def make_alpha_request(endpoint: str, params: Dict = None) -> Dict[str, Any]:
     """发起Alpha API请求"""
+    check_cancelled()
     url = f"{ALPHA_BASE_URL}{endpoint}"
     try:
-        response = requests.get(url, params=params, headers=HEADERS, timeout=15)
+        response = requests.get(url, params=params, headers=HEADERS, timeout=request_timeout(15))
         response.raise_for_status()
         data = response.json()
         
         if data.get("success") or data.get("code") == "000000":
             return {"success": True, "data": data.get("data", data)}
         return {"success": False, "error": data.get("message", "Alpha API返回错误")}
+    except DeadlineExceeded as e:
+        return _deadline_error(e)
     except requests.exceptions.HTTPError as e:
         return {"success": False, "error": f"HTTP错误: {response.status_code}"}
     except requests.exceptions.RequestException as e:
         return {"success": False, "error": str(e)}
 
 
+@memoize_per_call
 def get_alpha_token_list() -> Dict[str, Any]:
     """获取Alpha代币列表（包含代币名称映射）"""
     global _alpha_token_list_cache, _alpha_token_list_cache_time
@@ -207,7 +257,7 @@ def get_alpha_token_list() -> Dict[str, Any]:
     
     url = "https://www.binance.com/bapi/defi/v1/public/wallet-direct/buw/wallet/cex/alpha/all/token/list"
     try:
-        response = requests.get(url, headers=HEADERS, timeout=15)
+        response = requests.get(url, headers=HEADERS, timeout=request_timeout(15))
         response.raise_for_status()
         data = response.json()
         
@@ -221,6 +271,7 @@ def get_alpha_token_list() -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
+@memoize_per_call
 def get_alpha_exchange_info() -> Dict[str, Any]:
     """获取Alpha交易所信息（包含所有Alpha代币列表）"""
     global _alpha_symbols_cache, _alpha_symbols_cache_time
@@ -266,6 +317,7 @@ def is_alpha_token(symbol: str) -> bool:
     return False
 
 
+@memoize_per_call
 def get_alpha_ticker(symbol: str) -> Dict[str, Any]:
     """获取Alpha代币24小时行情"""
     symbol = symbol.upper()
@@ -303,16 +355,16 @@ def get_alpha_ticker(symbol: str) -> Dict[str, Any]:
         "name": token_info.get("name"),
         "market": "Alpha",
         "price": price,
-        "price_formatted": f"${price:,.6f}",
+        "price_formatted": format_usd(price, 6),
         "price_change_percent": price_change_pct,
-        "price_change_display": f"{price_change_pct:+.2f}%",
+        "price_change_display": format_percent(price_change_pct),
         "high_24h": high_24h,
         "low_24h": low_24h,
         "volume_24h": volume_24h,
         "quote_volume_24h": volume_24h,
-        "quote_volume_formatted": f"${format_number(volume_24h)}",
+        "quote_volume_formatted": format_usd_short(volume_24h),
         "market_cap": market_cap,
-        "market_cap_formatted": f"${format_number(market_cap)}",
+        "market_cap_formatted": format_usd_short(market_cap),
         "chain": token_info.get("chainName", ""),
         "holders": token_info.get("holders", 0),
         "trend_emoji": "🟢" if price_change_pct > 0 else ("🔴" if price_change_pct < 0 else "⚪"),
@@ -320,13 +372,18 @@ def get_alpha_ticker(symbol: str) -> Dict[str, Any]:
     }
 
 
+@memoize_per_call
 def get_spot_price(symbol: str, try_alpha: bool = True) -> Dict[str, Any]:
     """获取现货价格（现货优先，找不到时尝试Alpha市场）"""
     symbol = symbol.upper()
     if not symbol.endswith("USDT"):
         symbol = symbol + "USDT"
     
-    result = make_spot_request("/ticker/price", {"symbol": symbol})
+    streamed = _spot_stream.ticker(symbol)
+    if streamed is not None:
+        result = {"success": True, "data": {"symbol": symbol, "price": streamed["lastPrice"]}}
+    else:
+        result = make_spot_request("/ticker/price", {"symbol": symbol})
     
     if not result["success"]:
         # 如果是HTTP 400错误（交易对不存在），尝试Alpha市场
@@ -354,17 +411,22 @@ def get_spot_price(symbol: str, try_alpha: bool = True) -> Dict[str, Any]:
         "symbol": data["symbol"],
         "market": "现货",
         "price": safe_float(data["price"]),
-        "price_formatted": f"${safe_float(data['price']):,.4f}"
+        "price_formatted": format_usd(safe_float(data['price']))
     }
 
 
+@memoize_per_call
 def get_ticker_24h(symbol: str, try_alpha: bool = True, try_futures: bool = True) -> Dict[str, Any]:
     """获取24小时行情数据（现货优先，找不到时尝试Alpha市场，再尝试合约市场）"""
     symbol = symbol.upper()
     if not symbol.endswith("USDT"):
         symbol = symbol + "USDT"
     
-    result = make_spot_request("/ticker/24hr", {"symbol": symbol})
+    streamed = _spot_stream.ticker(symbol)
+    if streamed is not None:
+        result = {"success": True, "data": streamed}
+    else:
+        result = make_spot_request("/ticker/24hr", {"symbol": symbol})
     
     if not result["success"]:
         # 如果是HTTP 400错误（交易对不存在），依次尝试Alpha市场和合约市场
@@ -395,19 +457,19 @@ def get_ticker_24h(symbol: str, try_alpha: bool = True, try_futures: bool = True
         "symbol": data["symbol"],
         "market": "现货",
         "price": safe_float(data["lastPrice"]),
-        "price_formatted": f"${safe_float(data['lastPrice']):,.4f}",
+        "price_formatted": format_usd(safe_float(data['lastPrice'])),
         "price_change": safe_float(data["priceChange"]),
         "price_change_percent": price_change_pct,
-        "price_change_display": f"{price_change_pct:+.2f}%",
+        "price_change_display": format_percent(price_change_pct),
         "high_24h": safe_float(data["highPrice"]),
         "low_24h": safe_float(data["lowPrice"]),
         "volume_24h": safe_float(data["volume"]),
         "volume_24h_formatted": format_number(safe_float(data["volume"])),
         "quote_volume_24h": safe_float(data["quoteVolume"]),
-        "quote_volume_formatted": f"${format_number(safe_float(data['quoteVolume']))}",
+        "quote_volume_formatted": format_usd_short(safe_float(data['quoteVolume'])),
         "open_price": safe_float(data["openPrice"]),
         "weighted_avg_price": safe_float(data["weightedAvgPrice"]),
-        "trade_count": int(data.get("count", 0)),
+        "trade_count": int(data["count"]) if "count" in data else None,  # 推流迷你行情不含成交笔数
         "trend_emoji": "🟢" if price_change_pct > 0 else ("🔴" if price_change_pct < 0 else "⚪")
     }
 
@@ -421,6 +483,7 @@ def get_multiple_tickers(symbols: List[str]) -> Dict[str, Any]:
     return results
 
 
+@memoize_per_call
 def get_klines(symbol: str, interval: str = "1h", limit: int = 100, try_alpha: bool = True, try_futures: bool = True) -> Dict[str, Any]:
     """获取K线数据（现货优先，找不到时尝试Alpha市场，再尝试合约市场）"""
     symbol = symbol.upper()
@@ -458,7 +521,7 @@ def get_klines(symbol: str, interval: str = "1h", limit: int = 100, try_alpha: b
             error_response["user_action_required"] = result.get("user_action_required", "")
         return error_response
     
-    data = result["data"]
+    data = _with_streamed_kline(result["data"], _spot_stream.kline(symbol, interval))
     klines = []
     for k in data:
         klines.append({
@@ -482,6 +545,87 @@ def get_klines(symbol: str, interval: str = "1h", limit: int = 100, try_alpha: b
     }
 
 
+def get_raw_klines(symbol: str, interval: str = "1h", limit: int = 1000, market: str = "spot",
+                   end_time: int = None) -> Dict[str, Any]:
+    """获取币安原始K线数组（毫秒时间戳、未格式化），供重采样和多周期分析使用；现货不存在时回退合约"""
+    symbol = symbol.upper()
+    if not symbol.endswith("USDT"):
+        symbol = symbol + "USDT"
+
+    if interval not in KLINE_INTERVALS:
+        return {"error": f"不支持的时间周期: {interval}，支持的周期: {list(KLINE_INTERVALS.keys())}"}
+    if market not in ("spot", "futures"):
+        return {"error": f"不支持的市场: {market}，支持的市场: ['spot', 'futures']"}
+
+    params = {"symbol": symbol, "interval": interval, "limit": min(limit, 1000)}
+    if end_time is not None:
+        params["endTime"] = int(end_time)
+
+    if market == "spot":
+        result = make_spot_request("/klines", params)
+        if not result["success"] and "400" in str(result.get("error", "")):
+            market = "futures"
+    if market == "futures":
+        result = make_futures_request("/klines", params)
+
+    if not result["success"]:
+        error_response = {"error": result["error"], "symbol": symbol}
+        if result.get("network_error"):
+            error_response["network_error"] = True
+            error_response["stop_execution"] = True
+            error_response["user_action_required"] = result.get("user_action_required", "")
+        return error_response
+
+    rows = result["data"]
+    if end_time is None:
+        stream = _spot_stream if market == "spot" else _futures_stream
+        rows = _with_streamed_kline(rows, stream.kline(symbol, interval))
+
+    return {
+        "symbol": symbol,
+        "market": "现货" if market == "spot" else "合约",
+        "interval": interval,
+        "rows": rows,
+    }
+
+
+def _find_alpha_token(symbol: str) -> Dict[str, Any]:
+    """按代币符号或名称查找Alpha代币（symbol 不带 USDT 后缀）；返回代币信息，或带 error 的字典"""
+    token_list = get_alpha_token_list()
+    if not token_list.get("success"):
+        return {"error": "无法获取Alpha代币列表", "symbol": symbol}
+    
+    for t in token_list.get("data", []):
+        if (t.get("symbol", "").upper() == symbol or t.get("name", "").upper() == symbol) and t.get("alphaId"):
+            return t
+    return {"error": f"未找到Alpha代币: {symbol}", "symbol": symbol}
+
+
+def get_alpha_klines_raw(symbol: str, interval: str, start_time: int = None, end_time: int = None,
+                         limit: int = 1000) -> Dict[str, Any]:
+    """
+    Alpha K线原始数据（与币安 /klines 格式一致：毫秒时间戳、字符串数值），支持 startTime / endTime 增量拉取。
+    返回 {"success": True, "data": [...], "alpha_id", "symbol"}
+    """
+    symbol = symbol.upper()
+    if symbol.endswith("USDT"):
+        symbol = symbol[:-4]
+    token = _find_alpha_token(symbol)
+    if "error" in token:
+        return {"success": False, **token}
+    
+    params = {"symbol": f"{token['alphaId']}USDT", "interval": interval, "limit": min(limit, 1000)}
+    if start_time is not None:
+        params["startTime"] = int(start_time)
+    if end_time is not None:
+        params["endTime"] = int(end_time)
+    result = make_alpha_request("/klines", params)
+    if result["success"]:
+        result = {**result, "alpha_id": token["alphaId"], "symbol": f"{token.get('symbol')}USDT"}
+    return result
+
+
+@memoize_per_call
 def get_alpha_klines(symbol: str, interval: str = "1h", limit: int = 100) -> Dict[str, Any]:
     """获取Alpha代币K线数据"""
     symbol = symbol.upper()
@@ -489,23 +633,11 @@ def get_alpha_klines(symbol: str, interval: str = "1h", limit: int = 100) -> Dic
         symbol = symbol[:-4]  # 去掉USDT后缀
     
     # 从代币列表获取alpha_id
-    token_list = get_alpha_token_list()
-    if not token_list.get("success"):
-        return {"error": "无法获取Alpha代币列表", "symbol": symbol}
-    
-    tokens = token_list.get("data", [])
-    
-    # 查找匹配的代币
-    alpha_id = None
-    token_symbol = None
-    for t in tokens:
-        if t.get("symbol", "").upper() == symbol or t.get("name", "").upper() == symbol:
-            alpha_id = t.get("alphaId")
-            token_symbol = t.get("symbol")
-            break
-    
-    if not alpha_id:
-        return {"error": f"未找到Alpha代币: {symbol}", "symbol": symbol}
+    token = _find_alpha_token(symbol)
+    if "error" in token:
+        return token
+    alpha_id = token.get("alphaId")
+    token_symbol = token.get("symbol")
     
     # 构建Alpha K线请求
     alpha_symbol = f"{alpha_id}USDT"
@@ -516,7 +648,7 @@ def get_alpha_klines(symbol: str, interval: str = "1h", limit: int = 100) -> Dic
             "symbol": alpha_symbol,
             "interval": interval,
             "limit": min(limit, 1000)
-        }, headers=HEADERS, timeout=15)
+        }, headers=HEADERS, timeout=request_timeout(15))
         response.raise_for_status()
         data = response.json()
         
@@ -559,6 +691,7 @@ def get_alpha_klines(symbol: str, interval: str = "1h", limit: int = 100) -> Dic
         return {"error": str(e), "symbol": symbol}
 
 
+@memoize_per_call
 def get_futures_price(symbol: str) -> Dict[str, Any]:
     """获取合约价格"""
     symbol = symbol.upper()
@@ -579,11 +712,12 @@ def get_futures_price(symbol: str) -> Dict[str, Any]:
     return {
         "symbol": data["symbol"],
         "price": safe_float(data["price"]),
-        "price_formatted": f"${safe_float(data['price']):,.4f}",
+        "price_formatted": format_usd(safe_float(data['price'])),
         "time": timestamp_to_datetime(data["time"])
     }
 
 
+@memoize_per_call
 def get_futures_ticker_24h(symbol: str) -> Dict[str, Any]:
     """获取合约24小时行情数据"""
     symbol = symbol.upper()
@@ -607,16 +741,16 @@ def get_futures_ticker_24h(symbol: str) -> Dict[str, Any]:
         "symbol": data["symbol"],
         "market": "合约",
         "price": safe_float(data["lastPrice"]),
-        "price_formatted": f"${safe_float(data['lastPrice']):,.4f}",
+        "price_formatted": format_usd(safe_float(data['lastPrice'])),
         "price_change": safe_float(data["priceChange"]),
         "price_change_percent": price_change_pct,
-        "price_change_display": f"{price_change_pct:+.2f}%",
+        "price_change_display": format_percent(price_change_pct),
         "high_24h": safe_float(data["highPrice"]),
         "low_24h": safe_float(data["lowPrice"]),
         "volume_24h": safe_float(data["volume"]),
         "volume_24h_formatted": format_number(safe_float(data["volume"])),
         "quote_volume_24h": safe_float(data["quoteVolume"]),
-        "quote_volume_formatted": f"${format_number(safe_float(data['quoteVolume']))}",
+        "quote_volume_formatted": format_usd_short(safe_float(data['quoteVolume'])),
         "open_price": safe_float(data["openPrice"]),
         "weighted_avg_price": safe_float(data["weightedAvgPrice"]),
         "trade_count": int(data.get("count", 0)),
@@ -624,6 +758,7 @@ def get_futures_ticker_24h(symbol: str) -> Dict[str, Any]:
     }
 
 
+@memoize_per_call
 def get_futures_klines(symbol: str, interval: str = "1h", limit: int = 100) -> Dict[str, Any]:
     """获取合约K线数据"""
     symbol = symbol.upper()
@@ -647,7 +782,7 @@ def get_futures_klines(symbol: str, interval: str = "1h", limit: int = 100) -> D
             error_response["user_action_required"] = result.get("user_action_required", "")
         return error_response
     
-    data = result["data"]
+    data = _with_streamed_kline(result["data"], _futures_stream.kline(symbol, interval))
     klines = []
     for k in data:
         klines.append({
@@ -701,12 +836,17 @@ def get_funding_rate(symbol: str) -> Dict[str, Any]:
     last_funding_rate = safe_float(premium_data.get("lastFundingRate", 0)) * 100
     next_funding_time = premium_data.get("nextFundingTime", 0)
     
-    # 获取历史费率记录
-    history_result = make_futures_request("/fundingRate", {"symbol": symbol, "limit": 10})
+    # 获取历史费率记录（后台历史库已同步时直接读本地）
     history_data = []
-    if history_result["success"] and history_result["data"]:
-        history_data = [{"rate": f"{safe_float(d['fundingRate']) * 100:+.4f}%", 
-                        "time": timestamp_to_datetime(d['fundingTime'])} for d in history_result["data"][:5]]
+    local_history = _funding_store.history(symbol, 5) if _funding_store.is_fresh() else []
+    if local_history:
+        history_data = [{"rate": format_percent(rate * 100, 4),
+                        "time": timestamp_to_datetime(funding_time)} for funding_time, rate in local_history]
+    else:
+        history_result = make_futures_request("/fundingRate", {"symbol": symbol, "limit": 10})
+        if history_result["success"] and history_result["data"]:
+            history_data = [{"rate": format_percent(safe_float(d['fundingRate']) * 100, 4), 
+                            "time": timestamp_to_datetime(d['fundingTime'])} for d in history_result["data"][:5]]
     
     # 计算年化费率 (每8小时一次，一天3次，一年365天)
     annual_rate = last_funding_rate * 3 * 365
@@ -726,8 +866,8 @@ def get_funding_rate(symbol: str) -> Dict[str, Any]:
     return {
         "symbol": symbol,
         "historical_settled_rate": last_funding_rate,
-        "historical_settled_rate_display": f"{last_funding_rate:+.4f}%",
-        "annual_rate": f"{annual_rate:+.2f}%",
+        "historical_settled_rate_display": format_percent(last_funding_rate, 4),
+        "annual_rate": format_percent(annual_rate),
         "next_funding_time": timestamp_to_datetime(next_funding_time) if next_funding_time else "N/A",
         "countdown": countdown_str,
         "signal": "多头付费" if last_funding_rate > 0 else ("空头付费" if last_funding_rate < 0 else "中性"),
@@ -757,7 +897,7 @@ def get_realtime_funding_rate(symbol: str) -> Dict[str, Any]:
     if not symbol.endswith("USDT"):
         symbol = symbol + "USDT"
     
-    # 获取 premiumIndex 数据
+    # 获取 premiumIndex 数据：预测费率需要 interestRate，标记价格推流不含该字段，因此直接请求 REST
     result = make_futures_request("/premiumIndex", {"symbol": symbol})
     
     if not result["success"]:
@@ -809,27 +949,27 @@ def get_realtime_funding_rate(symbol: str) -> Dict[str, Any]:
     return {
         "symbol": symbol,
         "mark_price": mark_price,
-        "mark_price_display": f"${mark_price:,.4f}",
+        "mark_price_display": format_usd(mark_price),
         "index_price": index_price,
-        "index_price_display": f"${index_price:,.4f}",
+        "index_price_display": format_usd(index_price),
         "premium": premium,
-        "premium_display": f"{premium:+.4f}%",
+        "premium_display": format_percent(premium, 4),
         
         # 当前实时费率（正在生效的费率）
         "current_realtime_rate": last_funding_rate,
-        "current_realtime_rate_display": f"{last_funding_rate:+.4f}%",
-        "current_annual_rate": f"{annual_rate_current:+.2f}%",
+        "current_realtime_rate_display": format_percent(last_funding_rate, 4),
+        "current_annual_rate": format_percent(annual_rate_current),
         "current_signal": "多头付费" if last_funding_rate > 0 else ("空头付费" if last_funding_rate < 0 else "中性"),
         
         # 预测费率（下次将要结算的费率）
         "predicted_next_rate": predicted_rate,
-        "predicted_next_rate_display": f"{predicted_rate:+.5f}%",
-        "predicted_annual_rate": f"{annual_rate_predicted:+.2f}%",
+        "predicted_next_rate_display": format_percent(predicted_rate, 5),
+        "predicted_annual_rate": format_percent(annual_rate_predicted),
         "predicted_signal": "多头付费" if predicted_rate > 0 else ("空头付费" if predicted_rate < 0 else "中性"),
         
         # 历史结算费率（与current_realtime_rate相同，保留兼容性）
         "historical_settled_rate": last_funding_rate,
-        "historical_settled_rate_display": f"{last_funding_rate:+.4f}%",
+        "historical_settled_rate_display": format_percent(last_funding_rate, 4),
         
         # 结算时间
         "next_funding_time": timestamp_to_datetime(next_funding_time) if next_funding_time else "N/A",
@@ -847,7 +987,10 @@ def get_realtime_funding_rate(symbol: str) -> Dict[str, Any]:
 
 
 def get_extreme_funding_rates(threshold: float = 0.1, limit: int = 20) -> Dict[str, Any]:
-    """获取极端资金费率的合约列表（仅 status=TRADING 的 USDT/USDC 永续合约，与 APP 一致）"""
+    """获取极端资金费率的合约列表（仅 status=TRADING 的 USDT/USDC 永续合约，与 APP 一致）
+
+    按列批量计算预测费率，用 heapq 做 top-k 选择，只对最终返回的 limit 行生成展示字符串。
+    """
     info_result = make_futures_request("/exchangeInfo", {})
     if not info_result["success"]:
         error_response = {"error": info_result["error"]}
@@ -868,36 +1011,37 @@ def get_extreme_funding_rates(threshold: float = 0.1, limit: int = 20) -> Dict[s
             error_response["user_action_required"] = result.get("user_action_required", "")
         return error_response
 
-    data = result["data"]
+    items = [item for item in result["data"] if item.get("symbol", "") in trading_symbols]
 
-    extreme_negative = []  # 负费率（空头付费）
-    extreme_positive = []  # 正费率（多头付费）
+    # 按列解析：每个字段只遍历一次 payload
+    mark_prices = [safe_float(item.get("markPrice", 0)) for item in items]
+    index_prices = [safe_float(item.get("indexPrice", 0)) for item in items]
+    interest_rates = [safe_float(item.get("interestRate", 0.0001)) * 100 for item in items]
 
-    for item in data:
-        symbol = item.get("symbol", "")
-        if symbol not in trading_symbols:
-            continue
-            
-        mark_price = safe_float(item.get("markPrice", 0))
-        index_price = safe_float(item.get("indexPrice", 0))
+    # 预测费率 = Premium + clamp(Interest - Premium, -0.05%, 0.05%)，再 clamp 到 [-0.75%, 0.75%]
+    premiums = [
+        ((m - i) / i) * 100 if i > 0 else 0
+        for m, i in zip(mark_prices, index_prices)
+    ]
+    predicted_rates = [
+        max(-0.75, min(0.75, p + max(-0.05, min(0.05, r - p))))
+        for p, r in zip(premiums, interest_rates)
+    ]
+
+    negative_idx = [n for n, rate in enumerate(predicted_rates) if rate < -threshold]
+    positive_idx = [n for n, rate in enumerate(predicted_rates) if rate > threshold]
+
+    # 部分排序：只取每类前 limit 个
+    top_negative = heapq.nsmallest(limit, negative_idx, key=predicted_rates.__getitem__)
+    top_positive = heapq.nlargest(limit, positive_idx, key=predicted_rates.__getitem__)
+
+    now_ts = datetime.now().timestamp() * 1000
+
+    def build_entry(n: int) -> Dict[str, Any]:
+        item = items[n]
+        predicted_rate = predicted_rates[n]
         last_funding_rate = safe_float(item.get("lastFundingRate", 0)) * 100
-        next_funding_time = item.get("nextFundingTime", 0)
-        interest_rate = safe_float(item.get("interestRate", 0.0001)) * 100
-        
-        # 计算预测费率
-        if index_price > 0:
-            premium = ((mark_price - index_price) / index_price) * 100
-        else:
-            premium = 0
-        
-        diff = interest_rate - premium
-        clamped_diff = max(-0.05, min(0.05, diff))
-        predicted_rate = premium + clamped_diff
-        predicted_rate = max(-0.75, min(0.75, predicted_rate))
-        
-        # 计算倒计时
-        now_ts = datetime.now().timestamp() * 1000
-        countdown_ms = next_funding_time - now_ts
+        countdown_ms = item.get("nextFundingTime", 0) - now_ts
         if countdown_ms > 0:
             countdown_seconds = int(countdown_ms / 1000)
             hours = countdown_seconds // 3600
@@ -905,50 +1049,46 @@ def get_extreme_funding_rates(threshold: float = 0.1, limit: int = 20) -> Dict[s
             countdown_str = f"{hours:02d}:{minutes:02d}"
         else:
             countdown_str = "结算中"
-        
-        entry = {
-            "symbol": symbol,
+
+        return {
+            "symbol": item.get("symbol", ""),
             "predicted_rate": predicted_rate,
-            "predicted_rate_display": f"{predicted_rate:+.5f}%",
-            "last_rate": f"{last_funding_rate:+.4f}%",
-            "mark_price": f"${mark_price:,.4f}",
-            "premium": f"{premium:+.4f}%",
+            "predicted_rate_display": format_percent(predicted_rate, 5),
+            "last_rate": format_percent(last_funding_rate, 4),
+            "mark_price": format_usd(mark_prices[n]),
+            "premium": format_percent(premiums[n], 4),
             "countdown": countdown_str,
-            "annual_rate": f"{predicted_rate * 3 * 365:+.2f}%"
+            "annual_rate": format_percent(predicted_rate * 3 * 365)
         }
-        
-        if predicted_rate < -threshold:
-            extreme_negative.append(entry)
-        elif predicted_rate > threshold:
-            extreme_positive.append(entry)
-    
-    # 排序
-    extreme_negative.sort(key=lambda x: x["predicted_rate"])
-    extreme_positive.sort(key=lambda x: x["predicted_rate"], reverse=True)
-    
+
     return {
         "threshold": f"{threshold}%",
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "extreme_negative": {
             "description": "极端负费率（空头付费，做多有利）",
-            "count": len(extreme_negative),
-            "contracts": extreme_negative[:limit]
+            "count": len(negative_idx),
+            "contracts": [build_entry(n) for n in top_negative]
         },
         "extreme_positive": {
             "description": "极端正费率（多头付费，做空有利）",
-            "count": len(extreme_positive),
-            "contracts": extreme_positive[:limit]
+            "count": len(positive_idx),
+            "contracts": [build_entry(n) for n in top_positive]
         }
     }
 
 
+@memoize_per_call
 def get_mark_price(symbol: str) -> Dict[str, Any]:
     """获取合约标记价格、指数价格、资金费率及下次结算时间"""
     symbol = symbol.upper()
     if not symbol.endswith("USDT"):
         symbol = symbol + "USDT"
 
-    result = make_futures_request("/premiumIndex", {"symbol": symbol})
+    streamed = _futures_stream.mark_price(symbol)
+    if streamed is not None:
+        result = {"success": True, "data": streamed}
+    else:
+        result = make_futures_request("/premiumIndex", {"symbol": symbol})
 
     if not result["success"]:
         error_response = {"error": result["error"], "symbol": symbol}
@@ -982,14 +1122,14 @@ def get_mark_price(symbol: str) -> Dict[str, Any]:
         "symbol": symbol,
         "market": "合约",
         "mark_price": mark_price,
-        "mark_price_formatted": f"${mark_price:,.4f}",
+        "mark_price_formatted": format_usd(mark_price),
         "index_price": index_price,
-        "index_price_formatted": f"${index_price:,.4f}",
-        "last_funding_rate": f"{last_funding_rate:+.4f}%",
+        "index_price_formatted": format_usd(index_price),
+        "last_funding_rate": format_percent(last_funding_rate, 4),
         "last_funding_rate_decimal": last_funding_rate_decimal,
         "next_funding_time": timestamp_to_datetime(next_funding_time) if next_funding_time else "N/A",
         "countdown_to_settlement": countdown_str,
-        "estimated_settle_price": f"${safe_float(estimated_settle):,.4f}" if estimated_settle else "N/A",
+        "estimated_settle_price": format_usd(safe_float(estimated_settle)) if estimated_settle else "N/A",
     }
 
 
@@ -1022,7 +1162,27 @@ def get_open_interest(symbol: str) -> Dict[str, Any]:
     }
 
 
-def get_open_interest_hist(symbol: str, period: str = "1h", limit: int = 30) -> Dict[str, Any]:
+def _futures_data_series(endpoint: str, symbol: str, period: str, limit: int,
+                         start_time: int = None, end_time: int = None) -> Dict[str, Any]:
+    """合约数据序列：已跟踪的标的/周期从本地历史库读取（仅补拉最新一期），否则请求币安"""
+    local = _futures_data_store.read(endpoint, symbol, period, limit, start_time, end_time)
+    if local is not None:
+        return {"success": True, "data": local}
+
+    params = {
+        "symbol": symbol,
+        "period": period,
+        "limit": min(limit, 500),
+    }
+    if start_time is not None:
+        params["startTime"] = int(start_time)
+    if end_time is not None:
+        params["endTime"] = int(end_time)
+    return make_futures_data_request(endpoint, params)
+
+
+def get_open_interest_hist(symbol: str, period: str = "1h", limit: int = 30,
+                           start_time: int = None, end_time: int = None) -> Dict[str, Any]:
     """获取合约持仓量历史"""
     symbol = symbol.upper()
     if not symbol.endswith("USDT"):
@@ -1032,11 +1192,7 @@ def get_open_interest_hist(symbol: str, period: str = "1h", limit: int = 30) ->
     if period not in valid_periods:
         return {"error": f"不支持的周期: {period}，支持: {valid_periods}"}
 
-    result = make_futures_data_request("openInterestHist", {
-        "symbol": symbol,
-        "period": period,
-        "limit": min(limit, 500),
-    })
+    result = _futures_data_series("openInterestHist", symbol, period, limit, start_time, end_time)
 
     if not result["success"]:
         error_response = {"error": result["error"], "symbol": symbol}
@@ -1065,7 +1221,8 @@ def get_open_interest_hist(symbol: str, period: str = "1h", limit: int = 30) ->
     }
 
 
-def get_top_long_short_ratio(symbol: str, period: str = "1h", limit: int = 30) -> Dict[str, Any]:
+def get_top_long_short_ratio(symbol: str, period: str = "1h", limit: int = 30,
+                             start_time: int = None, end_time: int = None) -> Dict[str, Any]:
     """获取大户账户多空比（top 20% 用户）"""
     symbol = symbol.upper()
     if not symbol.endswith("USDT"):
@@ -1075,11 +1232,7 @@ def get_top_long_short_ratio(symbol: str, period: str = "1h", limit: int = 30) -
     if period not in valid_periods:
         return {"error": f"不支持的周期: {period}，支持: {valid_periods}"}
 
-    result = make_futures_data_request("topLongShortAccountRatio", {
-        "symbol": symbol,
-        "period": period,
-        "limit": min(limit, 500),
-    })
+    result = _futures_data_series("topLongShortAccountRatio", symbol, period, limit, start_time, end_time)
 
     if not result["success"]:
         error_response = {"error": result["error"], "symbol": symbol}
@@ -1094,8 +1247,8 @@ def get_top_long_short_ratio(symbol: str, period: str = "1h", limit: int = 30) -
         {
             "timestamp": timestamp_to_datetime(d["timestamp"]) if d.get("timestamp") else "N/A",
             "long_short_ratio": safe_float(d.get("longShortRatio", 0)),
-            "long_account": f"{safe_float(d.get('longAccount', 0)) * 100:.2f}%",
-            "short_account": f"{safe_float(d.get('shortAccount', 0)) * 100:.2f}%",
+            "long_account": format_percent(safe_float(d.get('longAccount', 0)) * 100, signed=False),
+            "short_account": format_percent(safe_float(d.get('shortAccount', 0)) * 100, signed=False),
         }
         for d in data
     ]
@@ -1112,7 +1265,8 @@ def get_top_long_short_ratio(symbol: str, period: str = "1h", limit: int = 30) -
     }
 
 
-def get_top_long_short_position_ratio(symbol: str, period: str = "1h", limit: int = 30) -> Dict[str, Any]:
+def get_top_long_short_position_ratio(symbol: str, period: str = "1h", limit: int = 30,
+                                      start_time: int = None, end_time: int = None) -> Dict[str, Any]:
     """获取大户持仓多空比"""
     symbol = symbol.upper()
     if not symbol.endswith("USDT"):
@@ -1122,11 +1276,7 @@ def get_top_long_short_position_ratio(symbol: str, period: str = "1h", limit: in
     if period not in valid_periods:
         return {"error": f"不支持的周期: {period}，支持: {valid_periods}"}
 
-    result = make_futures_data_request("topLongShortPositionRatio", {
-        "symbol": symbol,
-        "period": period,
-        "limit": min(limit, 500),
-    })
+    result = _futures_data_series("topLongShortPositionRatio", symbol, period, limit, start_time, end_time)
 
     if not result["success"]:
         error_response = {"error": result["error"], "symbol": symbol}
@@ -1141,8 +1291,8 @@ def get_top_long_short_position_ratio(symbol: str, period: str = "1h", limit: in
         {
             "timestamp": timestamp_to_datetime(d["timestamp"]) if d.get("timestamp") else "N/A",
             "long_short_ratio": safe_float(d.get("longShortRatio", 0)),
-            "long_position": f"{safe_float(d.get('longPosition', 0)) * 100:.2f}%",
-            "short_position": f"{safe_float(d.get('shortPosition', 0)) * 100:.2f}%",
+            "long_position": format_percent(safe_float(d.get('longPosition', 0)) * 100, signed=False),
+            "short_position": format_percent(safe_float(d.get('shortPosition', 0)) * 100, signed=False),
         }
         for d in data
     ]
@@ -1159,7 +1309,8 @@ def get_top_long_short_position_ratio(symbol: str, period: str = "1h", limit: in
     }
 
 
-def get_global_long_short_ratio(symbol: str, period: str = "1h", limit: int = 30) -> Dict[str, Any]:
+def get_global_long_short_ratio(symbol: str, period: str = "1h", limit: int = 30,
+                                start_time: int = None, end_time: int = None) -> Dict[str, Any]:
     """获取全市场多空比"""
     symbol = symbol.upper()
     if not symbol.endswith("USDT"):
@@ -1169,11 +1320,7 @@ def get_global_long_short_ratio(symbol: str, period: str = "1h", limit: int = 30
     if period not in valid_periods:
         return {"error": f"不支持的周期: {period}，支持: {valid_periods}"}
 
-    result = make_futures_data_request("globalLongShortAccountRatio", {
-        "symbol": symbol,
-        "period": period,
-        "limit": min(limit, 500),
-    })
+    result = _futures_data_series("globalLongShortAccountRatio", symbol, period, limit, start_time, end_time)
 
     if not result["success"]:
         error_response = {"error": result["error"], "symbol": symbol}
@@ -1188,8 +1335,8 @@ def get_global_long_short_ratio(symbol: str, period: str = "1h", limit: int = 30
         {
             "timestamp": timestamp_to_datetime(d["timestamp"]) if d.get("timestamp") else "N/A",
             "long_short_ratio": safe_float(d.get("longShortRatio", 0)),
-            "long_account": f"{safe_float(d.get('longAccount', 0)) * 100:.2f}%",
-            "short_account": f"{safe_float(d.get('shortAccount', 0)) * 100:.2f}%",
+            "long_account": format_percent(safe_float(d.get('longAccount', 0)) * 100, signed=False),
+            "short_account": format_percent(safe_float(d.get('shortAccount', 0)) * 100, signed=False),
         }
         for d in data
     ]
@@ -1206,7 +1353,8 @@ def get_global_long_short_ratio(symbol: str, period: str = "1h", limit: int = 30
     }
 
 
-def get_taker_buy_sell_ratio(symbol: str, period: str = "1h", limit: int = 30) -> Dict[str, Any]:
+def get_taker_buy_sell_ratio(symbol: str, period: str = "1h", limit: int = 30,
+                             start_time: int = None, end_time: int = None) -> Dict[str, Any]:
     """获取主动买卖比（taker long/short ratio）"""
     symbol = symbol.upper()
     if not symbol.endswith("USDT"):
@@ -1216,11 +1364,7 @@ def get_taker_buy_sell_ratio(symbol: str, period: str = "1h", limit: int = 30) -
     if period not in valid_periods:
         return {"error": f"不支持的周期: {period}，支持: {valid_periods}"}
 
-    result = make_futures_data_request("takerlongshortRatio", {
-        "symbol": symbol,
-        "period": period,
-        "limit": min(limit, 500),
-    })
+    result = _futures_data_series("takerlongshortRatio", symbol, period, limit, start_time, end_time)
 
     if not result["success"]:
         error_response = {"error": result["error"], "symbol": symbol}
@@ -1276,9 +1420,9 @@ def analyze_spot_vs_futures(symbol: str) -> Dict[str, Any]:
     
     return {
         "symbol": symbol.upper(),
-        "spot_price": f"${spot_price:,.4f}",
-        "futures_price": f"${futures_price:,.4f}",
-        "premium": f"{premium:+.4f}%",
+        "spot_price": format_usd(spot_price),
+        "futures_price": format_usd(futures_price),
+        "premium": format_percent(premium, 4),
         "premium_type": "期货溢价" if premium > 0 else ("期货折价" if premium < 0 else "平价"),
         "funding_rate": funding.get("predicted_rate_display", "N/A"),  # 使用预测费率
         "annual_funding": funding.get("annual_rate", "N/A"),
@@ -1382,8 +1526,8 @@ def search_alpha_tokens(keyword: str) -> List[Dict[str, Any]]:
                         "name": t.get("name"),
                         "alpha_id": t.get("alphaId"),
                         "chain": t.get("chainName"),
-                        "price": f"${safe_float(t.get('price', 0)):,.6f}",
-                        "change_24h": f"{safe_float(t.get('percentChange24h', 0)):+.2f}%",
+                        "price": format_usd(safe_float(t.get('price', 0)), 6),
+                        "change_24h": format_percent(safe_float(t.get('percentChange24h', 0))),
                         "note": "币安Alpha代币"
                     })
     except Exception as e:
@@ -1392,10 +1536,10 @@ def search_alpha_tokens(keyword: str) -> List[Dict[str, Any]]:
     return matches
 
 
-def get_top_gainers_losers(limit: int = 10) -> Dict[str, Any]:
-    """获取涨跌幅榜"""
+def _spot_market_ranking() -> Dict[str, Any]:
+    """获取现货排行视图（全市场行情刷新时重建一次）"""
     result = make_spot_request("/ticker/24hr", {})
-    
+
     if not result["success"]:
         error_response = {"error": result["error"]}
         if result.get("network_error"):
@@ -1403,45 +1547,13 @@ def get_top_gainers_losers(limit: int = 10) -> Dict[str, Any]:
             error_response["stop_execution"] = True
             error_response["user_action_required"] = result.get("user_action_required", "")
         return error_response
-    
-    data = result["data"]
-    
+
     # 过滤USDT交易对
-    usdt_pairs = [d for d in data if d["symbol"].endswith("USDT") and safe_float(d["quoteVolume"]) > 1000000]
-    
-    # 按涨跌幅排序
-    sorted_by_change = sorted(usdt_pairs, key=lambda x: safe_float(x["priceChangePercent"]), reverse=True)
-    
-    gainers = []
-    for d in sorted_by_change[:limit]:
-        gainers.append({
-            "symbol": d["symbol"],
-            "price": f"${safe_float(d['lastPrice']):,.4f}",
-            "change": f"{safe_float(d['priceChangePercent']):+.2f}%",
-            "volume": f"${format_number(safe_float(d['quoteVolume']))}"
-        })
-    
-    losers = []
-    for d in sorted_by_change[-limit:]:
-        losers.append({
-            "symbol": d["symbol"],
-            "price": f"${safe_float(d['lastPrice']):,.4f}",
-            "change": f"{safe_float(d['priceChangePercent']):+.2f}%",
-            "volume": f"${format_number(safe_float(d['quoteVolume']))}"
-        })
-    
-    losers.reverse()
-    
-    return {
-        "top_gainers": gainers,
-        "top_losers": losers,
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "market": "现货",
-    }
+    return {"view": get_market_ranking("spot", result, lambda s: s.endswith("USDT"))}
 
 
-def get_futures_top_gainers_losers(limit: int = 10) -> Dict[str, Any]:
-    """获取合约涨跌幅榜（仅包含 exchangeInfo 中 status=TRADING 的 USDT/USDC 永续合约，与 APP 合约市场一致）"""
+def _futures_market_ranking() -> Dict[str, Any]:
+    """获取合约排行视图（仅包含 exchangeInfo 中 status=TRADING 的 USDT/USDC 永续合约）"""
     info_result = make_futures_request("/exchangeInfo", {})
     if not info_result["success"]:
         error_response = {"error": info_result["error"]}
@@ -1451,8 +1563,6 @@ def get_futures_top_gainers_losers(limit: int = 10) -> Dict[str, Any]:
             error_response["user_action_required"] = info_result.get("user_action_required", "")
         return error_response
 
-    trading_symbols = _futures_trading_symbol_set(info_result["data"])
-
     result = make_futures_request("/ticker/24hr", {})
     if not result["success"]:
         error_response = {"error": result["error"]}
@@ -1462,39 +1572,66 @@ def get_futures_top_gainers_losers(limit: int = 10) -> Dict[str, Any]:
             error_response["user_action_required"] = result.get("user_action_required", "")
         return error_response
 
-    data = result["data"]
-    usdt_pairs = [
-        d
-        for d in data
-        if d["symbol"] in trading_symbols
-        and safe_float(d.get("quoteVolume", 0)) > 1000000
-    ]
-    sorted_by_change = sorted(usdt_pairs, key=lambda x: safe_float(x.get("priceChangePercent", 0)), reverse=True)
-
-    gainers = []
-    for d in sorted_by_change[:limit]:
-        gainers.append({
-            "symbol": d["symbol"],
-            "price": f"${safe_float(d.get('lastPrice', 0)):,.4f}",
-            "change": f"{safe_float(d.get('priceChangePercent', 0)):+.2f}%",
-            "volume": f"${format_number(safe_float(d.get('quoteVolume', 0)))}",
-        })
+    # 视图与 exchangeInfo 结果对象绑定，任一刷新都会触发重建
+    trading_symbols = None
+
+    def symbol_filter(symbol: str) -> bool:
+        nonlocal trading_symbols
+        if trading_symbols is None:
+            trading_symbols = _futures_trading_symbol_set(info_result["data"])
+        return symbol in trading_symbols
+
+    return {"view": get_market_ranking("futures", result, symbol_filter, info_result)}
 
-    losers = []
-    for d in sorted_by_change[-limit:]:
-        losers.append({
-            "symbol": d["symbol"],
-            "price": f"${safe_float(d.get('lastPrice', 0)):,.4f}",
-            "change": f"{safe_float(d.get('priceChangePercent', 0)):+.2f}%",
-            "volume": f"${format_number(safe_float(d.get('quoteVolume', 0)))}",
-        })
-    losers.reverse()
 
+def get_top_gainers_losers(limit: int = 10) -> Dict[str, Any]:
+    """获取涨跌幅榜"""
+    ranking = _spot_market_ranking()
+    if "error" in ranking:
+        return ranking
+
+    view = ranking["view"]
     return {
-        "top_gainers": gainers,
-        "top_losers": losers,
+        "top_gainers": view.rows("gainers", limit),
+        "top_losers": view.rows("losers", limit),
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "market": "现货",
+    }
+
+
+def get_futures_top_gainers_losers(limit: int = 10) -> Dict[str, Any]:
+    """获取合约涨跌幅榜（仅包含 exchangeInfo 中 status=TRADING 的 USDT/USDC 永续合约，与 APP 合约市场一致）"""
+    ranking = _futures_market_ranking()
+    if "error" in ranking:
+        return ranking
+
+    view = ranking["view"]
+    return {
+        "top_gainers": view.rows("gainers", limit),
+        "top_losers": view.rows("losers", limit),
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "market": "合约",
     }
 
 
+def get_market_rankings(market: str = "spot", rank_by: str = "gainers", limit: int = 10) -> Dict[str, Any]:
+    """获取市场排行（涨幅/跌幅/成交额/振幅），market 为 spot 或 futures"""
+    if rank_by not in RANK_TYPES:
+        return {"error": f"不支持的排行类型: {rank_by}，支持: {list(RANK_TYPES)}"}
+    if market not in ("spot", "futures"):
+        return {"error": f"不支持的市场: {market}，支持: ['spot', 'futures']"}
+
+    ranking = _spot_market_ranking() if market == "spot" else _futures_market_ranking()
+    if "error" in ranking:
+        return ranking
+
+    view = ranking["view"]
+    return {
+        "market": "现货" if market == "spot" else "合约",
+        "rank_by": rank_by,
+        "total_symbols": view.count,
+        "rankings": view.rows(rank_by, limit, with_volatility=True),
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+集群权重预算 - 多台主机经同一个出口 IP 访问币安时，共同遵守 1200 weight/min
+
+币安按 IP 限频，而每台主机的 RequestPool 各自按 1200/min 控制，合计会超限。
+协调服务（budget_coordinator.py）持有 BudgetLedger，各节点的 BudgetClient 按块租用权重：
+
+1. 窗口与币安一致：按自然分钟对齐（X-MBX-USED-WEIGHT-1M 在整分钟重置）
+2. 按块租用：节点本地剩余权重不足时向协调服务租用 BUDGET_LEASE_CHUNK，之后在本地扣减，不必每个请求都访问协调服务
+3. 校准：节点把响应头 X-MBX-USED-WEIGHT-1M（出口 IP 本分钟实际用量）随租用请求上报，
+   协调服务以 max(已发放, 实际用量) 计算剩余额度，覆盖未经协调的流量；节点看到实际用量接近上限时也会暂停到下一分钟
+4. 降级：协调服务不可达时，节点每分钟最多使用 BUDGET_FALLBACK_WEIGHT（保守的本地份额），
+   每 BUDGET_RETRY_SECONDS 秒重试一次协调服务
+5. 不阻塞：租用请求在锁外发起，同一时刻只有一个线程在租用，其余线程照常扣减本地权重或短暂等待后重试
+6. 分桶：现货（api.binance.com）与合约（fapi.binance.com，含 /futures/data）是两个独立的限频计数，
+   发放、实际用量校准、降级份额都按桶（spot / futures）分别计算
+"""
+
+import os
+import socket
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+
+import requests
+
+from .config import (
+    BUDGET_CLUSTER_LIMIT, BUDGET_LEASE_CHUNK, BUDGET_FALLBACK_WEIGHT,
+    BUDGET_RETRY_SECONDS, BUDGET_REQUEST_TIMEOUT,
+)
+
+BUDGET_WINDOW = 60.0
+LEASE_POLL_SECONDS = 0.05  # 其他线程正在租用时的重试间隔
+BUDGET_BUCKETS = ("spot", "futures")
+
+
+def window_start(now: float) -> float:
+    """当前自然分钟的起始时间"""
+    return now - now % BUDGET_WINDOW
+
+
+class BudgetLedger:
+    """协调服务端的权重账本（线程安全），每个桶各自 limit"""
+
+    def __init__(self, limit: int = BUDGET_CLUSTER_LIMIT, max_chunk: int = BUDGET_LEASE_CHUNK * 4) -> None:
+        self.limit = limit
+        self.max_chunk = max_chunk
+        self._lock = threading.Lock()
+        self._window = window_start(time.time())
+        self._issued = dict.fromkeys(BUDGET_BUCKETS, 0)     # 本窗口已发放
+        self._observed = dict.fromkeys(BUDGET_BUCKETS, 0)   # 本窗口节点上报的最大实际用量
+        self._nodes: Dict[str, Dict[str, Any]] = {}
+
+    def _roll(self, now: float) -> None:
+        start = window_start(now)
+        if start != self._window:
+            self._window = start
+            self._issued = dict.fromkeys(BUDGET_BUCKETS, 0)
+            self._observed = dict.fromkeys(BUDGET_BUCKETS, 0)
+            for node in self._nodes.values():
+                node["granted"] = 0
+
+    def _remaining(self, bucket: str) -> int:
+        return max(0, self.limit - max(self._issued[bucket], self._observed[bucket]))
+
+    def lease(self, node: str, want: int, used_weight: Optional[int] = None,
+              used_window: Optional[float] = None, bucket: str = "spot") -> Dict[str, Any]:
+        """为节点发放 bucket 桶最多 want 个权重；同时记录其上报的该桶实际用量"""
+        if bucket not in BUDGET_BUCKETS:
+            raise ValueError(f"不支持的权重桶: {bucket}，支持: {list(BUDGET_BUCKETS)}")
+        now = time.time()
+        with self._lock:
+            self._roll(now)
+            if used_weight is not None and used_window is not None and int(used_window) == int(self._window):
+                self._observed[bucket] = max(self._observed[bucket], int(used_weight))
+            granted = min(max(0, int(want)), self.max_chunk, self._remaining(bucket))
+            self._issued[bucket] += granted
+            info = self._nodes.setdefault(node, {"granted": 0})
+            info["granted"] += granted
+            info["last_seen"] = now
+            return {
+                "bucket": bucket,
+                "granted": granted,
+                "window_start": self._window,
+                "window_end": self._window + BUDGET_WINDOW,
+                "remaining": self._remaining(bucket),
+            }
+
+    def status(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            self._roll(now)
+            return {
+                "limit": self.limit,
+                "window_start": self._window,
+                "buckets": {
+                    bucket: {
+                        "issued": self._issued[bucket],
+                        "observed": self._observed[bucket],
+                        "remaining": self._remaining(bucket),
+                    }
+                    for bucket in BUDGET_BUCKETS
+                },
+                "nodes": {
+                    name: {"granted": info["granted"], "last_seen": info.get("last_seen")}
+                    for name, info in self._nodes.items()
+                },
+            }
+
+
+class BudgetClient:
+    """
+    节点侧的权重租用客户端（线程安全）。
+    acquire_weight 与 SharedCache.acquire_weight 签名一致，可直接作为 RequestPool 的权重来源。
+    """
+
+    def __init__(self, url: str, chunk: int = BUDGET_LEASE_CHUNK) -> None:
+        self._url = url.rstrip("/")
+        self._chunk = chunk
+        self._lock = threading.Lock()
+        self._window = window_start(time.time())
+        # 以下按桶记录
+        self._tokens = dict.fromkeys(BUDGET_BUCKETS, 0)         # 本窗口已租到、尚未使用的权重
+        self._used = dict.fromkeys(BUDGET_BUCKETS, 0)           # 本窗口本节点已使用
+        self._observed = dict.fromkeys(BUDGET_BUCKETS, 0)       # 本窗口响应头中的出口 IP 实际用量
+        self._fallback_used = dict.fromkeys(BUDGET_BUCKETS, 0)  # 降级期间本窗口已使用
+        self._leasing: set = set()  # 正在向协调服务租用的桶（每个桶同一时刻只有一个线程租用）
+        self._retry_at = 0.0        # 降级后下次尝试协调服务的时间
+        self._last_error: Optional[str] = None
+
+    @property
+    def node_id(self) -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def _roll(self, now: float) -> None:
+        start = window_start(now)
+        if start != self._window:
+            self._window = start
+            self._tokens = dict.fromkeys(BUDGET_BUCKETS, 0)
+            self._used = dict.fromkeys(BUDGET_BUCKETS, 0)
+            self._observed = dict.fromkeys(BUDGET_BUCKETS, 0)
+            self._fallback_used = dict.fromkeys(BUDGET_BUCKETS, 0)
+
+    def _lease(self, bucket: str, want: int, window: float,
+               used_weight: Optional[int]) -> Tuple[Optional[int], Optional[str]]:
+        """向协调服务租用权重（不持锁调用）；返回 (granted, error)，不可达时 granted 为 None"""
+        try:
+            response = requests.post(
+                f"{self._url}/lease",
+                json={
+                    "node": self.node_id,
+                    "bucket": bucket,
+                    "want": want,
+                    "used_weight": used_weight,
+                    "window_start": window,
+                },
+                timeout=BUDGET_REQUEST_TIMEOUT,
+            )
+            response.raise_for_status()
+            return int(response.json().get("granted", 0)), None
+        except (requests.exceptions.RequestException, ValueError) as e:
+            return None, str(e)
+
+    def acquire_weight(self, weight: int, limit: int, window: float, bucket: str = "spot") -> float:
+        """在 bucket 桶登记 weight：返回 0 表示可以发起请求，否则返回需等待的秒数"""
+        with self._lock:
+            now = time.time()
+            self._roll(now)
+            if (self._tokens[bucket] >= weight or bucket in self._leasing or now < self._retry_at
+                    or self._observed[bucket] + weight > limit):
+                return self._take(bucket, weight, limit, now)
+            self._leasing.add(bucket)
+            lease = (bucket, max(self._chunk, weight), self._window, self._observed[bucket] or None)
+
+        # 租用请求不持锁、同一时刻只有本线程在租用该桶：其他线程在此期间照常扣减已有权重
+        granted, error = None, "租用中断"
+        try:
+            granted, error = self._lease(*lease)
+        finally:
+            with self._lock:
+                self._leasing.discard(bucket)
+                self._last_error = error
+                if granted is None:
+                    self._retry_at = time.time() + BUDGET_RETRY_SECONDS
+                else:
+                    self._retry_at = 0.0
+                    self._roll(time.time())
+                    if self._window == lease[2]:
+                        self._tokens[bucket] += granted
+        with self._lock:
+            return self._take(bucket, weight, limit, time.time())
+
+    def _take(self, bucket: str, weight: int, limit: int, now: float) -> float:
+        """在锁内从该桶已租到的权重（或降级份额）中扣减 weight：返回 0 表示成功，否则返回需等待的秒数"""
+        self._roll(now)
+        wait_time = self._window + BUDGET_WINDOW - now
+        if self._observed[bucket] + weight > limit:
+            return wait_time  # 出口 IP 本分钟在该桶已接近币安上限
+        if self._tokens[bucket] >= weight:
+            self._tokens[bucket] -= weight
+            self._used[bucket] += weight
+            return 0.0
+        if self._retry_at and self._fallback_used[bucket] + weight <= BUDGET_FALLBACK_WEIGHT:
+            # 协调服务不可达：使用保守的本地份额
+            self._fallback_used[bucket] += weight
+            self._used[bucket] += weight
+            return 0.0
+        if bucket in self._leasing:
+            return LEASE_POLL_SECONDS  # 其他线程正在租用，稍后重试
+        if self._retry_at:
+            return min(wait_time, max(LEASE_POLL_SECONDS, self._retry_at - now))
+        return wait_time
+
+    def observe_used_weight(self, used_weight: int, bucket: str = "spot") -> None:
+        """记录该桶响应头 X-MBX-USED-WEIGHT-1M，下次租用时上报协调服务"""
+        now = time.time()
+        with self._lock:
+            self._roll(now)
+            self._observed[bucket] = max(self._observed[bucket], used_weight)
+
+    def status(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            self._roll(now)
+            return {
+                "coordinator": self._url,
+                "node": self.node_id,
+                "degraded": bool(self._retry_at),
+                "last_error": self._last_error,
+                "buckets": {
+                    bucket: {
+                        "tokens": self._tokens[bucket],
+                        "used": self._used[bucket],
+                        "observed": self._observed[bucket],
+                        "fallback_used": self._fallback_used[bucket],
+                    }
+                    for bucket in BUDGET_BUCKETS
+                },
+            }
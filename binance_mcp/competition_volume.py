@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Alpha 竞赛窗口成交统计 - 竞赛期间 [start_time, end_time) 的成交量、VWAP、最高/最低价
+
+每个竞赛维护一组累计值（成交量、成交额、笔数、最高/最低、首个开盘价、最新收盘价）：
+1. 增量：每轮只拉取上次已计入的最后一根 K 线之后的 Alpha K 线（startTime），已收盘的才计入
+2. 不重扫历史：VWAP = 累计成交额 / 累计成交量，查询时直接由累计值计算
+3. 竞赛结束且最后一根 K 线计入后标记为完成，不再请求
+4. 后台按 COMPETITION_VOLUME_POLL_INTERVAL 更新进行中（及 1 天内结束）的竞赛（需开启，本机只有一个进程运行）；
+   analyze_alpha_token 查询时再补拉一次
+
+存储：SQLite（DATA_DIR/competition_volume.db），重启后从上次位置继续。
+竞赛时间按配置中的 timezone（默认 UTC+8）换算为 UTC 毫秒时间戳。
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Optional, Tuple
+
+from .config import DATA_DIR, COMPETITION_VOLUME_KLINE_INTERVAL, COMPETITION_VOLUME_POLL_INTERVAL
+from .utils import format_usd_short, safe_float, timestamp_to_datetime
+
+INTERVAL_MS = {
+    "1m": 60000, "5m": 300000, "15m": 900000, "30m": 1800000,
+    "1h": 3600000, "4h": 14400000, "1d": 86400000,
+}
+
+ALPHA_KLINE_PAGE_LIMIT = 1000
+
+# 已结束多久以内的竞赛仍由后台补齐最后的 K 线
+_ENDED_GRACE_MS = 24 * 3600 * 1000
+
+_TZ_PATTERN = re.compile(r"UTC\s*([+-])\s*(\d{1,2})(?::?(\d{2}))?$", re.IGNORECASE)
+
+_COLUMNS = ("last_open", "candles", "volume", "quote_volume", "trades", "high", "low", "open_price", "close_price")
+
+
+def _tz(name: Optional[str]) -> timezone:
+    match = _TZ_PATTERN.match((name or "UTC+8").strip())
+    if not match:
+        return timezone(timedelta(hours=8))
+    sign = -1 if match.group(1) == "-" else 1
+    return timezone(sign * timedelta(hours=int(match.group(2)), minutes=int(match.group(3) or 0)))
+
+
+def competition_window_ms(comp: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    """竞赛的 (开始, 结束) UTC 毫秒时间戳；时间缺失或格式不符时返回 None"""
+    tz = _tz(comp.get("timezone"))
+    try:
+        start = datetime.strptime(comp["start_time"], "%Y-%m-%d %H:%M:%S").replace(tzinfo=tz)
+        end = datetime.strptime(comp["end_time"], "%Y-%m-%d %H:%M:%S").replace(tzinfo=tz)
+    except (KeyError, TypeError, ValueError):
+        return None
+    if end <= start:
+        return None
+    return int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+
+
+class CompetitionVolumeAggregator:
+    """竞赛窗口成交统计（线程安全；同一时间只有一个线程在拉取，避免重复计入）"""
+
+    def __init__(self, path: Optional[str] = None, interval: str = COMPETITION_VOLUME_KLINE_INTERVAL) -> None:
+        self._path = path or os.path.join(DATA_DIR, "competition_volume.db")
+        self._interval = interval
+        self._interval_ms = INTERVAL_MS[interval]
+        self._lock = threading.RLock()
+        self._conn = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            conn = sqlite3.connect(self._path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS competition_volume ("
+                "symbol TEXT NOT NULL, start_ms INTEGER NOT NULL, end_ms INTEGER NOT NULL, interval TEXT NOT NULL, "
+                "last_open INTEGER, candles INTEGER NOT NULL, volume REAL NOT NULL, quote_volume REAL NOT NULL, "
+                "trades INTEGER NOT NULL, high REAL, low REAL, open_price REAL, close_price REAL, "
+                "PRIMARY KEY (symbol, start_ms, end_ms, interval)) WITHOUT ROWID"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _load(self, key: Tuple[str, int, int]) -> Dict[str, Any]:
+        row = self._db().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM competition_volume "
+            "WHERE symbol = ? AND start_ms = ? AND end_ms = ? AND interval = ?",
+            (*key, self._interval),
+        ).fetchone()
+        if row is None:
+            return {"last_open": None, "candles": 0, "volume": 0.0, "quote_volume": 0.0, "trades": 0,
+                    "high": None, "low": None, "open_price": None, "close_price": None}
+        return dict(zip(_COLUMNS, row))
+
+    def _save(self, key: Tuple[str, int, int], state: Dict[str, Any]) -> None:
+        conn = self._db()
+        conn.execute(
+            f"INSERT OR REPLACE INTO competition_volume (symbol, start_ms, end_ms, interval, {', '.join(_COLUMNS)}) "
+            f"VALUES (?, ?, ?, ?, {', '.join('?' * len(_COLUMNS))})",
+            (*key, self._interval, *(state[c] for c in _COLUMNS)),
+        )
+        conn.commit()
+
+    def _fetch(self, symbol: str, start_ms: int, end_ms: int) -> List[List[Any]]:
+        from .api import get_alpha_klines_raw
+
+        result = get_alpha_klines_raw(symbol, self._interval, start_ms, end_ms, ALPHA_KLINE_PAGE_LIMIT)
+        if not result.get("success"):
+            raise RuntimeError(result.get("error", "获取Alpha K线失败"))
+        return result["data"] or []
+
+    def _complete(self, state: Dict[str, Any], end_ms: int) -> bool:
+        return state["last_open"] is not None and state["last_open"] + self._interval_ms >= end_ms
+
+    def _accumulate(self, state: Dict[str, Any], kline: List[Any]) -> None:
+        high, low = safe_float(kline[2]), safe_float(kline[3])
+        if state["open_price"] is None:
+            state["open_price"] = safe_float(kline[1])
+        state["close_price"] = safe_float(kline[4])
+        state["high"] = high if state["high"] is None else max(state["high"], high)
+        state["low"] = low if state["low"] is None else min(state["low"], low)
+        state["volume"] += safe_float(kline[5])
+        state["quote_volume"] += safe_float(kline[7]) if len(kline) > 7 else 0.0
+        state["trades"] += int(kline[8]) if len(kline) > 8 else 0
+        state["candles"] += 1
+        state["last_open"] = int(kline[0])
+
+    def update(self, symbol: str, comp: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """拉取上次之后新收盘的 K 线并计入累计值；返回当前状态（竞赛时间无效或尚未开始时返回 None）"""
+        window = competition_window_ms(comp)
+        if window is None:
+            return None
+        start_ms, end_ms = window
+        now_ms = int(time.time() * 1000)
+        if start_ms > now_ms:
+            return None
+
+        key = (symbol.upper(), start_ms, end_ms)
+        with self._lock:
+            state = self._load(key)
+            if self._complete(state, end_ms):
+                return state
+
+            cursor = start_ms if state["last_open"] is None else state["last_open"] + self._interval_ms
+            stop = min(end_ms, now_ms)
+            changed = False
+            try:
+                while cursor < stop:
+                    rows = self._fetch(symbol, cursor, stop - 1)
+                    open_klines = False
+                    for kline in rows:
+                        open_time = int(kline[0])
+                        if open_time < cursor or open_time >= end_ms:
+                            continue
+                        if int(kline[6]) >= now_ms:
+                            open_klines = True  # 未收盘，下轮再计入
+                            break
+                        self._accumulate(state, kline)
+                        changed = True
+                    if open_klines or len(rows) < ALPHA_KLINE_PAGE_LIMIT:
+                        break
+                    cursor = int(rows[-1][0]) + self._interval_ms
+            finally:
+                if changed:
+                    self._save(key, state)
+            return state
+
+    def stats(self, symbol: str, comp: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """竞赛窗口统计（先增量更新）；上游失败时返回已计入部分并附 error"""
+        error = None
+        try:
+            state = self.update(symbol, comp)
+        except RuntimeError as e:
+            error = str(e)
+            window = competition_window_ms(comp)
+            with self._lock:
+                state = self._load((symbol.upper(), *window)) if window else None
+        if state is None:
+            return None
+
+        window = competition_window_ms(comp)
+        volume, quote_volume = state["volume"], state["quote_volume"]
+        vwap = quote_volume / volume if volume else 0.0
+        open_price, close_price = state["open_price"], state["close_price"]
+        change_pct = (close_price - open_price) / open_price * 100 if open_price and close_price else 0.0
+        result = {
+            "interval": self._interval,
+            "window": f"{comp['start_time']} ~ {comp['end_time']} ({comp.get('timezone', 'UTC+8')})",
+            "complete": self._complete(state, window[1]),
+            "as_of": timestamp_to_datetime(state["last_open"] + self._interval_ms) if state["last_open"] else "N/A",
+            "candles": state["candles"],
+            "volume": volume,
+            "quote_volume": quote_volume,
+            "quote_volume_formatted": format_usd_short(quote_volume),
+            "vwap": vwap,
+            "high": state["high"],
+            "low": state["low"],
+            "open": open_price,
+            "close": close_price,
+            "change_percent": round(change_pct, 2),
+            "trades": state["trades"],
+        }
+        if error:
+            result["error"] = error
+        return result
+
+    def collect(self) -> Dict[str, Any]:
+        """后台任务：更新进行中与 1 天内结束的竞赛"""
+        from .alpha_config import alpha_config_store
+
+        now_ms = int(time.time() * 1000)
+        active, ended = alpha_config_store.scheduled_competitions()
+        updated = 0
+        errors = []
+        for symbol, comp in active + ended:
+            window = competition_window_ms(comp)
+            if window is None or window[1] + _ENDED_GRACE_MS < now_ms:
+                continue
+            try:
+                if self.update(symbol, comp) is not None:
+                    updated += 1
+            except RuntimeError as e:
+                errors.append(f"{symbol}: {e}")
+        if errors and not updated:
+            raise RuntimeError("; ".join(errors[:3]))
+        return {"updated": updated, "errors": len(errors)}
+
+
+# 全局单例
+competition_volume = CompetitionVolumeAggregator()
+
+
+def start_competition_volume_collector() -> None:
+    """注册后台更新任务"""
+    from .scheduler import scheduler
+
+    scheduler.add_job("competition_volume", competition_volume.collect, COMPETITION_VOLUME_POLL_INTERVAL)
+    scheduler.start()
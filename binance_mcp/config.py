@@ -3,6 +3,8 @@
 配置文件 - API地址、常量定义
 """
 
+import os
+
 # 币安API基础URL（主站 + 备用站点）
 SPOT_BASE_URLS = [
     "https://api.binance.com/api/v3",      # 主站
@@ -55,6 +57,9 @@ ALPHA123_HEADERS = {
     "user-agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36"
 }
 
+# CoinGecko 批量价格（simple/price）的缓存时间（秒）
+COINGECKO_PRICE_CACHE_TTL = 60
+
 # Alpha代币ID映射（用于CoinGecko查询）
 ALPHA_TOKEN_COINGECKO_IDS = {
     "TIMI": "metaarena",
@@ -100,3 +105,121 @@ DEFAULT_ALPHA_AIRDROPS = {
 }
 
 
+# 本地数据目录（资金费率历史等后台维护的数据），可通过环境变量覆盖
+DATA_DIR = os.environ.get(
+    "BINANCE_MCP_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"),
+)
+
+# 资金费率历史库：后台同步开关（默认关闭；开启后本机只有一个进程同步，其余进程只读）、同步间隔（秒）、统计窗口（天）、本地保留天数
+FUNDING_STORE_ENABLED = os.environ.get("BINANCE_MCP_FUNDING_STORE", "0") == "1"
+FUNDING_SYNC_INTERVAL = 300
+FUNDING_STATS_DAYS = 30
+FUNDING_RETENTION_DAYS = 90
+FUNDING_BACKFILL_BATCH = 20  # 每轮最多回填的新合约数量，分摊 /fundingRate 权重
+
+# 合约数据历史库（持仓量、多空比、主动买卖比）：后台按标的/周期增量轮询并落盘
+# （默认关闭；开启后本机只有一个进程轮询，其余进程读同一个库）
+FUTURES_DATA_STORE_ENABLED = os.environ.get("BINANCE_MCP_FUTURES_DATA_STORE", "0") == "1"
+FUTURES_DATA_WATCHLIST = [
+    s.strip().upper()
+    for s in os.environ.get("BINANCE_MCP_FUTURES_DATA_SYMBOLS", "BTCUSDT,ETHUSDT,BNBUSDT,SOLUSDT").split(",")
+    if s.strip()
+]
+FUTURES_DATA_PERIODS = ["5m", "1h", "1d"]
+FUTURES_DATA_POLL_INTERVAL = 300
+
+# Alpha 竞赛窗口成交统计：按竞赛增量拉取 Alpha K 线，累计成交量 / VWAP / 最高最低价并落盘
+# （后台更新默认关闭，查询时照常增量补拉；开启后本机只有一个进程在后台更新）
+COMPETITION_VOLUME_ENABLED = os.environ.get("BINANCE_MCP_COMPETITION_VOLUME", "0") == "1"
+COMPETITION_VOLUME_KLINE_INTERVAL = "15m"
+COMPETITION_VOLUME_POLL_INTERVAL = 300
+
+# 行情 WebSocket 推流：价格/24h行情/标记价格优先读推流维护的最新值，断线或过期时回退 REST
+# （需安装 websocket-client；URL 可指向本地替身服务器用于测试）。默认关闭：每个进程（stdio 会话、worker）各自建立连接
+STREAMS_ENABLED = os.environ.get("BINANCE_MCP_STREAMS", "0") == "1"
+SPOT_STREAM_URL = os.environ.get("BINANCE_MCP_SPOT_STREAM_URL", "wss://stream.binance.com:9443/stream")
+FUTURES_STREAM_URL = os.environ.get("BINANCE_MCP_FUTURES_STREAM_URL", "wss://fstream.binance.com/stream")
+SPOT_STREAMS = ["!miniTicker@arr"]
+FUTURES_STREAMS = ["!miniTicker@arr", "!markPrice@arr@1s"]
+# 全市场最优挂单（!bookTicker）推送量很大，默认不订阅；供自行读取 futures_stream.book_ticker 的部署开启
+if os.environ.get("BINANCE_MCP_STREAM_BOOK_TICKER", "0") == "1":
+    FUTURES_STREAMS.append("!bookTicker")
+# 单标的 K 线推流（默认不订阅）：get_klines / get_futures_klines / get_raw_klines 用其更新最后一根（未收盘）K 线
+STREAM_KLINES = [
+    s.strip()
+    for s in os.environ.get("BINANCE_MCP_STREAM_KLINES", "").split(",")  # 例如 BTCUSDT@1m,ETHUSDT@1m
+    if s.strip()
+]
+STREAM_STALE_SECONDS = 10
+
+# stdio MCP 服务：并发处理 tools/call 的工作线程数（响应按完成顺序写回）
+MCP_STDIO_WORKERS = int(os.environ.get("BINANCE_MCP_STDIO_WORKERS", "8"))
+
+# JSON-RPC 批量请求：批内请求并发执行的线程数（所有批量请求共享）
+MCP_BATCH_WORKERS = int(os.environ.get("BINANCE_MCP_BATCH_WORKERS", "16"))
+
+# stdio 冷启动：导入 binance_mcp.server 的耗时预算（python -m binance_mcp --import-time 检查，超出时退出码为 1）
+IMPORT_TIME_BUDGET_MS = float(os.environ.get("BINANCE_MCP_IMPORT_BUDGET_MS", "120"))
+IMPORT_TIME_RUNS = 5
+
+# 热点键后台刷新：按访问频率（指数衰减计数）选出前 N 个请求池缓存键，在到期前主动刷新；
+# 刷新最多占用每分钟权重上限的 HOT_KEY_WEIGHT_FRACTION，计数衰减到 HOT_KEY_DROP_SCORE 以下的键被移除
+HOT_KEY_REFRESH_ENABLED = os.environ.get("BINANCE_MCP_HOT_KEY_REFRESH", "1") == "1"
+HOT_KEY_TOP_N = int(os.environ.get("BINANCE_MCP_HOT_KEY_TOP_N", "8"))
+HOT_KEY_WEIGHT_FRACTION = 0.2
+HOT_KEY_HALF_LIFE = 30.0      # 访问计数半衰期（秒）
+HOT_KEY_MIN_SCORE = 3.0       # 计数达到此值才算热点
+HOT_KEY_DROP_SCORE = 0.5
+HOT_KEY_LEAD_SECONDS = 0.3    # 距到期不足此时间时刷新
+HOT_KEY_TICK_SECONDS = 0.2
+
+# 跨进程共享缓存（L2）与全局权重账本：同一台机器上运行多个 worker 时开启，
+# 各进程共用一个 SQLite（WAL）文件，合计权重不超过 1200/min
+SHARED_CACHE_ENABLED = os.environ.get("BINANCE_MCP_SHARED_CACHE", "0") == "1"
+SHARED_CACHE_PATH = os.environ.get("BINANCE_MCP_SHARED_CACHE_PATH", os.path.join(DATA_DIR, "request_pool.db"))
+SHARED_CACHE_RETENTION = 7200      # 超过此时间（秒）未更新的条目被清理
+SHARED_CACHE_LEASE_SECONDS = 10.0  # 请求租约时长，与上游请求超时一致
+
+# 集群权重预算：多台主机共用一个出口 IP 时，由预算协调服务（budget_coordinator.py）统一发放权重。
+# 设置 BINANCE_MCP_BUDGET_COORDINATOR（如 http://10.0.0.5:8090）后启用；不可达时每分钟最多用 BUDGET_FALLBACK_WEIGHT
+BUDGET_COORDINATOR_URL = os.environ.get("BINANCE_MCP_BUDGET_COORDINATOR", "")
+BUDGET_CLUSTER_LIMIT = int(os.environ.get("BINANCE_MCP_BUDGET_LIMIT", "1100"))  # 低于 1200，给未经协调的流量留余量
+BUDGET_LEASE_CHUNK = 50
+BUDGET_FALLBACK_WEIGHT = int(os.environ.get("BINANCE_MCP_BUDGET_FALLBACK", "200"))
+BUDGET_RETRY_SECONDS = 5.0
+BUDGET_REQUEST_TIMEOUT = 0.5
+
+# 预热快照：定期把长 TTL 的缓存（exchangeInfo、K线、合约数据序列、Alpha 代币列表）写入磁盘，
+# 重启时载入并沿用原时间戳（过期的按 swr / stale-if-error 规则使用或丢弃）
+SNAPSHOT_ENABLED = os.environ.get("BINANCE_MCP_SNAPSHOT", "1") == "1"
+# stdio 会话（客户端每个对话启动一个进程）默认不使用快照，显式设置 BINANCE_MCP_SNAPSHOT=1 时开启
+STDIO_SNAPSHOT_ENABLED = os.environ.get("BINANCE_MCP_SNAPSHOT", "0") == "1"
+SNAPSHOT_PATH = os.environ.get("BINANCE_MCP_SNAPSHOT_PATH", os.path.join(DATA_DIR, "warm_snapshot.json.gz"))
+SNAPSHOT_INTERVAL = 60
+SNAPSHOT_MIN_TTL = 5  # 只保存 TTL 不小于此值（秒）的请求池条目
+
+# 启动预热：exchangeInfo（现货+合约）、Alpha 代币列表、观察列表 K 线
+# 模式 background（后台预热，立即接受请求）/ blocking（预热完成或超时后再开始服务）/ off
+WARMUP_MODE = os.environ.get("BINANCE_MCP_WARMUP", "background").strip().lower()
+# stdio 会话默认不预热（多数会话只调用少量工具），显式设置 BINANCE_MCP_WARMUP 时按其取值
+STDIO_WARMUP_MODE = os.environ.get("BINANCE_MCP_WARMUP", "off").strip().lower()
+WARMUP_SYMBOLS = [
+    s.strip().upper()
+    for s in os.environ.get("BINANCE_MCP_WARMUP_SYMBOLS", "BTCUSDT,ETHUSDT,BNBUSDT,SOLUSDT").split(",")
+    if s.strip()
+]
+WARMUP_KLINE_INTERVALS = [
+    s.strip()
+    for s in os.environ.get("BINANCE_MCP_WARMUP_INTERVALS", "1h").split(",")
+    if s.strip()
+]
+WARMUP_KLINE_LIMIT = 100  # 与 get_klines 默认值一致，预热结果可直接命中
+WARMUP_WORKERS = 8
+WARMUP_TIMEOUT = 30
+
+# 工具响应缓存：按 (工具, 参数, 输出模式) 缓存序列化后的响应，TTL 跟随底层请求池缓存条目
+RESPONSE_CACHE_MAX_ENTRIES = 2048
+
+# 每次工具调用的时间预算（秒）：上游请求超时、域名 / 市场回退与请求池等待都不超过剩余预算；0 表示不限
+TOOL_DEADLINE_SECONDS = float(os.environ.get("BINANCE_MCP_TOOL_DEADLINE", "20"))
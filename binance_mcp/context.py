@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+请求上下文 - 当前正在处理的 MCP 请求（contextvars，按线程/任务隔离）
+
+用途：
+- 取消：客户端发送 notifications/cancelled 后设置取消标记，api 层在每次发起上游请求前检查，
+  已取消则抛出 RequestCancelled，尽早停止后续请求
+- 后台任务、REST 路由等没有请求上下文的调用方不受影响（检查为空操作）
+- 紧凑输出：compact_output 块内 timestamp_to_datetime 直接返回毫秒时间戳，format_usd / format_percent /
+  format_number 等直接返回数值，跳过字符串格式化
+- 调用内备忘：call_memo 块内（一次工具调用），@memoize_per_call 的函数对相同参数只执行一次，
+  组合工具（analyze_alpha_token → get_alpha_token_price / get_ticker_24h / comprehensive_analysis）
+  不会重复获取同一资源（包括现货 → Alpha → 合约的回退过程），与请求池 TTL 无关；
+  备忘结果被多个调用方共享，调用方不应修改返回的字典
+- 时间预算：deadline 块内（一次工具调用）每次上游请求的超时取 min(默认超时, 剩余预算)，
+  请求池中的等待（进行中的相同请求、限频窗口、L2 租约）也不超过剩余预算；
+  预算用完后不再尝试其余域名 / 市场，工具尽快返回已有的部分结果或超时结果
+
+注意：contextvars 不会自动传给新建线程，向线程池提交任务时需用 contextvars.copy_context().run 包装。
+"""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+
+class RequestCancelled(Exception):
+    """当前请求已被客户端取消"""
+
+
+class DeadlineExceeded(Exception):
+    """本次调用的时间预算已用完"""
+
+
+class RequestContext:
+    """一次 MCP 请求的上下文"""
+
+    __slots__ = ("request_id", "_cancelled")
+
+    def __init__(self, request_id: Any = None) -> None:
+        self.request_id = request_id
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check(self) -> None:
+        if self._cancelled.is_set():
+            raise RequestCancelled(f"请求 {self.request_id} 已取消")
+
+
+_current: ContextVar[Optional[RequestContext]] = ContextVar("binance_mcp_request_context", default=None)
+_compact: ContextVar[bool] = ContextVar("binance_mcp_compact_output", default=False)
+_memo: ContextVar[Optional[Dict[Any, Any]]] = ContextVar("binance_mcp_call_memo", default=None)
+_deadline: ContextVar[Optional["Deadline"]] = ContextVar("binance_mcp_deadline", default=None)
+
+# 剩余预算低于此值时不再发起上游请求（连接都来不及建立）
+MIN_REQUEST_TIMEOUT = 0.2
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def current_context() -> Optional[RequestContext]:
+    return _current.get()
+
+
+def check_cancelled() -> None:
+    """当前请求已取消时抛出 RequestCancelled；无请求上下文时不做任何事"""
+    ctx = _current.get()
+    if ctx is not None:
+        ctx.check()
+
+
+@contextmanager
+def request_context(ctx: RequestContext) -> Iterator[RequestContext]:
+    """在 with 块内将 ctx 设为当前请求上下文"""
+    token = _current.set(ctx)
+    try:
+        yield ctx
+    finally:
+        _current.reset(token)
+
+
+def is_compact() -> bool:
+    """当前调用是否要求紧凑输出"""
+    return _compact.get()
+
+
+@contextmanager
+def compact_output(enabled: bool = True) -> Iterator[None]:
+    """在 with 块内启用（或关闭）紧凑输出"""
+    token = _compact.set(enabled)
+    try:
+        yield
+    finally:
+        _compact.reset(token)
+
+
+@contextmanager
+def call_memo() -> Iterator[None]:
+    """在 with 块内启用调用内备忘；已在备忘块内时沿用外层（嵌套调用共享同一份）"""
+    if _memo.get() is not None:
+        yield
+        return
+    token = _memo.set({})
+    try:
+        yield
+    finally:
+        _memo.reset(token)
+
+
+def _freeze(value: Any) -> Any:
+    """参数转为可哈希的键（dict / list 参数，如请求 params）"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def memoize_per_call(func: F) -> F:
+    """call_memo 块内相同参数的调用只执行一次（异常不备忘）；块外直接调用"""
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        memo = _memo.get()
+        if memo is None:
+            return func(*args, **kwargs)
+        try:
+            key = (name, _freeze(args), _freeze(kwargs))
+            hash(key)
+        except TypeError:
+            return func(*args, **kwargs)
+        if key in memo:
+            return memo[key]
+        result = func(*args, **kwargs)
+        memo[key] = result
+        return result
+
+    return wrapper  # type: ignore[return-value]
+
+
+class Deadline:
+    """一次调用的时间预算；exceeded 表示有请求或等待因预算用完被截断（结果可能不完整）"""
+
+    __slots__ = ("seconds", "at", "exceeded")
+
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+        self.at = time.monotonic() + seconds
+        self.exceeded = False
+
+    def remaining(self) -> float:
+        return self.at - time.monotonic()
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _deadline.get()
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[Optional[Deadline]]:
+    """在 with 块内设置时间预算（秒）；外层预算更早到期时沿用外层；None 或 <= 0 表示不限"""
+    outer = _deadline.get()
+    if not seconds or seconds <= 0 or (outer is not None and outer.remaining() <= seconds):
+        yield outer
+        return
+    token = _deadline.set(Deadline(seconds))
+    try:
+        yield _deadline.get()
+    finally:
+        _deadline.reset(token)
+
+
+def time_left(default: Optional[float] = None) -> Optional[float]:
+    """等待时间上限：default 与剩余预算中较小者（不小于 0）；无预算时返回 default"""
+    dl = _deadline.get()
+    if dl is None:
+        return default
+    remaining = max(0.0, dl.remaining())
+    return remaining if default is None else min(default, remaining)
+
+
+def mark_deadline_exceeded() -> None:
+    """记录有等待因预算用完被截断"""
+    dl = _deadline.get()
+    if dl is not None:
+        dl.exceeded = True
+
+
+def request_timeout(default: float) -> float:
+    """单次上游请求的超时：default 与剩余预算中较小者；剩余不足 MIN_REQUEST_TIMEOUT 时抛出 DeadlineExceeded"""
+    dl = _deadline.get()
+    if dl is None:
+        return default
+    remaining = dl.remaining()
+    if remaining < MIN_REQUEST_TIMEOUT:
+        dl.exceeded = True
+        raise DeadlineExceeded(f"已超过本次调用的时间预算（{dl.seconds:g} 秒）")
+    return min(default, remaining)
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+资金费率历史库 - 后台增量同步 /fundingRate，本地回答历史统计类查询
+
+核心功能：
+1. 增量同步：每轮只拉取上次同步之后的结算记录（不带 symbol 的 /fundingRate 一次返回全市场）
+2. 新合约回填：首次出现的合约按批回填统计窗口内的历史，分摊请求权重
+3. 预计算统计：每个合约的均值、分位数、连续同向天数、年化 carry，查询时直接读取
+
+存储：SQLite（DATA_DIR/funding_history.db），内存中保留统计窗口内的序列
+
+同一台机器只有一个进程运行后台同步（services 中按本机锁选出）；其他进程只读：
+发现磁盘上的同步时间（meta 表）比自己载入的新时，重新载入内存序列
+"""
+
+import bisect
+import os
+import sqlite3
+import statistics
+import threading
+import time
+from typing import Dict, List, Any, Optional, Tuple
+
+from .config import (
+    DATA_DIR, FUNDING_STATS_DAYS, FUNDING_RETENTION_DAYS,
+    FUNDING_BACKFILL_BATCH, FUNDING_SYNC_INTERVAL,
+)
+from .utils import format_percent, safe_float, timestamp_to_datetime
+
+DAY_MS = 24 * 3600 * 1000
+FUNDING_PAGE_LIMIT = 1000
+RELOAD_CHECK_SECONDS = 30  # 只读进程检查磁盘同步时间的间隔
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """线性插值分位数（sorted_values 已升序）"""
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * pct / 100
+    lower = int(pos)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (pos - lower)
+
+
+def percentile_rank(sorted_values: List[float], value: float) -> float:
+    """value 在历史中的百分位（0~100，小于等于该值的比例）"""
+    if not sorted_values:
+        return 0.0
+    return bisect.bisect_right(sorted_values, value) / len(sorted_values) * 100
+
+
+def compute_funding_stats(series: List[Tuple[int, float]]) -> Dict[str, Any]:
+    """
+    根据 [(funding_time_ms, rate_decimal), ...]（按时间升序）计算统计。
+    费率统一以百分比表示。
+    """
+    rates = [rate * 100 for _, rate in series]
+    sorted_rates = sorted(rates)
+
+    # 结算间隔（小时）：相邻结算时间差的中位数，兼容 4h/8h 结算合约
+    diffs = [b[0] - a[0] for a, b in zip(series, series[1:]) if b[0] > a[0]]
+    interval_hours = statistics.median(diffs) / 3600000 if diffs else 8.0
+    settlements_per_day = 24 / interval_hours if interval_hours > 0 else 3
+
+    # 从最新一期往前数连续同号的期数
+    latest = rates[-1]
+    sign = (latest > 0) - (latest < 0)
+    streak = 0
+    for rate in reversed(rates):
+        if (rate > 0) - (rate < 0) != sign:
+            break
+        streak += 1
+
+    mean = sum(rates) / len(rates)
+    return {
+        "count": len(rates),
+        "first_time": series[0][0],
+        "latest_time": series[-1][0],
+        "latest_rate": latest,
+        "mean": mean,
+        "median": _percentile(sorted_rates, 50),
+        "stdev": statistics.pstdev(rates) if len(rates) > 1 else 0.0,
+        "min": sorted_rates[0],
+        "max": sorted_rates[-1],
+        "p10": _percentile(sorted_rates, 10),
+        "p25": _percentile(sorted_rates, 25),
+        "p75": _percentile(sorted_rates, 75),
+        "p90": _percentile(sorted_rates, 90),
+        "positive_ratio": sum(1 for r in rates if r > 0) / len(rates) * 100,
+        "streak": streak,
+        "streak_sign": "正费率" if sign > 0 else ("负费率" if sign < 0 else "零费率"),
+        "interval_hours": interval_hours,
+        "annualized_carry": mean * settlements_per_day * 365,
+        "latest_percentile": percentile_rank(sorted_rates, latest),
+        "sorted_rates": sorted_rates,
+    }
+
+
+class FundingRateStore:
+    """
+    资金费率历史库（线程安全）。
+    - 磁盘：SQLite，保留 FUNDING_RETENTION_DAYS 天
+    - 内存：每个合约统计窗口内的序列 + 预计算统计
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self._path = path or os.path.join(DATA_DIR, "funding_history.db")
+        self._lock = threading.RLock()
+        self._conn = None
+        self._series: Dict[str, List[Tuple[int, float]]] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._backfilled: set = set()
+        self._last_sync = None
+        self._syncing = False     # 本进程是否运行后台同步（否则定期从磁盘重新载入）
+        self._checked_at = 0.0
+
+    # ---------- 存储 ----------
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            conn = sqlite3.connect(self._path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS funding_rate ("
+                "symbol TEXT NOT NULL, funding_time INTEGER NOT NULL, rate REAL NOT NULL, "
+                "mark_price REAL, PRIMARY KEY (symbol, funding_time)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS backfilled (symbol TEXT PRIMARY KEY)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL)")
+            conn.commit()
+            self._conn = conn
+            self._load()
+        elif not self._syncing and time.time() - self._checked_at >= RELOAD_CHECK_SECONDS:
+            self._checked_at = time.time()
+            if self._disk_last_sync() != self._last_sync:
+                self._load()  # 同步进程写入了新数据
+        return self._conn
+
+    def _disk_last_sync(self) -> Optional[float]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'last_sync'").fetchone()
+        return row[0] if row else None
+
+    def _load(self) -> None:
+        """从磁盘载入统计窗口内的序列（启动时，以及只读进程发现同步进程写入新数据时）"""
+        since = int(time.time() * 1000) - FUNDING_STATS_DAYS * DAY_MS
+        self._series = {}
+        self._stats = {}
+        self._last_sync = self._disk_last_sync()
+        self._checked_at = time.time()
+        rows = self._conn.execute(
+            "SELECT symbol, funding_time, rate FROM funding_rate WHERE funding_time >= ? "
+            "ORDER BY symbol, funding_time", (since,)
+        ).fetchall()
+        for symbol, funding_time, rate in rows:
+            self._series.setdefault(symbol, []).append((funding_time, rate))
+        self._backfilled = {r[0] for r in self._conn.execute("SELECT symbol FROM backfilled")}
+        for symbol, series in self._series.items():
+            self._stats[symbol] = compute_funding_stats(series)
+
+    def _insert(self, records: List[Dict[str, Any]]) -> set:
+        """写入原始记录，返回有新数据的合约集合"""
+        rows = []
+        for r in records:
+            symbol = r.get("symbol")
+            funding_time = r.get("fundingTime")
+            if not symbol or not funding_time:
+                continue
+            rows.append((symbol, int(funding_time), safe_float(r.get("fundingRate")), safe_float(r.get("markPrice"))))
+        if not rows:
+            return set()
+
+        conn = self._db()
+        conn.executemany("INSERT OR REPLACE INTO funding_rate VALUES (?, ?, ?, ?)", rows)
+        conn.commit()
+
+        since = int(time.time() * 1000) - FUNDING_STATS_DAYS * DAY_MS
+        touched = set()
+        for symbol, funding_time, rate, _ in rows:
+            if funding_time < since:
+                continue
+            series = self._series.setdefault(symbol, [])
+            if series and funding_time <= series[-1][0]:
+                # 乱序或重复记录：按时间插入并去重
+                times = [t for t, _ in series]
+                pos = bisect.bisect_left(times, funding_time)
+                if pos < len(series) and series[pos][0] == funding_time:
+                    series[pos] = (funding_time, rate)
+                else:
+                    series.insert(pos, (funding_time, rate))
+            else:
+                series.append((funding_time, rate))
+            touched.add(symbol)
+        return touched
+
+    def _trim(self) -> None:
+        """清理超出统计窗口的内存数据和超出保留期的磁盘数据"""
+        now_ms = int(time.time() * 1000)
+        since = now_ms - FUNDING_STATS_DAYS * DAY_MS
+        trimmed = set()
+        for symbol, series in list(self._series.items()):
+            if series and series[0][0] < since:
+                pos = bisect.bisect_left([t for t, _ in series], since)
+                del series[:pos]
+                trimmed.add(symbol)
+            if not series:
+                del self._series[symbol]
+                self._stats.pop(symbol, None)
+        self._refresh_stats(trimmed)
+        conn = self._db()
+        conn.execute("DELETE FROM funding_rate WHERE funding_time < ?", (now_ms - FUNDING_RETENTION_DAYS * DAY_MS,))
+        conn.commit()
+
+    # ---------- 同步 ----------
+
+    def _fetch(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        from .api import make_futures_request
+
+        result = make_futures_request("/fundingRate", params)
+        if not result.get("success"):
+            raise RuntimeError(result.get("error", "获取资金费率历史失败"))
+        return result["data"] or []
+
+    def _fetch_since(self, start_time: int, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        从 start_time 起分页拉取（不带 symbol 时为全市场）。
+        全市场每个结算时间约有数百条记录，一页常在某个时间点中途截断：
+        下一页从该时间点本身开始，已拿到的 (symbol, fundingTime) 去重。
+        """
+        records = []
+        seen = set()
+        while True:
+            params = {"startTime": start_time, "limit": FUNDING_PAGE_LIMIT}
+            if symbol:
+                params["symbol"] = symbol
+            page = self._fetch(params)
+            for r in page:
+                key = (r.get("symbol"), int(r.get("fundingTime") or 0))
+                if key not in seen:
+                    seen.add(key)
+                    records.append(r)
+            if len(page) < FUNDING_PAGE_LIMIT:
+                return records
+            last_time = max(int(r["fundingTime"]) for r in page)
+            # 整页都是同一时间点（单个时间点超过一页）时只能前进，避免原地循环
+            start_time = last_time if last_time > start_time else last_time + 1
+
+    def _perpetual_symbols(self) -> set:
+        from .api import make_futures_request, _futures_trading_symbol_set
+
+        info = make_futures_request("/exchangeInfo", {})
+        if not info.get("success"):
+            raise RuntimeError(info.get("error", "获取合约列表失败"))
+        return _futures_trading_symbol_set(info["data"])
+
+    def backfill_symbol(self, symbol: str, start_time: Optional[int] = None) -> None:
+        """回填单个合约的历史（默认整个统计窗口）"""
+        if start_time is None:
+            start_time = int(time.time() * 1000) - FUNDING_STATS_DAYS * DAY_MS
+        records = self._fetch_since(start_time, symbol)
+        with self._lock:
+            touched = self._insert(records) | {symbol}
+            self._backfilled.add(symbol)
+            conn = self._db()
+            conn.execute("INSERT OR IGNORE INTO backfilled VALUES (?)", (symbol,))
+            conn.commit()
+            self._refresh_stats(touched)
+
+    def sync(self) -> Dict[str, Any]:
+        """一轮增量同步：全市场新结算记录 + 一批新合约回填"""
+        with self._lock:
+            self._syncing = True
+            self._db()
+            latest = max((s[-1][0] for s in self._series.values() if s), default=None)
+
+        now_ms = int(time.time() * 1000)
+        start_time = latest + 1 if latest else now_ms - DAY_MS
+        records = self._fetch_since(start_time)
+        with self._lock:
+            touched = self._insert(records)
+            self._refresh_stats(touched)
+
+        pending = sorted(self._perpetual_symbols() - self._backfilled)
+        for symbol in pending[:FUNDING_BACKFILL_BATCH]:
+            self.backfill_symbol(symbol)
+
+        with self._lock:
+            self._trim()
+            self._last_sync = time.time()
+            conn = self._db()
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('last_sync', ?)", (self._last_sync,))
+            conn.commit()
+        return {"new_records": len(records), "backfilled": len(pending[:FUNDING_BACKFILL_BATCH]),
+                "pending_backfill": max(0, len(pending) - FUNDING_BACKFILL_BATCH)}
+
+    def _refresh_stats(self, symbols: set) -> None:
+        for symbol in symbols:
+            series = self._series.get(symbol)
+            if series:
+                self._stats[symbol] = compute_funding_stats(series)
+
+    # ---------- 查询 ----------
+
+    def ensure_symbol(self, symbol: str) -> bool:
+        """确保合约已有本地历史；缺失时回填一次，后台同步未运行且数据过期时补齐增量。返回是否可用"""
+        with self._lock:
+            self._db()
+            stats = self._stats.get(symbol)
+            if symbol in self._backfilled and stats is None:
+                return False
+            start_time = None
+            if stats is not None:
+                next_settlement = stats["latest_time"] + stats["interval_hours"] * 3600000
+                if next_settlement + FUNDING_SYNC_INTERVAL * 1000 > time.time() * 1000:
+                    return True
+                start_time = stats["latest_time"] + 1
+        try:
+            self.backfill_symbol(symbol, start_time)
+        except RuntimeError:
+            return stats is not None
+        return symbol in self._stats
+
+    def stats(self, symbol: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._db()
+            return self._stats.get(symbol)
+
+    def history(self, symbol: str, limit: int = 10) -> List[Tuple[int, float]]:
+        """最近 limit 期结算记录（新的在前）"""
+        with self._lock:
+            self._db()
+            return list(reversed(self._series.get(symbol, [])[-limit:]))
+
+    def all_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            self._db()
+            return dict(self._stats)
+
+    @property
+    def last_sync(self) -> Optional[float]:
+        return self._last_sync
+
+    def is_fresh(self) -> bool:
+        """后台同步（本进程或本机的同步进程）是否在正常运行（最近两个同步周期内成功过）"""
+        with self._lock:
+            if self._conn is None and not os.path.exists(self._path):
+                return False  # 本机从未同步过
+            self._db()
+        return self._last_sync is not None and time.time() - self._last_sync < FUNDING_SYNC_INTERVAL * 2
+
+
+# 全局单例
+funding_store = FundingRateStore()
+
+
+def start_funding_sync() -> None:
+    """注册后台同步任务"""
+    from .scheduler import scheduler
+
+    scheduler.add_job("funding_history_sync", funding_store.sync, FUNDING_SYNC_INTERVAL)
+    scheduler.start()
+
+
+def _format_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "samples": stats["count"],
+        "window": f"{timestamp_to_datetime(stats['first_time'])} ~ {timestamp_to_datetime(stats['latest_time'])}",
+        "mean": format_percent(stats['mean'], 4),
+        "median": format_percent(stats['median'], 4),
+        "stdev": format_percent(stats['stdev'], 4, signed=False),
+        "min": format_percent(stats['min'], 4),
+        "max": format_percent(stats['max'], 4),
+        "p10": format_percent(stats['p10'], 4),
+        "p90": format_percent(stats['p90'], 4),
+        "positive_ratio": format_percent(stats['positive_ratio'], 1, signed=False),
+        "streak": f"连续{stats['streak']}期{stats['streak_sign']}",
+        "settlement_interval": f"{stats['interval_hours']:g}小时",
+        "annualized_carry": format_percent(stats['annualized_carry']),
+    }
+
+
+def get_funding_rate_percentile(symbol: str) -> Dict[str, Any]:
+    """最新已结算资金费率在近 FUNDING_STATS_DAYS 天历史中的百分位（本地数据）"""
+    symbol = symbol.upper()
+    if not symbol.endswith("USDT"):
+        symbol = symbol + "USDT"
+
+    if not funding_store.ensure_symbol(symbol):
+        return {"error": f"本地暂无{symbol}的资金费率历史，可能不是永续合约或同步尚未完成", "symbol": symbol}
+
+    stats = funding_store.stats(symbol)
+    percentile = stats["latest_percentile"]
+    return {
+        "symbol": symbol,
+        "latest_settled_rate": stats["latest_rate"],
+        "latest_settled_rate_display": format_percent(stats['latest_rate'], 4),
+        "latest_settlement_time": timestamp_to_datetime(stats["latest_time"]),
+        "percentile": round(percentile, 1),
+        "percentile_display": f"高于近{FUNDING_STATS_DAYS}天 {percentile:.1f}% 的结算期",
+        "level": "历史高位" if percentile >= 90 else ("历史低位" if percentile <= 10 else "历史区间内"),
+        "stats": _format_stats(stats),
+        "data_source": "本地资金费率历史库",
+    }
+
+
+def get_funding_stats_overview(limit: int = 10) -> Dict[str, Any]:
+    """全市场资金费率统计：年化 carry 最高/最低、费率处于历史高位/低位的合约"""
+    all_stats = funding_store.all_stats()
+    if not all_stats:
+        return {"error": "本地资金费率历史尚未同步，请稍后再试"}
+
+    symbols = list(all_stats)
+
+    def rows(key: str, reverse: bool) -> List[Dict[str, Any]]:
+        ordered = sorted(symbols, key=lambda s: all_stats[s][key], reverse=reverse)[:limit]
+        return [
+            {
+                "symbol": s,
+                "latest_rate": format_percent(all_stats[s]['latest_rate'], 4),
+                "mean_rate": format_percent(all_stats[s]['mean'], 4),
+                "annualized_carry": format_percent(all_stats[s]['annualized_carry']),
+                "percentile": round(all_stats[s]["latest_percentile"], 1),
+                "streak": f"连续{all_stats[s]['streak']}期{all_stats[s]['streak_sign']}",
+            }
+            for s in ordered
+        ]
+
+    last_sync = funding_store.last_sync
+    return {
+        "symbols_tracked": len(symbols),
+        "stats_window_days": FUNDING_STATS_DAYS,
+        "last_sync": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(last_sync)) if last_sync else "N/A",
+        "highest_carry": rows("annualized_carry", True),
+        "lowest_carry": rows("annualized_carry", False),
+        "highest_percentile": rows("latest_percentile", True),
+        "lowest_percentile": rows("latest_percentile", False),
+        "data_source": "本地资金费率历史库",
+    }
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+合约数据历史库 - 持仓量、多空比、主动买卖比的本地时间序列
+
+币安 /futures/data/* 只保留约 30 天、单次最多 500 条。本模块：
+1. 后台按 FUTURES_DATA_WATCHLIST × FUTURES_DATA_PERIODS 增量轮询，只拉取最新时间戳之后的数据
+   （停机较久时按页连续拉取直到追上最新一期；本机只有一个进程运行轮询，其他进程读同一个库）
+2. 以紧凑的数值列存入 SQLite（DATA_DIR/futures_data.db），不受币安保留期限制
+3. 已跟踪的序列查询时只补拉最新一期，任意时间范围从本地读取
+4. 查询范围早于本地最早数据时，先从币安回填缺失的较早部分（币安保留期内），再从本地返回；
+   回填失败、或补拉最新数据失败且本地落后于请求范围时返回 None，由调用方直接请求币安，不返回不完整的范围
+
+未跟踪的标的/周期返回 None，由调用方照常请求币安。
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Any, Optional, Tuple
+
+from .config import DATA_DIR, FUTURES_DATA_WATCHLIST, FUTURES_DATA_PERIODS, FUTURES_DATA_POLL_INTERVAL
+
+# 每个 endpoint 保存的数值字段（对应 v1, v2, v3 列）
+SERIES_FIELDS = {
+    "openInterestHist": ("sumOpenInterest", "sumOpenInterestValue", None),
+    "topLongShortAccountRatio": ("longShortRatio", "longAccount", "shortAccount"),
+    "topLongShortPositionRatio": ("longShortRatio", "longPosition", "shortPosition"),
+    "globalLongShortAccountRatio": ("longShortRatio", "longAccount", "shortAccount"),
+    "takerlongshortRatio": ("buySellRatio", "buyVol", "sellVol"),
+}
+
+PERIOD_MS = {
+    "5m": 300000, "15m": 900000, "30m": 1800000, "1h": 3600000, "2h": 7200000,
+    "4h": 14400000, "6h": 21600000, "12h": 43200000, "1d": 86400000,
+}
+
+FUTURES_DATA_PAGE_LIMIT = 500
+
+# 币安 /futures/data/* 的保留期（约 30 天），更早的数据无法回填
+UPSTREAM_RETENTION_MS = 30 * 86400000
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+class FuturesDataStore:
+    """合约数据时间序列库（线程安全）"""
+
+    def __init__(self, path: Optional[str] = None, symbols: Optional[List[str]] = None,
+                 periods: Optional[List[str]] = None) -> None:
+        self._path = path or os.path.join(DATA_DIR, "futures_data.db")
+        self._symbols = set(symbols if symbols is not None else FUTURES_DATA_WATCHLIST)
+        self._periods = set(periods if periods is not None else FUTURES_DATA_PERIODS)
+        self._lock = threading.RLock()
+        self._conn = None
+        self._latest: Dict[Tuple[str, str, str], int] = {}
+        # 本地已覆盖的起点：最早一条的时间，或已回填到的更早时间（币安在该段没有数据时）
+        self._covered_from: Dict[Tuple[str, str, str], int] = {}
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            conn = sqlite3.connect(self._path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS series ("
+                "endpoint TEXT NOT NULL, symbol TEXT NOT NULL, period TEXT NOT NULL, ts INTEGER NOT NULL, "
+                "v1 REAL, v2 REAL, v3 REAL, PRIMARY KEY (endpoint, symbol, period, ts)) WITHOUT ROWID"
+            )
+            conn.commit()
+            for endpoint, symbol, period, earliest, latest in conn.execute(
+                "SELECT endpoint, symbol, period, MIN(ts), MAX(ts) FROM series GROUP BY endpoint, symbol, period"
+            ):
+                self._latest[(endpoint, symbol, period)] = latest
+                self._covered_from[(endpoint, symbol, period)] = earliest
+            self._conn = conn
+        return self._conn
+
+    def is_tracked(self, endpoint: str, symbol: str, period: str) -> bool:
+        return endpoint in SERIES_FIELDS and symbol in self._symbols and period in self._periods
+
+    def _fetch(self, endpoint: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        from .api import make_futures_data_request
+
+        result = make_futures_data_request(endpoint, params)
+        if not result.get("success"):
+            raise RuntimeError(result.get("error", "获取合约数据失败"))
+        return result["data"] or []
+
+    def _insert(self, endpoint: str, symbol: str, period: str, rows: List[Dict[str, Any]]) -> int:
+        f1, f2, f3 = SERIES_FIELDS[endpoint]
+        values = [
+            (endpoint, symbol, period, int(r["timestamp"]),
+             _to_float(r.get(f1)), _to_float(r.get(f2)), _to_float(r.get(f3)) if f3 else None)
+            for r in rows if r.get("timestamp")
+        ]
+        if not values:
+            return 0
+        with self._lock:
+            conn = self._db()
+            conn.executemany("INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?, ?, ?)", values)
+            conn.commit()
+            key = (endpoint, symbol, period)
+            self._latest[key] = max(self._latest.get(key, 0), max(v[3] for v in values))
+            earliest = min(v[3] for v in values)
+            self._covered_from[key] = min(self._covered_from.get(key, earliest), earliest)
+        return len(values)
+
+    def _latest_ts(self, endpoint: str, symbol: str, period: str) -> Optional[int]:
+        """本地最新时间戳（读磁盘：同一台机器上的采集进程可能已写入更新的数据）"""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT MAX(ts) FROM series WHERE endpoint = ? AND symbol = ? AND period = ?",
+                (endpoint, symbol, period),
+            ).fetchone()
+            key = (endpoint, symbol, period)
+            if row[0] is not None:
+                self._latest[key] = max(self._latest.get(key, 0), row[0])
+            return self._latest.get(key)
+
+    def refresh(self, endpoint: str, symbol: str, period: str) -> int:
+        """
+        增量拉取该序列最新时间戳之后的数据，按页连续拉取直到追上最新一期；
+        本地为空时拉取币安可提供的最近 500 条。中途失败抛出 RuntimeError（已拉到的页保留）
+        """
+        latest = self._latest_ts(endpoint, symbol, period)
+        now_ms = int(time.time() * 1000)
+        if latest is None:
+            return self._insert(endpoint, symbol, period, self._fetch(endpoint, {
+                "symbol": symbol, "period": period, "limit": FUTURES_DATA_PAGE_LIMIT,
+            }))
+
+        inserted = 0
+        cursor = max(latest + 1, now_ms - UPSTREAM_RETENTION_MS)
+        while cursor + PERIOD_MS[period] <= now_ms + 1:  # 否则最新一期尚未产生
+            rows = self._fetch(endpoint, {
+                "symbol": symbol, "period": period, "limit": FUTURES_DATA_PAGE_LIMIT, "startTime": cursor,
+            })
+            inserted += self._insert(endpoint, symbol, period, rows)
+            if len(rows) < FUTURES_DATA_PAGE_LIMIT:
+                break
+            cursor = max(int(r["timestamp"]) for r in rows) + 1
+        return inserted
+
+    def backfill(self, endpoint: str, symbol: str, period: str, start_time: int) -> int:
+        """回填 [start_time, 本地最早数据) 的较早部分（按页向后拉取）；返回写入条数"""
+        key = (endpoint, symbol, period)
+        with self._lock:
+            self._db()
+            covered_from = self._covered_from.get(key)
+        end_time = (covered_from - 1) if covered_from is not None else int(time.time() * 1000)
+        inserted = 0
+        cursor = start_time
+        while cursor <= end_time:
+            rows = self._fetch(endpoint, {
+                "symbol": symbol, "period": period, "limit": FUTURES_DATA_PAGE_LIMIT,
+                "startTime": cursor, "endTime": end_time,
+            })
+            inserted += self._insert(endpoint, symbol, period, rows)
+            if len(rows) < FUTURES_DATA_PAGE_LIMIT:
+                break
+            cursor = max(int(r["timestamp"]) for r in rows) + 1
+        with self._lock:
+            self._covered_from[key] = min(self._covered_from.get(key, start_time), start_time)
+        return inserted
+
+    def collect(self) -> Dict[str, Any]:
+        """后台任务：轮询所有跟踪的序列"""
+        inserted = 0
+        errors = []
+        for endpoint in SERIES_FIELDS:
+            for symbol in sorted(self._symbols):
+                for period in sorted(self._periods):
+                    try:
+                        inserted += self.refresh(endpoint, symbol, period)
+                    except RuntimeError as e:
+                        errors.append(f"{endpoint}/{symbol}/{period}: {e}")
+        if errors and not inserted:
+            raise RuntimeError("; ".join(errors[:3]))
+        return {"inserted": inserted, "errors": len(errors)}
+
+    def query(self, endpoint: str, symbol: str, period: str, limit: int = 30,
+              start_time: Optional[int] = None, end_time: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        读取本地序列，返回与币安接口相同字段名的记录（时间升序）。
+        指定 start_time 时从该时间起取 limit 条，否则取 [.., end_time] 内最近的 limit 条。
+        """
+        f1, f2, f3 = SERIES_FIELDS[endpoint]
+        clauses = ["endpoint = ?", "symbol = ?", "period = ?"]
+        args: List[Any] = [endpoint, symbol, period]
+        if start_time is not None:
+            clauses.append("ts >= ?")
+            args.append(int(start_time))
+        if end_time is not None:
+            clauses.append("ts <= ?")
+            args.append(int(end_time))
+        order = "ASC" if start_time is not None else "DESC"
+        sql = f"SELECT ts, v1, v2, v3 FROM series WHERE {' AND '.join(clauses)} ORDER BY ts {order} LIMIT ?"
+        args.append(int(limit))
+
+        with self._lock:
+            rows = self._db().execute(sql, args).fetchall()
+        if order == "DESC":
+            rows.reverse()
+
+        records = []
+        for ts, v1, v2, v3 in rows:
+            record = {"symbol": symbol, "timestamp": ts, f1: v1, f2: v2}
+            if f3:
+                record[f3] = v3
+            records.append(record)
+        return records
+
+    def read(self, endpoint: str, symbol: str, period: str, limit: int = 30,
+             start_time: Optional[int] = None, end_time: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        已跟踪的序列：先补拉最新一期，请求范围早于本地覆盖时回填较早部分，再从本地返回。
+        未跟踪、本地无数据或回填失败（本地范围不完整）时返回 None，由调用方请求币安。
+        """
+        if not self.is_tracked(endpoint, symbol, period):
+            return None
+        now_ms = int(time.time() * 1000)
+        # 请求范围的终点：end_time，或 start_time 往后 limit 期，或现在
+        range_end = end_time if end_time is not None else (
+            start_time + limit * PERIOD_MS[period] if start_time is not None else now_ms)
+        range_end = min(int(range_end), now_ms)
+        if range_end > now_ms - PERIOD_MS[period]:
+            try:
+                self.refresh(endpoint, symbol, period)
+            except RuntimeError:
+                # 上游失败：本地数据仍覆盖到请求范围的最后一期时照常返回，否则范围末尾有缺口
+                latest = self._latest_ts(endpoint, symbol, period)
+                if latest is None or latest + 2 * PERIOD_MS[period] <= range_end:
+                    return None
+
+        # 请求范围的起点：指定 start_time 时为其本身，否则为 end_time（或现在）往前 limit 期
+        needed_from = start_time if start_time is not None else (end_time or now_ms) - limit * PERIOD_MS[period]
+        needed_from = max(int(needed_from), now_ms - UPSTREAM_RETENTION_MS)
+        with self._lock:
+            covered_from = self._covered_from.get((endpoint, symbol, period))
+        if covered_from is None or needed_from < covered_from:
+            try:
+                self.backfill(endpoint, symbol, period, needed_from)
+            except RuntimeError:
+                return None
+        records = self.query(endpoint, symbol, period, limit, start_time, end_time)
+        return records or None
+
+
+# 全局单例
+futures_data_store = FuturesDataStore()
+
+
+def start_futures_data_collector() -> None:
+    """注册后台采集任务"""
+    from .scheduler import scheduler
+
+    scheduler.add_job("futures_data_collect", futures_data_store.collect, FUTURES_DATA_POLL_INTERVAL)
+    scheduler.start()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+本机单实例锁 - 同一台机器上多个进程（stdio 会话、gunicorn worker）只让一个进程运行某项后台任务
+
+锁文件在 DATA_DIR 下（<name>.lock），用 fcntl.flock 非阻塞加锁，进程存活期间一直持有；
+持锁进程退出后锁自动释放，但已在运行的其他进程不会接管（重启后重新竞争）。
+非 POSIX 平台没有 fcntl，视为总能获得锁。
+"""
+
+import os
+import threading
+from typing import Dict, IO
+
+try:
+    import fcntl
+except ImportError:  # 非 POSIX 平台：不做跨进程互斥
+    fcntl = None
+
+from .config import DATA_DIR
+
+_held: Dict[str, IO] = {}
+_held_lock = threading.Lock()
+
+
+def acquire_host_lock(name: str) -> bool:
+    """尝试获得名为 name 的本机锁；本进程已持有时返回 True，被其他进程持有时返回 False"""
+    if fcntl is None:
+        return True
+    with _held_lock:
+        if name in _held:
+            return True
+        os.makedirs(DATA_DIR, exist_ok=True)
+        lock_file = open(os.path.join(DATA_DIR, f"{name}.lock"), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        _held[name] = lock_file  # 保持打开，进程退出时释放
+        return True
+
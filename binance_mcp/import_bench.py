@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+导入耗时基准 - stdio MCP 客户端每个会话启动一次服务，冷启动时间主要是模块导入
+
+用法：
+    python -m binance_mcp --import-time               # 测量并与 IMPORT_TIME_BUDGET_MS 比较，超出时退出码为 1
+    python -m binance_mcp --import-time --budget 80   # 临时指定预算（毫秒）
+
+在全新的子进程中用 `python -X importtime` 导入 binance_mcp.server（即 stdio 入口处理 initialize / tools/list
+所需的全部模块），重复 IMPORT_TIME_RUNS 次取最小值，并列出自身耗时最多的模块。
+"""
+
+import subprocess
+import sys
+from typing import Dict, List, Any, Optional
+
+from .config import IMPORT_TIME_BUDGET_MS, IMPORT_TIME_RUNS
+
+_TARGET = "binance_mcp.server"
+
+
+def _run_once(target: str) -> Dict[str, Any]:
+    """返回 {"total_ms", "modules": [(自身耗时 ms, 模块名), ...]}"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True, check=True,
+    )
+    total_us, modules = 0, []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # 表头
+        name = name.strip()
+        if name == "site":
+            modules = []  # 解释器启动阶段（site 及 .pth）导入的模块不计入
+            continue
+        modules.append((int(self_us) / 1000, name))
+        if name == target:
+            total_us = int(cumulative_us)
+    return {"total_ms": total_us / 1000, "modules": modules}
+
+
+def measure_import_time(target: str = _TARGET, runs: int = IMPORT_TIME_RUNS) -> Dict[str, Any]:
+    """多次测量取最小值（排除磁盘缓存、CPU 调度的干扰）"""
+    best = min((_run_once(target) for _ in range(max(1, runs))), key=lambda r: r["total_ms"])
+    slowest: List[Dict[str, Any]] = [
+        {"module": name, "self_ms": round(ms, 2)}
+        for ms, name in sorted(best["modules"], reverse=True)[:10]
+    ]
+    return {"target": target, "total_ms": round(best["total_ms"], 2), "runs": runs, "slowest": slowest}
+
+
+def main(argv: List[str]) -> int:
+    budget: Optional[float] = IMPORT_TIME_BUDGET_MS
+    if "--budget" in argv:
+        budget = float(argv[argv.index("--budget") + 1])
+
+    result = measure_import_time()
+    print(f"{result['target']} 导入耗时: {result['total_ms']:.1f} ms（{result['runs']} 次取最小，预算 {budget:.0f} ms）")
+    for item in result["slowest"]:
+        print(f"  {item['self_ms']:8.2f} ms  {item['module']}")
+    if result["total_ms"] > budget:
+        print(f"超出预算 {result['total_ms'] - budget:.1f} ms", file=sys.stderr)
+        return 1
+    return 0
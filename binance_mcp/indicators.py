@@ -6,6 +6,8 @@
 import math
 from typing import Dict, List, Any
 
+from .utils import format_percent
+
 
 def calculate_sma(prices: List[float], period: int) -> List[float]:
     """计算简单移动平均线"""
@@ -220,9 +222,9 @@ def analyze_trend_pattern(closes: List[float]) -> Dict[str, Any]:
         "trend_score": trend_score,
         "strength": abs(trend_score) / 5 * 100,
         "description": description,
-        "price_vs_ma7": f"{(current_price / ma7 - 1) * 100:+.2f}%",
-        "price_vs_ma20": f"{(current_price / ma20 - 1) * 100:+.2f}%",
-        "changes": {k: f"{v:+.2f}%" for k, v in changes.items()}
+        "price_vs_ma7": format_percent((current_price / ma7 - 1) * 100),
+        "price_vs_ma20": format_percent((current_price / ma20 - 1) * 100),
+        "changes": {k: format_percent(v) for k, v in changes.items()}
     }
 
 
@@ -283,7 +285,7 @@ def predict_price_probability(closes: List[float], rsi: float, macd: Dict, bb: D
             "rsi_signal": "超卖反弹" if rsi < 30 else ("超买回调" if rsi > 70 else "中性"),
             "macd_signal": "多头" if macd["histogram"] > 0 else "空头",
             "bb_signal": "触底" if current_price < bb["lower"] else ("触顶" if current_price > bb["upper"] else "中性"),
-            "momentum": f"{momentum:+.2f}%"
+            "momentum": format_percent(momentum)
         }
     }
 
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+工具结果输出 - 默认格式、紧凑模式与字段投影
+
+所有工具都支持两个通用参数（MCP arguments / REST query string）：
+- compact: 紧凑输出 —— 去掉 *_display / *_formatted 字段，金额/百分比为数值，时间统一为毫秒时间戳，JSON 不缩进。
+  时间、金额、百分比在生成时就跳过格式化（utils 中的格式化函数读取 context.compact_output），
+  其余日期时间字符串在输出时转换
+- fields: 字段投影 —— 只返回指定字段，支持点号路径，遇到列表时作用于每个元素，
+  例如 fields=symbol,klines.close,klines.open_time。结果含 error 时不做投影
+"""
+
+import json
+import re
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+# 每个工具 inputSchema 自动附加的通用输出参数
+OUTPUT_PROPERTIES = {
+    "compact": {
+        "type": "boolean",
+        "description": "紧凑输出：去掉展示用字符串，时间为毫秒时间戳，JSON不缩进，默认false",
+        "default": False
+    },
+    "fields": {
+        "type": "array",
+        "items": {"type": "string"},
+        "description": "只返回指定字段，支持点号路径（如 klines.close），REST 用逗号分隔"
+    },
+}
+
+DISPLAY_SUFFIXES = ("_display", "_formatted")
+
+_DATETIME_RE = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$")
+
+
+def output_options(arguments: Dict[str, Any]) -> Tuple[bool, Optional[List[str]]]:
+    """从调用参数中读取 (compact, fields)"""
+    compact = arguments.get("compact", False)
+    if isinstance(compact, str):
+        compact = compact.strip().lower() in ("true", "1", "yes", "on")
+    fields = arguments.get("fields")
+    if isinstance(fields, str):
+        fields = [f.strip() for f in fields.split(",") if f.strip()]
+    return bool(compact), fields or None
+
+
+def _field_tree(fields: List[str]) -> Dict[str, Any]:
+    """["a.b", "a.c", "d"] → {"a": {"b": {}, "c": {}}, "d": {}}"""
+    tree: Dict[str, Any] = {}
+    for path in fields:
+        node = tree
+        for part in path.split("."):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def _select(value: Any, tree: Dict[str, Any]) -> Any:
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [_select(v, tree) for v in value]
+    if isinstance(value, dict):
+        return {k: _select(value[k], sub) for k, sub in tree.items() if k in value}
+    return value
+
+
+def project(result: Any, fields: Optional[List[str]]) -> Any:
+    """字段投影；结果为错误时原样返回"""
+    if not fields or (isinstance(result, dict) and "error" in result):
+        return result
+    return _select(result, _field_tree(fields))
+
+
+def _to_epoch_ms(text: str) -> Any:
+    try:
+        return int(datetime.strptime(text, "%Y-%m-%d %H:%M:%S").timestamp() * 1000)
+    except ValueError:
+        return text
+
+
+def compact_result(value: Any) -> Any:
+    """去掉展示字符串，日期时间字符串转为毫秒时间戳"""
+    if isinstance(value, dict):
+        return {
+            k: compact_result(v)
+            for k, v in value.items()
+            if not (isinstance(k, str) and k.endswith(DISPLAY_SUFFIXES))
+        }
+    if isinstance(value, list):
+        return [compact_result(v) for v in value]
+    if isinstance(value, str) and _DATETIME_RE.match(value):
+        return _to_epoch_ms(value)
+    return value
+
+
+def render_result(result: Any, compact: bool = False, fields: Optional[List[str]] = None) -> str:
+    """按输出选项序列化工具结果"""
+    result = project(result, fields)
+    if compact:
+        return json.dumps(compact_result(result), ensure_ascii=False, separators=(",", ":"))
+    return json.dumps(result, indent=2, ensure_ascii=False)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+物化市场排行 - 全市场行情刷新一次，排行视图只构建一次
+
+核心思路：
+1. 全市场 /ticker/24hr 由 request_pool 缓存，结果带 fetched_at（获取时间）作为版本
+   （L2 反序列化、旧值副本每次是新对象，但 fetched_at 不变）
+2. 版本变化（即行情刷新）时，按列解析一次数值字段，用 heapq 预先算好
+   涨幅榜、跌幅榜、成交额榜、振幅榜的前 RANKING_DEPTH 名
+3. 所有并发调用方共享同一视图，排行查询只是切片读取，复杂度 O(limit)
+"""
+
+import heapq
+import threading
+from typing import Dict, List, Any, Callable, Optional
+
+from .utils import format_percent, format_usd, format_usd_short, safe_float
+
+# 预计算的排行深度；limit 超出时按需用 heapq 现算
+RANKING_DEPTH = 100
+
+# 参与排行的最低24小时成交额（USDT）
+MIN_QUOTE_VOLUME = 1000000
+
+RANK_TYPES = ("gainers", "losers", "volume", "volatility")
+
+
+class MarketRanking:
+    """某一次全市场行情快照的排行视图（构建后只读）"""
+
+    __slots__ = (
+        "source", "filter_source", "version", "symbols", "last_prices", "changes",
+        "quote_volumes", "volatilities", "_top",
+    )
+
+    def __init__(self, source: Any, filter_source: Any, data: List[Dict[str, Any]],
+                 symbol_filter: Callable[[str], bool]) -> None:
+        self.source = source
+        self.filter_source = filter_source
+        self.version = (_version(source), _version(filter_source))
+
+        rows = [d for d in data if symbol_filter(d.get("symbol", ""))]
+        quote_volumes = [safe_float(d.get("quoteVolume", 0)) for d in rows]
+        keep = [n for n, v in enumerate(quote_volumes) if v > MIN_QUOTE_VOLUME]
+        rows = [rows[n] for n in keep]
+
+        self.symbols = [d["symbol"] for d in rows]
+        self.quote_volumes = [quote_volumes[n] for n in keep]
+        self.last_prices = [safe_float(d.get("lastPrice", 0)) for d in rows]
+        self.changes = [safe_float(d.get("priceChangePercent", 0)) for d in rows]
+        highs = [safe_float(d.get("highPrice", 0)) for d in rows]
+        lows = [safe_float(d.get("lowPrice", 0)) for d in rows]
+        self.volatilities = [
+            (h - l) / l * 100 if l > 0 else 0.0
+            for h, l in zip(highs, lows)
+        ]
+
+        self._top = {rank_by: self._select(rank_by, RANKING_DEPTH) for rank_by in RANK_TYPES}
+
+    def _select(self, rank_by: str, limit: int) -> List[int]:
+        """heapq 部分排序，返回行号列表"""
+        indices = range(len(self.symbols))
+        if rank_by == "gainers":
+            return heapq.nlargest(limit, indices, key=self.changes.__getitem__)
+        if rank_by == "losers":
+            return heapq.nsmallest(limit, indices, key=self.changes.__getitem__)
+        if rank_by == "volume":
+            return heapq.nlargest(limit, indices, key=self.quote_volumes.__getitem__)
+        if rank_by == "volatility":
+            return heapq.nlargest(limit, indices, key=self.volatilities.__getitem__)
+        raise ValueError(f"不支持的排行类型: {rank_by}，支持: {list(RANK_TYPES)}")
+
+    def top(self, rank_by: str, limit: int) -> List[int]:
+        """获取排行前 limit 名的行号"""
+        if limit <= RANKING_DEPTH:
+            return self._top[rank_by][:limit]
+        return self._select(rank_by, limit)
+
+    def row(self, n: int, with_volatility: bool = False) -> Dict[str, Any]:
+        """格式化单行（仅对返回的行生成展示字符串）"""
+        entry = {
+            "symbol": self.symbols[n],
+            "price": format_usd(self.last_prices[n]),
+            "change": format_percent(self.changes[n]),
+            "volume": format_usd_short(self.quote_volumes[n]),
+        }
+        if with_volatility:
+            entry["volatility"] = format_percent(self.volatilities[n], signed=False)
+        return entry
+
+    def rows(self, rank_by: str, limit: int, with_volatility: bool = False) -> List[Dict[str, Any]]:
+        return [self.row(n, with_volatility) for n in self.top(rank_by, limit)]
+
+    @property
+    def count(self) -> int:
+        return len(self.symbols)
+
+
+def _version(result: Any) -> Any:
+    """请求池结果的版本：fetched_at；没有时（如旧快照载入的条目）按对象身份（视图持有引用，id 不会被复用）"""
+    if isinstance(result, dict) and result.get("fetched_at") is not None:
+        return result["fetched_at"]
+    return ("id", id(result))
+
+
+_views: Dict[str, MarketRanking] = {}
+_views_lock = threading.Lock()
+
+
+def get_market_ranking(market: str, source: Any, symbol_filter: Callable[[str], bool],
+                       filter_source: Optional[Any] = None) -> MarketRanking:
+    """
+    获取 market 对应的排行视图。
+    source 为 request_pool 返回的全市场行情结果；版本（fetched_at）未变化时直接复用已构建的视图，
+    变化时在锁内重建一次，并发调用方共享同一次构建结果。
+    """
+    version = (_version(source), _version(filter_source))
+    view = _views.get(market)
+    if view is not None and view.version == version:
+        return view
+
+    with _views_lock:
+        view = _views.get(market)
+        if view is None or view.version != version:
+            view = MarketRanking(source, filter_source, source["data"], symbol_filter)
+            _views[market] = view
+        return view
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+工具注册表 - MCP 工具的 schema、处理函数与 REST 路由统一登记
+
+核心思路：
+1. 每个工具登记一次：inputSchema + 处理函数 + 可选 REST 路径，按名称字典分发（O(1)）
+2. 参数按 inputSchema 的类型转换（integer/number/boolean/array/string），
+   同时适用于 MCP 的 JSON 参数和 REST 的 query string；缺少必填参数时返回错误
+3. tools/list 的结果只序列化一次，传输层直接拼接预编码的 JSON
+4. REST 路由由注册表生成（见 rest.py），不再在各服务器入口手写
+5. 对外公布的 schema 自动附加通用输出参数 compact / fields（见 output.py），它们不传给处理函数
+6. 处理函数可以登记为 "模块:函数名" 字符串，首次调用时才导入对应模块（stdio 冷启动只需 schema）
+"""
+
+import importlib
+import json
+import threading
+from typing import Dict, List, Any, Callable, Optional, Union
+
+from .output import OUTPUT_PROPERTIES
+
+
+class ToolArgumentError(ValueError):
+    """工具参数缺失或类型不符"""
+
+
+# 处理函数：可调用对象，或 "模块:函数名"（相对 binance_mcp 包，如 "api:get_spot_price"）
+Handler = Union[Callable[..., Dict[str, Any]], str]
+
+
+def _resolve_handler(spec: str) -> Callable[..., Dict[str, Any]]:
+    module_name, _, attr = spec.partition(":")
+    module = importlib.import_module(f".{module_name}", __package__)
+    return getattr(module, attr)
+
+
+_TRUE_STRINGS = ("true", "1", "yes", "on")
+_FALSE_STRINGS = ("false", "0", "no", "off", "")
+
+
+def _coerce(name: str, value: Any, spec: Dict[str, Any]) -> Any:
+    """按 schema 类型转换单个参数"""
+    expected = spec.get("type")
+    try:
+        if expected == "integer":
+            if isinstance(value, bool):
+                raise ValueError
+            return int(value)
+        if expected == "number":
+            if isinstance(value, bool):
+                raise ValueError
+            return float(value)
+        if expected == "boolean":
+            if isinstance(value, bool):
+                return value
+            text = str(value).strip().lower()
+            if text in _TRUE_STRINGS:
+                return True
+            if text in _FALSE_STRINGS:
+                return False
+            raise ValueError
+        if expected == "array":
+            if isinstance(value, str):
+                return [v.strip() for v in value.split(",") if v.strip()]  # REST: a,b,c
+            if isinstance(value, (list, tuple)):
+                return list(value)
+            raise ValueError
+        if expected == "string":
+            return value if isinstance(value, str) else str(value)
+    except (ValueError, TypeError):
+        raise ToolArgumentError(f"参数 {name} 应为 {expected} 类型，收到: {value!r}")
+    return value
+
+
+class Tool:
+    """一个已登记的工具"""
+
+    __slots__ = ("name", "schema", "_handler", "rest_path", "rest_defaults", "_properties", "_required")
+
+    def __init__(self, schema: Dict[str, Any], handler: Handler,
+                 rest_path: Optional[str] = None, rest_defaults: Optional[Dict[str, Any]] = None) -> None:
+        input_schema = schema.get("inputSchema", {})
+        self._properties: Dict[str, Dict[str, Any]] = input_schema.get("properties", {})
+        self._required = tuple(input_schema.get("required", ()))
+
+        self.name = schema["name"]
+        self.schema = {
+            **schema,
+            "inputSchema": {**input_schema, "properties": {**self._properties, **OUTPUT_PROPERTIES}},
+        }
+        self._handler = handler
+        self.rest_path = rest_path
+        self.rest_defaults = rest_defaults or {}
+
+    @property
+    def handler(self) -> Callable[..., Dict[str, Any]]:
+        """处理函数；字符串形式在首次访问时导入（导入本身由 import 锁保证线程安全）"""
+        handler = self._handler
+        if isinstance(handler, str):
+            handler = self._handler = _resolve_handler(handler)
+        return handler
+
+    @handler.setter
+    def handler(self, handler: Handler) -> None:
+        self._handler = handler
+
+    def coerce_arguments(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        将调用参数转换为处理函数的关键字参数：
+        未在 schema 中声明的参数忽略；缺省时使用 schema 的 default，再缺省则使用函数自身默认值。
+        """
+        kwargs = {}
+        for name, spec in self._properties.items():
+            value = arguments.get(name)
+            if value is None:
+                if "default" in spec:
+                    kwargs[name] = spec["default"]
+                elif name in self._required:
+                    raise ToolArgumentError(f"缺少必填参数: {name}")
+                continue
+            kwargs[name] = _coerce(name, value, spec)
+        return kwargs
+
+    def call(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        return self.handler(**self.coerce_arguments(arguments or {}))
+
+
+class ToolRegistry:
+    """工具注册表（登记在导入期完成，之后只读）"""
+
+    def __init__(self) -> None:
+        self._tools: Dict[str, Tool] = {}
+        self._lock = threading.Lock()
+        self._tools_list_json: Optional[str] = None
+
+    def register(self, schema: Dict[str, Any], handler: Handler,
+                 rest: Optional[str] = None, rest_defaults: Optional[Dict[str, Any]] = None) -> Tool:
+        with self._lock:
+            if schema["name"] in self._tools:
+                raise ValueError(f"工具 {schema['name']} 重复登记")
+            tool = Tool(schema, handler, rest, rest_defaults)
+            self._tools[tool.name] = tool
+            self._tools_list_json = None
+            return tool
+
+    def tool(self, schema: Dict[str, Any], rest: Optional[str] = None,
+             rest_defaults: Optional[Dict[str, Any]] = None) -> Callable:
+        """装饰器形式的 register"""
+        def decorator(handler: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+            self.register(schema, handler, rest, rest_defaults)
+            return handler
+        return decorator
+
+    def get(self, name: str) -> Optional[Tool]:
+        return self._tools.get(name)
+
+    def call(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """按名称调用工具；参数错误作为工具结果返回（与工具自身的错误格式一致）"""
+        tool = self._tools.get(name)
+        if tool is None:
+            return {"error": f"Unknown tool: {name}"}
+        try:
+            return tool.call(arguments)
+        except ToolArgumentError as e:
+            return {"error": str(e), "tool": name}
+
+    @property
+    def schemas(self) -> List[Dict[str, Any]]:
+        return [tool.schema for tool in self._tools.values()]
+
+    def rest_tools(self) -> List[Tool]:
+        return [tool for tool in self._tools.values() if tool.rest_path]
+
+    def tools_list_json(self) -> str:
+        """预编码的 tools/list 结果（{"tools": [...]}），登记变化后才重新序列化"""
+        encoded = self._tools_list_json
+        if encoded is None:
+            with self._lock:
+                if self._tools_list_json is None:
+                    self._tools_list_json = json.dumps({"tools": self.schemas}, ensure_ascii=False)
+                encoded = self._tools_list_json
+        return encoded
+
+
+# 全局单例
+registry = ToolRegistry()
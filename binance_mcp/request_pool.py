@@ -6,6 +6,22 @@
 1. 请求合并：并发相同请求只发起一次真实调用，其余等待并共享结果
 2. 智能缓存：按 endpoint 配置不同 TTL（1s~60s），TTL 内直接返回缓存
 3. 全局限频：60s 滑动窗口 + weight 累计，接近币安限制时自动等待到下一窗口
+4. 过期后仍可用（stale-while-revalidate）：条目过期后的 swr 秒内直接返回旧值，
+   同时在后台线程刷新；数据年龄超过 ttl + swr 时不再返回旧值，同步等待新数据
+5. 出错时返回旧值（stale-if-error）：每个键保留最近一次成功的结果，上游不可用（所有域名失败）
+   或熔断中时，sie 秒内的旧值标记 stale 后返回，而不是报网络错误
+6. 熔断：同一 api_type 连续 CIRCUIT_FAILURE_THRESHOLD 次上游不可用后暂停请求 CIRCUIT_OPEN_SECONDS 秒，
+   之后放行一个探测请求，成功则恢复
+7. 热点键刷新：按访问频率选出前 N 个键，在到期前由后台任务主动刷新（占用预留的部分权重），
+   使热点数据的首个访问者也能命中缓存；访问冷却的键自动移除
+8. 跨进程共享（SHARED_CACHE_ENABLED）：进程内字典为 L1，shared_cache 的 SQLite 为 L2，
+   L1 未命中时先读 L2；限频改用全局权重账本，多个 worker 合计不超过 1200/min
+9. 集群预算（BUDGET_COORDINATOR_URL）：多台主机共用出口 IP 时，权重改由预算协调服务按块发放（见 budget.py），
+   响应头 X-MBX-USED-WEIGHT-1M 经 observe_used_weight 按桶（现货 / 合约）上报校准
+10. 时间预算（context.deadline）：等待进行中的相同请求、限频窗口、L2 租约都不超过调用方剩余的预算，
+   超出时返回 deadline_exceeded 结果（sie 内改为旧值）；这类结果不写缓存、不计入熔断，等待方各自重新请求
+11. 版本：成功结果写入缓存时附加 fetched_at（获取时间），L2 反序列化、旧值副本等不同对象仍带同一个 fetched_at，
+   调用方可据此判断数据是否刷新过（如 rankings 的排行视图）
 
 实现机制：
 - 缓存键：api_type + endpoint + sorted(params)
@@ -20,41 +36,173 @@
 import json
 import threading
 import time
-from typing import Dict, Any, Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Any, Callable, Iterator, Optional
+
+from .config import (
+    SHARED_CACHE_ENABLED, SHARED_CACHE_LEASE_SECONDS, BUDGET_COORDINATOR_URL, HOT_KEY_TOP_N, HOT_KEY_WEIGHT_FRACTION, HOT_KEY_HALF_LIFE,
+    HOT_KEY_MIN_SCORE, HOT_KEY_DROP_SCORE, HOT_KEY_LEAD_SECONDS, HOT_KEY_TICK_SECONDS,
+)
+from .context import time_left, mark_deadline_exceeded
 
 # 全局限频配置（币安 API 限制：1200 weight/min）
 RATE_LIMIT_WINDOW = 60.0  # 60 秒滑动窗口
 MAX_WEIGHT_PER_MINUTE = 1200  # 每分钟最大权重
 
-# 按 api_type + endpoint 配置 TTL（秒）和 weight（参考币安官方文档）
+# 熔断配置
+CIRCUIT_FAILURE_THRESHOLD = 5  # 连续上游不可用次数
+CIRCUIT_OPEN_SECONDS = 30.0    # 熔断持续时间
+
+# 按 api_type + endpoint 配置 TTL（秒）、weight（参考币安官方文档）、
+# swr（过期后仍可返回旧值并后台刷新的秒数）和 sie（上游不可用时最近成功结果的最大可用年龄，秒）；
+# weight 为带 symbol 时的权重，bulk_weight 为不带 symbol（全市场）时的权重，
+# symbols_weight 为带 symbols 列表时按数量分档的 [(最多个数, 权重), ...]，超出各档按 bulk_weight
 ENDPOINT_CONFIG = {
     "spot": {
-        "/ticker/price": {"ttl": 1, "weight": 1},       # 单个 symbol weight=1
-        "/ticker/24hr": {"ttl": 1, "weight": 1},        # 单个 symbol weight=1，所有 symbol weight=40
-        "/klines": {"ttl": 5, "weight": 1},
-        "/exchangeInfo": {"ttl": 60, "weight": 10},
-        "/depth": {"ttl": 0.5, "weight": 5},            # 深度行情 weight=5
+        "/ticker/price": {"ttl": 1, "weight": 1, "bulk_weight": 4, "symbols_weight": [(1000, 4)], "swr": 2, "sie": 300},
+        "/ticker/24hr": {"ttl": 1, "weight": 1, "bulk_weight": 80, "symbols_weight": [(20, 2), (100, 40)],
+                         "swr": 2, "sie": 300},
+        "/klines": {"ttl": 5, "weight": 1, "swr": 10, "sie": 600},
+        "/exchangeInfo": {"ttl": 60, "weight": 10, "swr": 300, "sie": 3600},
+        "/depth": {"ttl": 0.5, "weight": 5, "swr": 0, "sie": 0},  # 深度行情 weight=5，不返回旧盘口
     },
     "futures": {
-        "/ticker/price": {"ttl": 1, "weight": 1},
-        "/ticker/24hr": {"ttl": 1, "weight": 1},        # 单个 symbol weight=1，所有 symbol weight=40
-        "/klines": {"ttl": 5, "weight": 1},
-        "/premiumIndex": {"ttl": 1, "weight": 1},       # 单个 symbol weight=1，所有 symbol weight=10
-        "/fundingRate": {"ttl": 5, "weight": 1},
-        "/openInterest": {"ttl": 5, "weight": 1},
-        "/exchangeInfo": {"ttl": 60, "weight": 10},
-        "/depth": {"ttl": 0.5, "weight": 5},
+        "/ticker/price": {"ttl": 1, "weight": 1, "bulk_weight": 2, "swr": 2, "sie": 300},
+        "/ticker/24hr": {"ttl": 1, "weight": 1, "bulk_weight": 40, "swr": 2, "sie": 300},
+        "/klines": {"ttl": 5, "weight": 1, "swr": 10, "sie": 600},
+        "/premiumIndex": {"ttl": 1, "weight": 1, "bulk_weight": 10, "swr": 2, "sie": 300},
+        "/fundingRate": {"ttl": 5, "weight": 1, "swr": 25, "sie": 3600},
+        "/openInterest": {"ttl": 5, "weight": 1, "swr": 10, "sie": 600},
+        "/exchangeInfo": {"ttl": 60, "weight": 10, "swr": 300, "sie": 3600},
+        "/depth": {"ttl": 0.5, "weight": 5, "swr": 0, "sie": 0},
     },
     "futures_data": {
-        "openInterestHist": {"ttl": 60, "weight": 1},
-        "topLongShortAccountRatio": {"ttl": 60, "weight": 1},
-        "topLongShortPositionRatio": {"ttl": 60, "weight": 1},
-        "globalLongShortAccountRatio": {"ttl": 60, "weight": 1},
-        "takerlongshortRatio": {"ttl": 60, "weight": 1},
+        "openInterestHist": {"ttl": 60, "weight": 1, "swr": 120, "sie": 1800},
+        "topLongShortAccountRatio": {"ttl": 60, "weight": 1, "swr": 120, "sie": 1800},
+        "topLongShortPositionRatio": {"ttl": 60, "weight": 1, "swr": 120, "sie": 1800},
+        "globalLongShortAccountRatio": {"ttl": 60, "weight": 1, "swr": 120, "sie": 1800},
+        "takerlongshortRatio": {"ttl": 60, "weight": 1, "swr": 120, "sie": 1800},
     },
 }
 
-DEFAULT_CONFIG = {"ttl": 5, "weight": 1}
+DEFAULT_CONFIG = {"ttl": 5, "weight": 1, "swr": 0, "sie": 0}
+
+
+class Dependencies:
+    """track_dependencies 块内用到的请求池数据：各条目的到期时间、返回旧值时的最大数据年龄及原因"""
+
+    __slots__ = ("expiries", "stale_age", "stale_error")
+
+    def __init__(self) -> None:
+        self.expiries: List[float] = []
+        self.stale_age = 0.0
+        self.stale_error: Optional[str] = None
+
+    @property
+    def expires_at(self) -> Optional[float]:
+        return min(self.expiries) if self.expiries else None
+
+
+# 依赖记录：track_dependencies 块内每次经过请求池的请求都记下其缓存到期时间，
+# 供响应缓存（response_cache）把自身 TTL 与底层数据对齐，并据此报告旧值年龄
+_dependencies: ContextVar[Optional[Dependencies]] = ContextVar("binance_mcp_pool_dependencies", default=None)
+
+
+@contextmanager
+def track_dependencies() -> Iterator[Dependencies]:
+    """在 with 块内收集所用缓存条目的到期时间（time.time() 时间）与旧值年龄"""
+    deps = Dependencies()
+    token = _dependencies.set(deps)
+    try:
+        yield deps
+    finally:
+        _dependencies.reset(token)
+
+
+def _record_dependency(expires_at: float, stale_age: float = 0.0, stale_error: Optional[str] = None) -> None:
+    deps = _dependencies.get()
+    if deps is not None:
+        deps.expiries.append(expires_at)
+        if stale_age > deps.stale_age:
+            deps.stale_age = stale_age
+        if stale_error:
+            deps.stale_error = stale_error
+
+
+def _is_outage(result: Any) -> bool:
+    """
+    结果是否表示上游不可用（所有域名失败）。
+    api 层的失败结果都带 network_error，这里排除 4xx 业务错误（如 symbol 不存在），418/429 限频除外。
+    """
+    if not isinstance(result, dict) or result.get("success") or not result.get("network_error"):
+        return False
+    error = str(result.get("error", ""))
+    if error.startswith("HTTP错误: 4"):
+        return error.endswith(("418", "429"))
+    return True
+
+
+def _deadline_result(waiting_for: str) -> Dict[str, Any]:
+    """等待超过调用方时间预算时的结果（与 api 层失败结果格式一致，network_error 使 sie 内返回旧值）"""
+    mark_deadline_exceeded()
+    return {
+        "success": False,
+        "error": f"请求超时：{waiting_for}超过本次调用的时间预算",
+        "network_error": True,
+        "deadline_exceeded": True,
+    }
+
+
+class CircuitBreaker:
+    """单个 api_type 的熔断状态（由 RequestPool 在锁内访问）"""
+
+    __slots__ = ("failures", "opened_at", "probing")
+
+    def __init__(self) -> None:
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    def allow(self, now: float) -> bool:
+        """是否允许发起请求；熔断到期后只放行一个探测请求"""
+        if self.opened_at is None:
+            return True
+        if self.probing or now - self.opened_at < CIRCUIT_OPEN_SECONDS:
+            return False
+        self.probing = True
+        return True
+
+    def record(self, ok: bool) -> None:
+        self.probing = False
+        if ok:
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if self.failures >= CIRCUIT_FAILURE_THRESHOLD:
+            self.opened_at = time.time()
+
+    def retry_in(self, now: float) -> int:
+        if self.opened_at is None:
+            return 0
+        return max(1, int(CIRCUIT_OPEN_SECONDS - (now - self.opened_at)))
+
+    def open_result(self, now: float) -> Dict[str, Any]:
+        """熔断中直接返回的失败结果（与 api 层网络错误格式一致）"""
+        return {
+            "success": False,
+            "error": f"币安接口连续请求失败，已暂停请求，约 {self.retry_in(now)} 秒后重试",
+            "network_error": True,
+            "stop_execution": True,
+            "circuit_open": True,
+            "user_action_required": "⚠️ 检测到网络问题，请先确保VPN/代理正常连接后再重试。当前无法获取准确数据。"
+        }
+
+
+def _weight_bucket(api_type: str) -> str:
+    """币安按域名分别限频：现货（api.binance.com）一个桶，合约与合约数据（fapi.binance.com）一个桶"""
+    return "spot" if api_type == "spot" else "futures"
 
 
 def _cache_key(api_type: str, endpoint: str, params: Dict) -> str:
@@ -77,48 +225,138 @@ def _get_config(api_type: str, endpoint: str) -> Dict[str, Any]:
     return DEFAULT_CONFIG
 
 
+def _request_weight(config: Dict[str, Any], params: Dict) -> int:
+    """按参数计算请求权重：带 symbol 用 weight，带 symbols 列表按数量分档，都不带（全市场）用 bulk_weight"""
+    params = params or {}
+    if "symbol" in params or "bulk_weight" not in config:
+        return config["weight"]
+    symbols = params.get("symbols")
+    if symbols is not None:
+        try:
+            count = len(json.loads(symbols) if isinstance(symbols, str) else symbols)
+        except (TypeError, ValueError):
+            count = 0
+        for max_count, weight in config.get("symbols_weight", []):
+            if count <= max_count:
+                return weight
+    return config["bulk_weight"]
+
+
+class AccessStat:
+    """一个缓存键的访问频率（指数衰减计数）及刷新所需信息"""
+
+    __slots__ = ("score", "last_access", "api_type", "ttl", "weight", "executor")
+
+    def __init__(self, api_type: str, ttl: float, weight: int, executor: Callable[[], Dict[str, Any]]) -> None:
+        self.score = 0.0
+        self.last_access = time.time()
+        self.api_type = api_type
+        self.ttl = ttl
+        self.weight = weight
+        self.executor = executor
+
+    def decayed(self, now: float) -> float:
+        return self.score * 0.5 ** ((now - self.last_access) / HOT_KEY_HALF_LIFE)
+
+    def hit(self, now: float, executor: Callable[[], Dict[str, Any]]) -> None:
+        self.score = self.decayed(now) + 1
+        self.last_access = now
+        self.executor = executor
+
+
 class RequestPool:
     """
     请求合并、缓存与限频池（同步版）。
     - 相同 (api_type, endpoint, params) 的并发请求只发起一次真实请求，其余等待并共享结果。
     - 在 TTL 内的重复请求直接返回缓存，不再请求币安。
     - 全局限频：60s 滑动窗口，累计 weight 不超过 1200/min，超限时自动等待到下一个窗口。
+    - 条目过期但仍在 swr 窗口内且上次请求成功时，直接返回旧值并在后台刷新（每个键同时只有一个刷新）。
+    - 上游不可用或熔断中时，返回 sie 秒内最近一次成功的结果（标记 stale），没有则返回原错误。
+    - 启用热点刷新后记录每个键的访问频率，refresh_hot_keys 在到期前刷新前 N 个热点键。
     """
 
-    __slots__ = ("_cache", "_pending", "_lock", "_weight_used", "_window_start")
+    __slots__ = ("_cache", "_last_good", "_breakers", "_pending", "_lock", "_weight_used", "_window_start",
+                 "_access", "_hot_weight_used", "_hot_refreshes", "track_access", "_shared", "_budget")
 
-    def __init__(self) -> None:
+    def __init__(self, shared: Any = None, budget: Any = None) -> None:
         self._cache: Dict[str, Dict[str, Any]] = {}
+        self._last_good: Dict[str, Dict[str, Any]] = {}  # 每个键最近一次成功的缓存条目
+        self._breakers: Dict[str, CircuitBreaker] = {}
         self._pending: Dict[str, Dict[str, Any]] = {}
         self._lock = threading.Lock()
         self._weight_used = 0
         self._window_start = time.time()
-
-    def _acquire_weight(self, weight: int) -> None:
+        self._access: Dict[str, AccessStat] = {}
+        self._hot_weight_used = 0  # 当前窗口内热点刷新已用权重（也计入 _weight_used）
+        self._hot_refreshes = 0
+        self.track_access = False
+        self._shared = shared  # SharedCache（L2 + 全局权重账本），None 表示仅进程内
+        # 外部权重来源：BudgetClient（集群）或 SharedCache（本机多进程），None 表示仅按本地窗口限频
+        self._budget = budget if budget is not None else shared
+
+    def _acquire_weight(self, weight: int, api_type: str) -> bool:
         """
         在锁内获取权重配额，执行限频控制。
         如果当前窗口内权重已满，释放锁、等待到下一个窗口、重新获取锁并重置窗口。
-        调用此方法时必须已持有 self._lock。
+        调用此方法时必须已持有 self._lock。有外部权重来源时以其为准（按 api_type 对应的桶申请，访问期间释放锁），
+        本地窗口只累加计数用于统计，不再等待。
+        需要等待的时间超过调用方剩余的时间预算时不等待、不登记，返回 False。
         """
+        if self._budget is not None:
+            self._lock.release()
+            try:
+                while True:
+                    wait_time = self._budget.acquire_weight(weight, MAX_WEIGHT_PER_MINUTE, RATE_LIMIT_WINDOW,
+                                                            _weight_bucket(api_type))
+                    if wait_time <= 0:
+                        break
+                    if time_left(wait_time) < wait_time:
+                        return False
+                    time.sleep(wait_time)
+            finally:
+                self._lock.acquire()
+            if time.time() - self._window_start >= RATE_LIMIT_WINDOW:
+                self._reset_window(time.time())
+            self._weight_used += weight
+            return True
+
         now = time.time()
         elapsed = now - self._window_start
 
         if elapsed >= RATE_LIMIT_WINDOW:
             # 窗口已过期，重置
-            self._weight_used = 0
-            self._window_start = now
+            self._reset_window(now)
         elif self._weight_used + weight > MAX_WEIGHT_PER_MINUTE:
             # 超限，释放锁并等待到下一个窗口
             wait_time = RATE_LIMIT_WINDOW - elapsed
+            if time_left(wait_time) < wait_time:
+                return False
             self._lock.release()
             time.sleep(wait_time)
             self._lock.acquire()
             # 重置窗口
-            self._weight_used = 0
-            self._window_start = time.time()
+            self._reset_window(time.time())
 
         # 累加权重
         self._weight_used += weight
+        return True
+
+    def _reset_window(self, now: float) -> None:
+        self._weight_used = 0
+        self._hot_weight_used = 0
+        self._window_start = now
+
+    def _try_acquire_hot_weight(self, weight: int, now: float) -> bool:
+        """在锁内为热点刷新获取权重：不等待，超出预留份额或全局上限时返回 False"""
+        if now - self._window_start >= RATE_LIMIT_WINDOW:
+            self._reset_window(now)
+        if self._hot_weight_used + weight > MAX_WEIGHT_PER_MINUTE * HOT_KEY_WEIGHT_FRACTION:
+            return False
+        if self._weight_used + weight > MAX_WEIGHT_PER_MINUTE:
+            return False
+        self._hot_weight_used += weight
+        self._weight_used += weight
+        return True
 
     def fetch_with_dedup(
         self,
@@ -134,13 +372,36 @@ class RequestPool:
         key = _cache_key(api_type, endpoint, params)
         config = _get_config(api_type, endpoint)
         ttl = config["ttl"]
-        weight = config["weight"]
+        weight = _request_weight(config, params)
+        swr = config.get("swr", 0)
+        sie = config.get("sie", 0)
         now = time.time()
 
         with self._lock:
+            breaker = self._breakers.get(api_type)
+            if breaker is None:
+                breaker = self._breakers[api_type] = CircuitBreaker()
+            if self.track_access:
+                stat = self._access.get(key)
+                if stat is None:
+                    stat = self._access[key] = AccessStat(api_type, ttl, weight, executor)
+                stat.hit(now, executor)
+
             # 1. 缓存命中
             entry = self._cache.get(key)
             if entry and (now - entry["timestamp"]) < ttl:
+                _record_dependency(entry["timestamp"] + ttl)
+                return self._stale_if_error(key, entry["data"], ttl, sie)
+
+            # 1b. 已过期但仍在 swr 窗口内：返回旧值，没有进行中的请求时启动后台刷新
+            if entry and (now - entry["timestamp"]) < ttl + swr and entry["data"].get("success"):
+                if key not in self._pending and breaker.allow(now):
+                    self._pending[key] = {"event": threading.Event(), "result": None, "error": None}
+                    threading.Thread(
+                        target=self._refresh, args=(key, ttl, weight, executor, breaker),
+                        name="request-pool-refresh", daemon=True,
+                    ).start()
+                _record_dependency(entry["timestamp"] + ttl, now - entry["timestamp"])
                 return entry["data"]
 
             # 2. 已有进行中的请求：保存引用，退出 with 后等待，共享同一结果
@@ -150,43 +411,315 @@ class RequestPool:
                 break_wait = True
             else:
                 break_wait = False
+                # 2b. 熔断中：不请求上游，有旧值则返回旧值
+                if not breaker.allow(now):
+                    return self._stale_if_error(key, breaker.open_result(now), ttl, sie)
 
             # 3. 登记为进行中（仅当不是等待方时）
             if not break_wait:
                 ev = threading.Event()
                 self._pending[key] = {"event": ev, "result": None, "error": None}
-                # 4. 获取权重配额（可能等待到下一个窗口）
-                self._acquire_weight(weight)
+                # 4. 获取权重配额（可能等待到下一个窗口；超过时间预算时放弃，等待方各自重新请求）
+                if self._shared is None and not self._acquire_weight(weight, api_type):
+                    self._pending.pop(key)["abandoned"] = True
+                    ev.set()
+                    breaker.probing = False
+                    return self._stale_if_error(key, _deadline_result("等待限频窗口"), ttl, sie)
 
         if break_wait:
-            ev.wait()
+            if not ev.wait(time_left()):
+                return self._stale_if_error(key, _deadline_result("等待进行中的相同请求"), ttl, sie)
+            if pend_ref.get("abandoned"):
+                return self.fetch_with_dedup(api_type, endpoint, params, executor)
             if pend_ref.get("error") is not None:
                 raise pend_ref["error"]
-            return pend_ref.get("result")
+            _record_dependency(pend_ref.get("timestamp", time.time()) + ttl)
+            return self._stale_if_error(key, pend_ref.get("result"), ttl, sie)
+
+        # 3b. 共享模式：先读 L2（或等待其他进程正在进行的同一请求），仍未命中再获取全局权重
+        if self._shared is not None:
+            shared_entry = self._from_shared(key, ttl)
+            if shared_entry is not None:
+                self._complete(key, shared_entry["data"], None, breaker, shared_entry["timestamp"])
+                _record_dependency(shared_entry["timestamp"] + ttl)
+                return self._stale_if_error(key, shared_entry["data"], ttl, sie)
+            with self._lock:
+                acquired = self._acquire_weight(weight, api_type)
+                if not acquired:
+                    breaker.probing = False
+            if not acquired:
+                self._abandon(key)
+                return self._stale_if_error(key, _deadline_result("等待限频窗口"), ttl, sie)
 
         result = None
         error = None
         try:
             result = executor()
-            return result
+            _record_dependency(time.time() + ttl)
         except Exception as e:
             error = e
             raise
         finally:
-            with self._lock:
-                pend = self._pending.get(key)
-                if pend is not None:
-                    if error is None and result is not None:
-                        pend["result"] = result
-                        self._cache[key] = {"data": result, "timestamp": time.time()}
-                    else:
-                        pend["error"] = error
-                    pend["event"].set()
-                    del self._pending[key]
+            self._complete(key, result, error, breaker)
+        return self._stale_if_error(key, result, ttl, sie)
+
+    def _from_shared(self, key: str, ttl: float) -> Optional[Dict[str, Any]]:
+        """
+        L2 中有未过期的结果时返回；否则尝试取得请求租约，
+        其他进程正在请求同一个键时等待其结果（返回 None 表示由本进程请求）。
+        """
+        since = time.time() - ttl
+        entry = self._shared.get(key)
+        if entry is not None and entry["timestamp"] > since:
+            return entry
+        if self._shared.claim(key):
+            return None
+        return self._shared.wait_for(key, since, time_left(SHARED_CACHE_LEASE_SECONDS))
+
+    def _stale_if_error(self, key: str, result: Any, ttl: float, sie: float) -> Any:
+        """上游不可用时，用 sie 秒内最近一次成功的结果代替错误（标记 stale 及数据年龄）"""
+        if sie <= 0 or not _is_outage(result):
+            return result
+        good = self._last_good.get(key)
+        if good is None and self._shared is not None:
+            good = self._shared.last_good(key)
+        if good is None:
+            return result
+        age = time.time() - good["timestamp"]
+        if age > sie:
+            return result
+        _record_dependency(good["timestamp"] + ttl, age, result.get("error"))
+        return {**good["data"], "stale": True, "stale_age_seconds": round(age, 3), "stale_error": result.get("error")}
+
+    def _refresh(self, key: str, ttl: float, weight: int, executor: Callable[[], Dict[str, Any]],
+                 breaker: CircuitBreaker, hot_weight: int = 0) -> None:
+        """
+        后台刷新条目（pending 已由调用方登记；weight 为 0 表示调用方已取得本地权重）。
+        共享模式下 L2 已有其他进程刷新的结果时直接采用。
+        hot_weight 不为 0 时（热点刷新）向外部权重来源申请，不等待：申请不到则放弃本次刷新。
+        """
+        result = None
+        error = None
+        timestamp = None
+        abandoned = False
+        try:
+            if self._shared is not None:
+                shared_entry = self._from_shared(key, ttl)
+                if shared_entry is not None:
+                    result, timestamp = shared_entry["data"], shared_entry["timestamp"]
+                    return
+            api_type = key.partition(":")[0]  # 缓存键以 api_type 开头
+            if hot_weight and self._budget is not None:
+                if self._budget.acquire_weight(hot_weight, MAX_WEIGHT_PER_MINUTE, RATE_LIMIT_WINDOW,
+                                               _weight_bucket(api_type)) > 0:
+                    abandoned = True
+                    return
+            if weight:
+                with self._lock:
+                    self._acquire_weight(weight, api_type)
+            result = executor()
+        except Exception as e:
+            error = e
+        finally:
+            if abandoned:
+                self._abandon(key)
+            else:
+                self._complete(key, result, error, breaker, timestamp)
+
+    def _abandon(self, key: str) -> None:
+        """放弃后台刷新：释放租约，等待方改为自行请求"""
+        if self._shared is not None:
+            self._shared.release(key)
+        with self._lock:
+            pend = self._pending.pop(key, None)
+            if pend is not None:
+                pend["abandoned"] = True
+                pend["event"].set()
+
+    def _complete(self, key: str, result: Any, error: Any, breaker: CircuitBreaker,
+                  timestamp: Optional[float] = None) -> None:
+        """
+        写入缓存、更新熔断状态并唤醒等待同一请求的调用方。
+        timestamp 不为空表示结果来自 L2（沿用其时间戳，不回写 L2，也不计入熔断统计）。
+        deadline_exceeded 结果只说明调用方的时间预算用完：不写缓存、不计入熔断，等待方各自重新请求。
+        成功结果附加 fetched_at（L2 结果已带有时保留原值）。
+        """
+        from_shared = timestamp is not None
+        deadline_hit = isinstance(result, dict) and bool(result.get("deadline_exceeded"))
+        if timestamp is None:
+            timestamp = time.time()
+        if error is None and isinstance(result, dict) and result.get("success"):
+            result.setdefault("fetched_at", timestamp)
+        if not from_shared and self._shared is not None:
+            if error is None and result is not None and not deadline_hit:
+                self._shared.put(key, result, timestamp)
+            else:
+                self._shared.release(key)
+        with self._lock:
+            if from_shared or deadline_hit:
+                breaker.probing = False
+            else:
+                breaker.record(error is None and not _is_outage(result))
+            pend = self._pending.get(key)
+            if pend is not None:
+                if deadline_hit:
+                    pend["abandoned"] = True
+                elif error is None and result is not None:
+                    pend["result"] = result
+                    pend["timestamp"] = timestamp
+                    entry = {"data": result, "timestamp": timestamp}
+                    self._cache[key] = entry
+                    if result.get("success"):
+                        self._last_good[key] = entry
+                else:
+                    pend["error"] = error
+                pend["event"].set()
+                del self._pending[key]
+
+    def refresh_hot_keys(self) -> int:
+        """
+        移除访问冷却的键，并为即将到期的前 N 个热点键启动后台刷新。
+        只使用预留的权重份额，份额用完时本轮停止；返回本轮启动的刷新数。
+        """
+        now = time.time()
+        started = []
+        with self._lock:
+            scored = []
+            for key, stat in list(self._access.items()):
+                score = stat.decayed(now)
+                if score < HOT_KEY_DROP_SCORE:
+                    del self._access[key]
+                elif score >= HOT_KEY_MIN_SCORE:
+                    scored.append((score, key, stat))
+            scored.sort(key=lambda item: item[0], reverse=True)
+
+            for _, key, stat in scored[:HOT_KEY_TOP_N]:
+                entry = self._cache.get(key)
+                if entry and entry["timestamp"] + stat.ttl - now > min(HOT_KEY_LEAD_SECONDS, stat.ttl / 2):
+                    continue
+                breaker = self._breakers.get(stat.api_type)
+                if key in self._pending or breaker is None or breaker.opened_at is not None:
+                    continue
+                if not self._try_acquire_hot_weight(stat.weight, now):
+                    break
+                self._pending[key] = {"event": threading.Event(), "result": None, "error": None}
+                started.append((key, stat.ttl, stat.weight, stat.executor, breaker))
+            self._hot_refreshes += len(started)
+
+        for key, ttl, weight, executor, breaker in started:
+            threading.Thread(
+                target=self._refresh, args=(key, ttl, 0, executor, breaker, weight),
+                name="request-pool-hot-refresh", daemon=True,
+            ).start()
+        return len(started)
+
+    def hot_key_status(self) -> Dict[str, Any]:
+        """热点键刷新状态（供 /health 使用）"""
+        now = time.time()
+        with self._lock:
+            scores = sorted(((stat.decayed(now), key) for key, stat in self._access.items()), reverse=True)
+            return {
+                "enabled": self.track_access,
+                "tracked_keys": len(scores),
+                "hot_keys": [
+                    {"key": key, "score": round(score, 2)}
+                    for score, key in scores[:HOT_KEY_TOP_N] if score >= HOT_KEY_MIN_SCORE
+                ],
+                "weight_used": self._hot_weight_used,
+                "weight_reserved": int(MAX_WEIGHT_PER_MINUTE * HOT_KEY_WEIGHT_FRACTION),
+                "refreshes": self._hot_refreshes,
+            }
+
+    def snapshot_entries(self, min_ttl: float) -> List[Dict[str, Any]]:
+        """
+        导出 TTL 不小于 min_ttl、仍可使用（在 ttl + swr 或 sie 内）的缓存条目，供 snapshot 持久化。
+        每条为 {"k": 键, "t": 时间戳, "d": 数据}；最近成功值与条目相同时记 "g": 1，不同时另存 "gt"/"gd"。
+        """
+        now = time.time()
+        records = []
+        with self._lock:
+            for key, entry in self._cache.items():
+                config = _get_config(*key.split(":", 2)[:2])
+                if config["ttl"] < min_ttl:
+                    continue
+                usable = max(config["ttl"] + config.get("swr", 0), config.get("sie", 0))
+                good = self._last_good.get(key)
+                record: Dict[str, Any] = {"k": key}
+                if now - entry["timestamp"] <= usable:
+                    record["t"], record["d"] = entry["timestamp"], entry["data"]
+                if good is entry:
+                    record["g"] = 1
+                elif good is not None and now - good["timestamp"] <= usable:
+                    record["gt"], record["gd"] = good["timestamp"], good["data"]
+                if len(record) > 1 and ("d" in record or "gd" in record):
+                    records.append(record)
+        return records
+
+    def restore_entries(self, records: List[Dict[str, Any]]) -> int:
+        """载入 snapshot_entries 导出的条目（沿用原时间戳，不覆盖更新的条目）；返回载入条数"""
+        now = time.time()
+        restored = 0
+        with self._lock:
+            for record in records:
+                key = record["k"]
+                config = _get_config(*key.split(":", 2)[:2])
+                usable = max(config["ttl"] + config.get("swr", 0), config.get("sie", 0))
+                if "d" in record and now - record["t"] <= usable:
+                    current = self._cache.get(key)
+                    if current is None or current["timestamp"] < record["t"]:
+                        entry = {"data": record["d"], "timestamp": record["t"]}
+                        self._cache[key] = entry
+                        if record.get("g"):
+                            self._last_good[key] = entry
+                        restored += 1
+                if "gd" in record and now - record["gt"] <= usable:
+                    current = self._last_good.get(key)
+                    if current is None or current["timestamp"] < record["gt"]:
+                        self._last_good[key] = {"data": record["gd"], "timestamp": record["gt"]}
+        return restored
+
+    def observe_used_weight(self, used_weight: int, api_type: str) -> None:
+        """把响应头中的出口 IP 实际用量交给外部权重来源（集群预算）按桶校准"""
+        observe = getattr(self._budget, "observe_used_weight", None)
+        if observe is not None:
+            observe(used_weight, _weight_bucket(api_type))
+
+    def budget_status(self) -> Dict[str, Any]:
+        status = getattr(self._budget, "status", None)
+        if self._budget is None or self._budget is self._shared or status is None:
+            return {"enabled": False}
+        return {"enabled": True, **status()}
+
+    def circuit_status(self) -> Dict[str, Any]:
+        """各 api_type 的熔断状态（供 /health 使用）"""
+        now = time.time()
+        with self._lock:
+            return {
+                api_type: {
+                    "open": breaker.opened_at is not None,
+                    "consecutive_failures": breaker.failures,
+                    "retry_in": breaker.retry_in(now),
+                }
+                for api_type, breaker in self._breakers.items()
+            }
+
+
+def _make_shared_cache() -> Any:
+    if not SHARED_CACHE_ENABLED:
+        return None
+    from .shared_cache import SharedCache
+    return SharedCache()
+
+
+def _make_budget_client() -> Any:
+    if not BUDGET_COORDINATOR_URL:
+        return None
+    from .budget import BudgetClient
+    return BudgetClient(BUDGET_COORDINATOR_URL)
 
 
 # 全局单例，供 api 层使用
-_request_pool = RequestPool()
+_request_pool = RequestPool(_make_shared_cache(), _make_budget_client())
 
 
 def fetch_spot_with_dedup(endpoint: str, params: Dict, executor: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
@@ -199,3 +732,48 @@ def fetch_futures_with_dedup(endpoint: str, params: Dict, executor: Callable[[],
 
 def fetch_futures_data_with_dedup(endpoint: str, params: Dict, executor: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
     return _request_pool.fetch_with_dedup("futures_data", endpoint, params or {}, executor)
+
+
+def circuit_status() -> Dict[str, Any]:
+    return _request_pool.circuit_status()
+
+
+def snapshot_entries(min_ttl: float) -> List[Dict[str, Any]]:
+    return _request_pool.snapshot_entries(min_ttl)
+
+
+def restore_entries(records: List[Dict[str, Any]]) -> int:
+    return _request_pool.restore_entries(records)
+
+
+def budget_status() -> Dict[str, Any]:
+    """集群权重预算状态（供 /health 使用）"""
+    return _request_pool.budget_status()
+
+
+def observe_used_weight(header_value: Any, api_type: str) -> None:
+    """api 层收到响应后调用，传入 X-MBX-USED-WEIGHT-1M 响应头（缺失或非数字时忽略）及请求的 api_type"""
+    try:
+        used_weight = int(header_value)
+    except (TypeError, ValueError):
+        return
+    _request_pool.observe_used_weight(used_weight, api_type)
+
+
+def hot_key_status() -> Dict[str, Any]:
+    return _request_pool.hot_key_status()
+
+
+def start_hot_key_refresh() -> None:
+    """开始记录访问频率并注册热点刷新任务（重复调用无副作用）"""
+    from .scheduler import scheduler
+    _request_pool.track_access = True
+    scheduler.add_job("hot_key_refresh", _request_pool.refresh_hot_keys, HOT_KEY_TICK_SECONDS)
+    scheduler.start()
+
+
+def shared_cache_status() -> Dict[str, Any]:
+    """跨进程共享缓存状态（供 /health 使用）"""
+    if _request_pool._shared is None:
+        return {"enabled": False}
+    return {"enabled": True, **_request_pool._shared.status()}
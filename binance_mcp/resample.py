@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+K线重采样 - 由低周期K线（1m/1h 等）合成高周期K线（4h/1d/1w）
+
+对齐规则与币安一致：
+- 1d 及以下周期按 UTC 纪元对齐（4h 为 00/04/08/... UTC）
+- 1w 以 UTC 周一 00:00 为起点
+
+输入输出均为币安原始K线数组：
+[open_time, open, high, low, close, volume, close_time, quote_volume, trades, taker_buy_base, taker_buy_quote, ...]
+"""
+
+from typing import Dict, List, Any
+
+from .utils import safe_float
+
+MINUTE_MS = 60 * 1000
+HOUR_MS = 60 * MINUTE_MS
+DAY_MS = 24 * HOUR_MS
+WEEK_MS = 7 * DAY_MS
+
+# 1970-01-01 是周四，周线起点（周一）相对纪元偏移 4 天
+WEEK_OFFSET_MS = 4 * DAY_MS
+
+INTERVAL_MS = {
+    "1m": MINUTE_MS, "3m": 3 * MINUTE_MS, "5m": 5 * MINUTE_MS, "15m": 15 * MINUTE_MS, "30m": 30 * MINUTE_MS,
+    "1h": HOUR_MS, "2h": 2 * HOUR_MS, "4h": 4 * HOUR_MS, "6h": 6 * HOUR_MS, "8h": 8 * HOUR_MS, "12h": 12 * HOUR_MS,
+    "1d": DAY_MS, "3d": 3 * DAY_MS, "1w": WEEK_MS,
+}
+
+
+def can_resample(base_interval: str, target_interval: str) -> bool:
+    """target 是否能由 base 整数倍合成（1M 月线长度不固定，不支持）"""
+    base_ms = INTERVAL_MS.get(base_interval)
+    target_ms = INTERVAL_MS.get(target_interval)
+    if not base_ms or not target_ms or target_ms < base_ms:
+        return False
+    if target_interval == "1w":
+        return WEEK_MS % base_ms == 0 and DAY_MS % base_ms == 0
+    return target_ms % base_ms == 0
+
+
+def bucket_start(open_time: int, interval: str) -> int:
+    """K线所属目标周期的起始时间（毫秒）"""
+    if interval == "1w":
+        return (open_time - WEEK_OFFSET_MS) // WEEK_MS * WEEK_MS + WEEK_OFFSET_MS
+    interval_ms = INTERVAL_MS[interval]
+    return open_time // interval_ms * interval_ms
+
+
+def resample_klines(rows: List[List[Any]], base_interval: str, target_interval: str) -> List[List[Any]]:
+    """
+    将按时间升序的 base_interval 原始K线合成为 target_interval。
+    丢弃开头缺少成员的不完整周期；最后一个周期即使不完整也保留（与币安当前未收盘K线一致）。
+    """
+    if not can_resample(base_interval, target_interval):
+        raise ValueError(f"无法由{base_interval}合成{target_interval}")
+    if base_interval == target_interval:
+        return [list(r) for r in rows]
+
+    target_ms = INTERVAL_MS[target_interval]
+    expected = target_ms // INTERVAL_MS[base_interval]
+
+    result = []
+    members = []
+    current = None
+    for row in rows:
+        start = bucket_start(int(row[0]), target_interval)
+        if start != current:
+            if members:
+                result.append(_merge(current, target_ms, members, expected))
+            current = start
+            members = []
+        members.append(row)
+    if members:
+        result.append(_merge(current, target_ms, members, expected))
+
+    if len(result) > 1 and not result[0][-1]:
+        result = result[1:]
+    return [r[:-1] for r in result]
+
+
+def _merge(start: int, target_ms: int, members: List[List[Any]], expected: int) -> List[Any]:
+    """合并同一周期的成员K线；末尾追加完整性标记（由 resample_klines 去除）"""
+    has_taker = all(len(m) > 10 for m in members)
+    merged = [
+        start,
+        members[0][1],
+        str(max(safe_float(m[2]) for m in members)),
+        str(min(safe_float(m[3]) for m in members)),
+        members[-1][4],
+        str(sum(safe_float(m[5]) for m in members)),
+        start + target_ms - 1,
+        str(sum(safe_float(m[7]) for m in members)),
+        sum(int(m[8]) for m in members),
+    ]
+    if has_taker:
+        merged.append(str(sum(safe_float(m[9]) for m in members)))
+        merged.append(str(sum(safe_float(m[10]) for m in members)))
+    merged.append(len(members) >= expected and int(members[0][0]) == start)
+    return merged
+
+
+def compare_klines(resampled: List[List[Any]], native: List[List[Any]],
+                   rel_tolerance: float = 1e-6) -> Dict[str, Any]:
+    """
+    比较合成K线与币安原生K线（按 open_time 对齐，仅比较两边都有的已收盘周期）。
+    价格要求完全一致，成交量/成交额允许 rel_tolerance 的相对误差（浮点累加误差）。
+    """
+    native_by_time = {int(r[0]): r for r in native}
+    compared = 0
+    mismatches = []
+    for row in resampled[:-1]:  # 最后一根可能未收盘
+        ref = native_by_time.get(int(row[0]))
+        if ref is None:
+            continue
+        compared += 1
+        diffs = []
+        for idx, name in ((1, "open"), (2, "high"), (3, "low"), (4, "close")):
+            if safe_float(row[idx]) != safe_float(ref[idx]):
+                diffs.append(name)
+        for idx, name in ((5, "volume"), (7, "quote_volume")):
+            a, b = safe_float(row[idx]), safe_float(ref[idx])
+            if abs(a - b) > rel_tolerance * max(abs(b), 1.0):
+                diffs.append(name)
+        if int(row[8]) != int(ref[8]):
+            diffs.append("trades")
+        if diffs:
+            mismatches.append({"open_time": int(row[0]), "fields": diffs})
+    return {"compared": compared, "mismatch_count": len(mismatches), "mismatches": mismatches[:10]}
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+工具响应缓存 - 热点调用（如 BTC 的 get_spot_price）直接返回已序列化的响应
+
+核心思路：
+1. 缓存键为 (工具名, 规范化后的参数, 输出模式)，值为序列化好的 JSON 文本及其 ETag
+2. 执行工具时用 request_pool.track_dependencies 收集用到的请求池缓存条目，
+   响应的到期时间取其中最早的到期时间 —— 底层数据一刷新，响应缓存同时失效
+3. 未经过请求池的结果（WebSocket 推流、本地库、Alpha 接口、配置文件等）和错误结果不缓存
+4. 请求池返回了过期旧值（stale-while-revalidate / stale-if-error）时，结果附加 stale_age_seconds
+   （最旧数据的年龄），因上游不可用而返回旧值时还附加 stale_error；这样的响应已过期，不会进入缓存
+5. LRU 淘汰，最多 RESPONSE_CACHE_MAX_ENTRIES 条
+6. 每次执行带 TOOL_DEADLINE_SECONDS 的时间预算（context.deadline）；预算用完时结果附加 deadline_exceeded
+   （部分数据可能缺失或为旧值），这样的响应不进入缓存
+
+命中时既不执行工具，也不重新序列化。
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional
+
+from .config import RESPONSE_CACHE_MAX_ENTRIES, TOOL_DEADLINE_SECONDS
+from .context import compact_output, call_memo, deadline, DeadlineExceeded
+from .output import render_result
+from .registry import Tool
+from .request_pool import track_dependencies
+
+
+class CachedResponse:
+    """一条序列化后的工具响应"""
+
+    __slots__ = ("body", "etag", "expires_at")
+
+    def __init__(self, body: str, expires_at: Optional[float]) -> None:
+        self.body = body
+        self.etag = hashlib.sha1(body.encode("utf-8")).hexdigest()[:20]
+        self.expires_at = expires_at
+
+    @property
+    def max_age(self) -> int:
+        """剩余有效秒数（供 Cache-Control 使用）"""
+        if self.expires_at is None:
+            return 0
+        return max(0, int(self.expires_at - time.time()))
+
+
+class ResponseCache:
+    """序列化响应的 LRU 缓存（线程安全）"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES) -> None:
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(tool_name: str, kwargs: Dict[str, Any], compact: bool, fields: Optional[List[str]]) -> str:
+        return json.dumps([tool_name, kwargs, compact, fields], sort_keys=True, ensure_ascii=False, default=str)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# 全局单例
+response_cache = ResponseCache()
+
+
+def tool_response(tool: Tool, kwargs: Dict[str, Any], compact: bool = False,
+                  fields: Optional[List[str]] = None) -> CachedResponse:
+    """执行工具并序列化结果；命中缓存时直接返回已序列化的响应"""
+    key = ResponseCache.key(tool.name, kwargs, compact, fields)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    with track_dependencies() as deps, compact_output(compact), call_memo(), deadline(TOOL_DEADLINE_SECONDS) as dl:
+        try:
+            result = tool.handler(**kwargs)
+        except DeadlineExceeded as e:
+            result = {"error": f"请求超时：{e}", "tool": tool.name}
+    timed_out = dl is not None and dl.exceeded
+
+    expires_at = deps.expires_at
+    if deps.stale_age and isinstance(result, dict) and "error" not in result:
+        stale = {"stale_age_seconds": round(deps.stale_age, 3)}
+        if deps.stale_error:
+            stale["stale_error"] = deps.stale_error
+        result = {**result, **stale}
+        if fields:
+            fields = [*fields, *stale]
+    if timed_out and isinstance(result, dict):
+        result = {**result, "deadline_exceeded": True, "deadline_seconds": dl.seconds}
+        if fields:
+            fields = [*fields, "deadline_exceeded", "deadline_seconds"]
+    entry = CachedResponse(render_result(result, compact, fields), expires_at)
+    cacheable = (
+        not timed_out
+        and expires_at is not None
+        and expires_at > time.time()
+        and not (isinstance(result, dict) and "error" in result)
+    )
+    if cacheable:
+        response_cache.put(key, entry)
+    return entry
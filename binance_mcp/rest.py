@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+REST 路由 - 由工具注册表生成 Binance REST 接口（unified_server / mcp_http_server 共用）
+
+query string 按工具 inputSchema 转换类型；未传的参数依次取 REST 默认值、schema 默认值。
+支持通用输出参数 compact / fields（见 output.py）。
+响应经 response_cache 缓存，带 ETag 与 Cache-Control，请求带匹配的 If-None-Match 时返回 304。
+"""
+
+from typing import Dict, Any
+
+from .registry import registry, Tool, ToolArgumentError
+from .output import OUTPUT_PROPERTIES, output_options
+from .response_cache import tool_response
+
+
+def _make_view(tool: Tool):
+    from flask import Response, request, jsonify
+
+    def view():
+        arguments: Dict[str, Any] = dict(tool.rest_defaults)
+        arguments.update(request.args.to_dict())
+        try:
+            kwargs = tool.coerce_arguments(arguments)
+        except ToolArgumentError as e:
+            return jsonify({"error": str(e)}), 400
+
+        compact, fields = output_options(arguments)
+        cached = tool_response(tool, kwargs, compact, fields)
+        response = Response(cached.body, mimetype="application/json")
+        response.set_etag(cached.etag)
+        response.cache_control.max_age = cached.max_age
+        return response.make_conditional(request)
+
+    view.__name__ = f"binance_{tool.name}"
+    view.__doc__ = tool.schema.get("description", "")
+    return view
+
+
+def register_rest_routes(app) -> None:
+    """把注册表中所有带 REST 路径的工具挂到 Flask app 上（GET）"""
+    from . import server  # noqa: F401  工具在 server 模块导入时登记
+    for tool in registry.rest_tools():
+        app.add_url_rule(tool.rest_path, endpoint=f"binance_{tool.name}", view_func=_make_view(tool), methods=["GET"])
+
+
+def rest_endpoint_index() -> Dict[str, str]:
+    """API 文档用的 REST 接口列表：工具名 → "GET 路径?参数" """
+    from . import server  # noqa: F401
+    index = {}
+    for tool in registry.rest_tools():
+        properties = tool.schema.get("inputSchema", {}).get("properties", {})
+        params = dict(tool.rest_defaults)
+        params.update({k: spec["default"] for k, spec in properties.items() if "default" in spec and k not in OUTPUT_PROPERTIES})
+        query = "&".join(f"{k}={v}" for k, v in params.items() if v != "")
+        index[tool.name] = f"GET {tool.rest_path}" + (f"?{query}" if query else "")
+    return index
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+后台任务调度器 - 周期性任务（历史数据同步、缓存维护等）
+
+实现机制：
+- 单个调度线程维护按下次运行时间排序的堆，到点后把任务交给工作线程执行
+- 同一任务上一次尚未结束时跳过本轮，避免慢任务堆积
+- 任务异常只记录到 last_error，不影响调度线程和其他任务
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Tuple
+
+# 执行后台任务的工作线程数
+SCHEDULER_WORKERS = 4
+
+
+class ScheduledJob:
+    """一个周期性任务"""
+
+    __slots__ = ("name", "func", "interval", "running", "last_run", "last_error", "run_count")
+
+    def __init__(self, name: str, func: Callable[[], Any], interval: float) -> None:
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.running = False
+        self.last_run = None
+        self.last_error = None
+        self.run_count = 0
+
+
+class Scheduler:
+    """周期性任务调度器（守护线程，进程退出时自动结束）"""
+
+    def __init__(self, workers: int = SCHEDULER_WORKERS) -> None:
+        self._heap: List[Tuple[float, int, ScheduledJob]] = []
+        self._jobs: Dict[str, ScheduledJob] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._workers = workers
+        self._executor = None
+        self._thread = None
+        self._stopped = False
+
+    def add_job(self, name: str, func: Callable[[], Any], interval: float,
+                initial_delay: float = 0.0) -> ScheduledJob:
+        """注册周期任务；同名任务已存在时直接返回已有任务"""
+        with self._cond:
+            if name in self._jobs:
+                return self._jobs[name]
+            job = ScheduledJob(name, func, interval)
+            self._jobs[name] = job
+            heapq.heappush(self._heap, (time.time() + initial_delay, next(self._seq), job))
+            self._cond.notify()
+            return job
+
+    def remove_job(self, name: str) -> None:
+        """注销任务（堆中的条目在到点时被丢弃）"""
+        with self._cond:
+            self._jobs.pop(name, None)
+
+    def start(self) -> None:
+        """启动调度线程（重复调用无副作用）"""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="binance-mcp-job")
+            self._thread = threading.Thread(target=self._run, name="binance-mcp-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def status(self) -> Dict[str, Any]:
+        """各任务运行状态（供健康检查使用）"""
+        with self._cond:
+            return {
+                name: {
+                    "interval": job.interval,
+                    "running": job.running,
+                    "run_count": job.run_count,
+                    "last_run": job.last_run,
+                    "last_error": job.last_error,
+                }
+                for name, job in self._jobs.items()
+            }
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopped and (not self._heap or self._heap[0][0] > time.time()):
+                    timeout = self._heap[0][0] - time.time() if self._heap else None
+                    self._cond.wait(timeout)
+                if self._stopped:
+                    return
+                run_at, _, job = heapq.heappop(self._heap)
+                if self._jobs.get(job.name) is not job:
+                    continue  # 已注销
+                heapq.heappush(self._heap, (max(time.time(), run_at + job.interval), next(self._seq), job))
+                if job.running:
+                    continue  # 上一轮尚未结束，跳过
+                job.running = True
+            self._executor.submit(self._execute, job)
+
+    def _execute(self, job: ScheduledJob) -> None:
+        try:
+            job.func()
+            job.last_error = None
+        except Exception as e:
+            job.last_error = str(e)
+        finally:
+            job.last_run = time.time()
+            job.run_count += 1
+            job.running = False
+
+
+# 全局单例
+scheduler = Scheduler()
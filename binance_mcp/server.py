@@ -5,30 +5,16 @@ MCP服务器 - JSON-RPC 2.0协议处理
 
 import json
 import sys
-from typing import Dict, Any
-
-from .api import (
-    get_spot_price, get_ticker_24h, get_multiple_tickers,
-    get_klines, get_futures_price, get_futures_ticker_24h, get_futures_klines,
-    get_futures_multiple_tickers, get_funding_rate, get_realtime_funding_rate,
-    get_extreme_funding_rates, get_mark_price, get_open_interest,
-    get_open_interest_hist, get_top_long_short_ratio,
-    get_top_long_short_position_ratio, get_global_long_short_ratio,
-    get_taker_buy_sell_ratio, analyze_spot_vs_futures,
-    search_symbols, search_futures_symbols, get_top_gainers_losers,
-    get_futures_top_gainers_losers
-)
-from .analysis import (
-    comprehensive_analysis, analyze_market_factors, analyze_kline_patterns,
-    comprehensive_analysis_futures, analyze_futures_kline_patterns,
-    analyze_futures_market_factors
-)
-from .alpha import (
-    get_alpha_tokens_list, analyze_alpha_token,
-    get_active_alpha_competitions, add_alpha_competition
-)
-from .alpha_realtime import get_realtime_alpha_airdrops
-from .alpha_config import auto_detect_alpha_competitions
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, IO
+
+from .services import start_background_services
+from .context import RequestContext, request_context
+from .config import MCP_STDIO_WORKERS, MCP_BATCH_WORKERS, STDIO_WARMUP_MODE
+from .registry import registry, ToolArgumentError
+from .response_cache import tool_response
+from .output import output_options, render_result
 
 # MCP工具定义
 MCP_TOOLS = [
@@ -116,6 +102,41 @@ MCP_TOOLS = [
             "required": ["symbol"]
         }
     },
+    {
+        "name": "multi_timeframe_analysis",
+        "description": "多周期技术分析：一次拉取基础周期K线（默认1h），本地合成4h/1d/1w等高周期，分别计算RSI、MACD、布林带、趋势并判断多周期共振。verify=true时与币安原生周期K线逐根核对",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "symbol": {
+                    "type": "string",
+                    "description": "交易对符号"
+                },
+                "timeframes": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "分析周期列表，默认[\"1h\", \"4h\", \"1d\"]，须为base_interval的整数倍"
+                },
+                "base_interval": {
+                    "type": "string",
+                    "description": "基础周期，默认1h",
+                    "default": "1h"
+                },
+                "market": {
+                    "type": "string",
+                    "enum": ["spot", "futures"],
+                    "description": "市场: spot（现货）或 futures（合约），默认spot",
+                    "default": "spot"
+                },
+                "verify": {
+                    "type": "boolean",
+                    "description": "是否与币安原生周期K线核对合成结果，默认false",
+                    "default": False
+                }
+            },
+            "required": ["symbol"]
+        }
+    },
     {
         "name": "analyze_kline_patterns",
         "description": "K线形态分析（默认4小时K线）：识别十字星、锤子线、上吊线、吞没形态等经典K线形态。⚠️ 默认使用4小时K线，可通过interval参数调整周期",
@@ -211,6 +232,34 @@ MCP_TOOLS = [
             }
         }
     },
+    {
+        "name": "get_funding_rate_percentile",
+        "description": "【本地历史】最新已结算资金费率在近30天历史中的百分位，附均值、分位数、连续同向期数、年化carry等统计（无需实时请求币安）",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "symbol": {
+                    "type": "string",
+                    "description": "交易对符号"
+                }
+            },
+            "required": ["symbol"]
+        }
+    },
+    {
+        "name": "get_funding_stats_overview",
+        "description": "【本地历史】全市场资金费率统计：年化carry最高/最低、费率处于历史高位/低位的合约",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "limit": {
+                    "type": "integer",
+                    "description": "每类返回的最大数量，默认10",
+                    "default": 10
+                }
+            }
+        }
+    },
     {
         "name": "analyze_spot_vs_futures",
         "description": "分析现货与合约价差，判断套利机会",
@@ -302,7 +351,9 @@ MCP_TOOLS = [
             "properties": {
                 "symbol": {"type": "string", "description": "交易对符号"},
                 "period": {"type": "string", "description": "周期: 5m,15m,30m,1h,2h,4h,6h,12h,1d", "default": "1h"},
-                "limit": {"type": "integer", "description": "数量，默认30", "default": 30}
+                "limit": {"type": "integer", "description": "数量，默认30", "default": 30},
+                "start_time": {"type": "integer", "description": "起始时间（毫秒时间戳，可选）；本地历史库已跟踪的标的可查询超过30天的数据"},
+                "end_time": {"type": "integer", "description": "结束时间（毫秒时间戳，可选）"}
             },
             "required": ["symbol"]
         }
@@ -315,7 +366,9 @@ MCP_TOOLS = [
             "properties": {
                 "symbol": {"type": "string"},
                 "period": {"type": "string", "default": "1h"},
-                "limit": {"type": "integer", "default": 30}
+                "limit": {"type": "integer", "default": 30},
+                "start_time": {"type": "integer", "description": "起始时间（毫秒时间戳，可选）；本地历史库已跟踪的标的可查询超过30天的数据"},
+                "end_time": {"type": "integer", "description": "结束时间（毫秒时间戳，可选）"}
             },
             "required": ["symbol"]
         }
@@ -328,7 +381,9 @@ MCP_TOOLS = [
             "properties": {
                 "symbol": {"type": "string"},
                 "period": {"type": "string", "default": "1h"},
-                "limit": {"type": "integer", "default": 30}
+                "limit": {"type": "integer", "default": 30},
+                "start_time": {"type": "integer", "description": "起始时间（毫秒时间戳，可选）；本地历史库已跟踪的标的可查询超过30天的数据"},
+                "end_time": {"type": "integer", "description": "结束时间（毫秒时间戳，可选）"}
             },
             "required": ["symbol"]
         }
@@ -341,7 +396,9 @@ MCP_TOOLS = [
             "properties": {
                 "symbol": {"type": "string"},
                 "period": {"type": "string", "default": "1h"},
-                "limit": {"type": "integer", "default": 30}
+                "limit": {"type": "integer", "default": 30},
+                "start_time": {"type": "integer", "description": "起始时间（毫秒时间戳，可选）；本地历史库已跟踪的标的可查询超过30天的数据"},
+                "end_time": {"type": "integer", "description": "结束时间（毫秒时间戳，可选）"}
             },
             "required": ["symbol"]
         }
@@ -354,7 +411,9 @@ MCP_TOOLS = [
             "properties": {
                 "symbol": {"type": "string"},
                 "period": {"type": "string", "default": "1h"},
-                "limit": {"type": "integer", "default": 30}
+                "limit": {"type": "integer", "default": 30},
+                "start_time": {"type": "integer", "description": "起始时间（毫秒时间戳，可选）；本地历史库已跟踪的标的可查询超过30天的数据"},
+                "end_time": {"type": "integer", "description": "结束时间（毫秒时间戳，可选）"}
             },
             "required": ["symbol"]
         }
@@ -507,10 +566,83 @@ MCP_TOOLS = [
                 }
             }
         }
+    },
+    {
+        "name": "get_market_rankings",
+        "description": "获取市场排行：涨幅榜、跌幅榜、成交额榜、振幅榜（现货或合约）",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "market": {"type": "string", "description": "市场: spot（现货）或 futures（合约），默认spot", "default": "spot"},
+                "rank_by": {"type": "string", "description": "排行类型: gainers, losers, volume, volatility", "default": "gainers"},
+                "limit": {"type": "integer", "description": "返回数量，默认10", "default": 10}
+            }
+        }
     }
 ]
 
 
+_BTC = {"symbol": "BTC"}
+
+# 工具名 → (处理函数, REST 路径, REST 参数默认值)；REST 路径为 None 表示仅支持 MCP
+# 处理函数写作 "模块:函数名"，首次调用时才导入（initialize / tools/list 不加载 requests 与分析模块）
+TOOL_HANDLERS = {
+    # 价格查询
+    "get_spot_price": ("api:get_spot_price", "/binance/spot/price", _BTC),
+    "get_ticker_24h": ("api:get_ticker_24h", "/binance/ticker/24h", _BTC),
+    "get_multiple_tickers": ("api:get_multiple_tickers", None, None),
+
+    # K线数据
+    "get_klines": ("api:get_klines", "/binance/klines", _BTC),
+
+    # 技术分析
+    "comprehensive_analysis": ("analysis:comprehensive_analysis", "/binance/analysis/comprehensive", _BTC),
+    "analyze_kline_patterns": ("analysis:analyze_kline_patterns", "/binance/analysis/kline-patterns", _BTC),
+    "analyze_market_factors": ("analysis:analyze_market_factors", "/binance/analysis/market-factors", _BTC),
+    "multi_timeframe_analysis": ("analysis:multi_timeframe_analysis", None, None),
+
+    # 合约分析
+    "get_futures_price": ("api:get_futures_price", "/binance/futures/price", _BTC),
+    "get_funding_rate": ("api:get_funding_rate", "/binance/funding-rate", _BTC),
+    "get_realtime_funding_rate": ("api:get_realtime_funding_rate", "/binance/funding-rate/realtime", _BTC),
+    "get_extreme_funding_rates": ("api:get_extreme_funding_rates", "/binance/funding-rate/extreme", None),
+    "get_funding_rate_percentile": ("funding_store:get_funding_rate_percentile", None, None),
+    "get_funding_stats_overview": ("funding_store:get_funding_stats_overview", None, None),
+    "analyze_spot_vs_futures": ("api:analyze_spot_vs_futures", "/binance/analysis/spot-vs-futures", _BTC),
+    "get_futures_ticker_24h": ("api:get_futures_ticker_24h", None, None),
+    "get_futures_klines": ("api:get_futures_klines", None, None),
+    "get_futures_multiple_tickers": ("api:get_futures_multiple_tickers", None, None),
+    "search_futures_symbols": ("api:search_futures_symbols", None, None),
+    "get_futures_top_gainers_losers": ("api:get_futures_top_gainers_losers", None, None),
+    "get_open_interest": ("api:get_open_interest", None, None),
+    "get_open_interest_hist": ("api:get_open_interest_hist", None, None),
+    "get_top_long_short_ratio": ("api:get_top_long_short_ratio", None, None),
+    "get_top_long_short_position_ratio": ("api:get_top_long_short_position_ratio", None, None),
+    "get_global_long_short_ratio": ("api:get_global_long_short_ratio", None, None),
+    "get_taker_buy_sell_ratio": ("api:get_taker_buy_sell_ratio", None, None),
+    "get_mark_price": ("api:get_mark_price", None, None),
+    "comprehensive_analysis_futures": ("analysis:comprehensive_analysis_futures", None, None),
+    "analyze_futures_kline_patterns": ("analysis:analyze_futures_kline_patterns", None, None),
+    "analyze_futures_market_factors": ("analysis:analyze_futures_market_factors", None, None),
+
+    # Alpha分析
+    "get_realtime_alpha_airdrops": ("alpha_realtime:get_realtime_alpha_airdrops", "/binance/alpha/airdrops", None),
+    "get_alpha_tokens_list": ("alpha:get_alpha_tokens_list", "/binance/alpha/tokens", None),
+    "analyze_alpha_token": ("alpha:analyze_alpha_token", "/binance/alpha/analyze", None),
+    "get_active_alpha_competitions": ("alpha:get_active_alpha_competitions", "/binance/alpha/competitions", None),
+    "add_alpha_competition": ("alpha:add_alpha_competition", None, None),
+
+    # 市场数据
+    "search_symbols": ("api:search_symbols", "/binance/search", {"keyword": ""}),
+    "get_top_gainers_losers": ("api:get_top_gainers_losers", "/binance/top-movers", None),
+    "get_market_rankings": ("api:get_market_rankings", None, None),
+}
+
+for _schema in MCP_TOOLS:
+    _handler, _rest, _rest_defaults = TOOL_HANDLERS[_schema["name"]]
+    registry.register(_schema, _handler, _rest, _rest_defaults)
+
+
 def handle_mcp_request(request: Dict[str, Any]) -> Dict[str, Any] | None:
     """处理MCP请求"""
     method = request.get("method")
@@ -539,149 +671,27 @@ def handle_mcp_request(request: Dict[str, Any]) -> Dict[str, Any] | None:
             }
         
         elif method == "tools/list":
-            response["result"] = {"tools": MCP_TOOLS}
+            response["result"] = {"tools": registry.schemas}
 
         elif method == "tools/call":
             tool_name = params.get("name")
             arguments = params.get("arguments", {})
 
-            # 价格查询
-            if tool_name == "get_spot_price":
-                result = get_spot_price(arguments.get("symbol", ""))
-            elif tool_name == "get_ticker_24h":
-                result = get_ticker_24h(arguments.get("symbol", ""))
-            elif tool_name == "get_multiple_tickers":
-                result = get_multiple_tickers(arguments.get("symbols", []))
-            
-            # K线数据
-            elif tool_name == "get_klines":
-                result = get_klines(
-                    arguments.get("symbol", ""),
-                    arguments.get("interval", "1h"),
-                    arguments.get("limit", 100)
-                )
-            
-            # 技术分析
-            elif tool_name == "comprehensive_analysis":
-                result = comprehensive_analysis(arguments.get("symbol", ""))
-            elif tool_name == "analyze_kline_patterns":
-                result = analyze_kline_patterns(
-                    arguments.get("symbol", ""),
-                    arguments.get("interval", "4h")
-                )
-            elif tool_name == "analyze_market_factors":
-                result = analyze_market_factors(arguments.get("symbol", ""))
-            
-            # 合约分析
-            elif tool_name == "get_futures_price":
-                result = get_futures_price(arguments.get("symbol", ""))
-            elif tool_name == "get_funding_rate":
-                result = get_funding_rate(arguments.get("symbol", ""))
-            elif tool_name == "get_realtime_funding_rate":
-                result = get_realtime_funding_rate(arguments.get("symbol", ""))
-            elif tool_name == "get_extreme_funding_rates":
-                result = get_extreme_funding_rates(
-                    arguments.get("threshold", 0.1),
-                    arguments.get("limit", 20)
-                )
-            elif tool_name == "analyze_spot_vs_futures":
-                result = analyze_spot_vs_futures(arguments.get("symbol", ""))
-            elif tool_name == "get_futures_ticker_24h":
-                result = get_futures_ticker_24h(arguments.get("symbol", ""))
-            elif tool_name == "get_futures_klines":
-                result = get_futures_klines(
-                    arguments.get("symbol", ""),
-                    arguments.get("interval", "1h"),
-                    arguments.get("limit", 100)
-                )
-            elif tool_name == "get_futures_multiple_tickers":
-                result = get_futures_multiple_tickers(arguments.get("symbols", []))
-            elif tool_name == "search_futures_symbols":
-                result = search_futures_symbols(arguments.get("keyword", ""))
-            elif tool_name == "get_futures_top_gainers_losers":
-                result = get_futures_top_gainers_losers(arguments.get("limit", 10))
-            elif tool_name == "get_open_interest":
-                result = get_open_interest(arguments.get("symbol", ""))
-            elif tool_name == "get_open_interest_hist":
-                result = get_open_interest_hist(
-                    arguments.get("symbol", ""),
-                    arguments.get("period", "1h"),
-                    arguments.get("limit", 30)
-                )
-            elif tool_name == "get_top_long_short_ratio":
-                result = get_top_long_short_ratio(
-                    arguments.get("symbol", ""),
-                    arguments.get("period", "1h"),
-                    arguments.get("limit", 30)
-                )
-            elif tool_name == "get_top_long_short_position_ratio":
-                result = get_top_long_short_position_ratio(
-                    arguments.get("symbol", ""),
-                    arguments.get("period", "1h"),
-                    arguments.get("limit", 30)
-                )
-            elif tool_name == "get_global_long_short_ratio":
-                result = get_global_long_short_ratio(
-                    arguments.get("symbol", ""),
-                    arguments.get("period", "1h"),
-                    arguments.get("limit", 30)
-                )
-            elif tool_name == "get_taker_buy_sell_ratio":
-                result = get_taker_buy_sell_ratio(
-                    arguments.get("symbol", ""),
-                    arguments.get("period", "1h"),
-                    arguments.get("limit", 30)
-                )
-            elif tool_name == "get_mark_price":
-                result = get_mark_price(arguments.get("symbol", ""))
-            elif tool_name == "comprehensive_analysis_futures":
-                result = comprehensive_analysis_futures(arguments.get("symbol", ""))
-            elif tool_name == "analyze_futures_kline_patterns":
-                result = analyze_futures_kline_patterns(
-                    arguments.get("symbol", ""),
-                    arguments.get("interval", "4h")
-                )
-            elif tool_name == "analyze_futures_market_factors":
-                result = analyze_futures_market_factors(arguments.get("symbol", ""))
-            
-            # Alpha分析
-            elif tool_name == "get_realtime_alpha_airdrops":
-                result = get_realtime_alpha_airdrops()
-            elif tool_name == "get_alpha_tokens_list":
-                result = get_alpha_tokens_list()
-            elif tool_name == "analyze_alpha_token":
-                result = analyze_alpha_token(arguments.get("symbol", ""))
-            elif tool_name == "get_active_alpha_competitions":
-                # 重新加载配置
-                from . import alpha
-                alpha.ALPHA_COMPETITIONS = auto_detect_alpha_competitions()
-                result = get_active_alpha_competitions()
-            elif tool_name == "add_alpha_competition":
-                result = add_alpha_competition(
-                    symbol=arguments.get("symbol", ""),
-                    name=arguments.get("name", ""),
-                    start_time=arguments.get("start_time", ""),
-                    end_time=arguments.get("end_time", ""),
-                    total_reward=arguments.get("total_reward"),
-                    winner_count=arguments.get("winner_count"),
-                    per_user_reward=arguments.get("per_user_reward"),
-                    note=arguments.get("note", "")
-                )
-            
-            # 市场数据
-            elif tool_name == "search_symbols":
-                result = search_symbols(arguments.get("keyword", ""))
-            elif tool_name == "get_top_gainers_losers":
-                result = get_top_gainers_losers(arguments.get("limit", 10))
-            
+            compact, fields = output_options(arguments)
+            tool = registry.get(tool_name)
+            if tool is None:
+                text = render_result({"error": f"Unknown tool: {tool_name}"}, compact)
             else:
-                result = {"error": f"Unknown tool: {tool_name}"}
+                try:
+                    text = tool_response(tool, tool.coerce_arguments(arguments), compact, fields).body
+                except ToolArgumentError as e:
+                    text = render_result({"error": str(e), "tool": tool_name}, compact)
 
             response["result"] = {
                 "content": [
                     {
                         "type": "text",
-                        "text": json.dumps(result, indent=2, ensure_ascii=False)
+                        "text": text
                     }
                 ]
             }
@@ -701,26 +711,225 @@ def handle_mcp_request(request: Dict[str, Any]) -> Dict[str, Any] | None:
     return response
 
 
-def main():
-    """MCP服务器主循环"""
-    for line in sys.stdin:
-        try:
-            line = line.strip()
-            if not line:
+def handle_mcp_request_text(request: Dict[str, Any]) -> str | None:
+    """处理单个请求并返回序列化后的响应；tools/list 直接拼接预编码的工具列表，不再逐次序列化"""
+    if request.get("method") == "tools/list" and request.get("id") is not None:
+        return f'{{"jsonrpc": "2.0", "id": {json.dumps(request["id"])}, "result": {registry.tools_list_json()}}}'
+    response = handle_mcp_request(request)
+    return None if response is None else json.dumps(response, ensure_ascii=False)
+
+
+_batch_executor = None
+_batch_executor_lock = threading.Lock()
+
+
+def _get_batch_executor() -> ThreadPoolExecutor:
+    global _batch_executor
+    if _batch_executor is None:
+        with _batch_executor_lock:
+            if _batch_executor is None:
+                _batch_executor = ThreadPoolExecutor(max_workers=MCP_BATCH_WORKERS,
+                                                     thread_name_prefix="binance-mcp-batch")
+    return _batch_executor
+
+
+def _handle_in_context(request: Dict[str, Any], ctx: RequestContext) -> Dict[str, Any] | None:
+    with request_context(ctx):
+        return handle_mcp_request(request)
+
+
+def handle_mcp_batch(requests: List[Any],
+                     contexts: Dict[Any, RequestContext] = None) -> List[Dict[str, Any]] | Dict[str, Any] | None:
+    """
+    处理 JSON-RPC 批量请求：各请求在线程池中并发执行（相同的上游请求经 request_pool 合并），
+    响应按请求顺序返回；通知不产生响应，全部为通知时返回 None。
+    同一批内重复的 id 无法区分响应和取消，第一个之后的重复请求返回 -32600 且不执行。
+    contexts 为 id → RequestContext，供 stdio 传输取消批量中的单个请求。
+    """
+    if not requests:
+        return {
+            "jsonrpc": "2.0",
+            "id": None,
+            "error": {"code": -32600, "message": "Invalid Request: empty batch"}
+        }
+
+    contexts = contexts or {}
+    executor = _get_batch_executor()
+    pending = []
+    seen_ids = set()
+    for request in requests:
+        if not isinstance(request, dict):
+            pending.append(({
+                "jsonrpc": "2.0",
+                "id": None,
+                "error": {"code": -32600, "message": "Invalid Request"}
+            }, None))
+            continue
+        request_id = request.get("id")
+        if isinstance(request_id, (str, int, float)):
+            if request_id in seen_ids:
+                pending.append(({
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "error": {"code": -32600, "message": "Invalid Request: duplicate id in batch"}
+                }, None))
                 continue
-            request = json.loads(line)
-            response = handle_mcp_request(request)
+            seen_ids.add(request_id)
+            ctx = contexts.get(request_id) or RequestContext(request_id)
+        else:
+            ctx = RequestContext(request_id)
+        pending.append((executor.submit(_handle_in_context, request, ctx), ctx))
+
+    responses = []
+    for item, ctx in pending:
+        response = item if ctx is None else item.result()
+        if response is not None and not (ctx is not None and ctx.cancelled):
+            responses.append(response)
+    return responses or None
+
+
+def handle_mcp_message(message: Any) -> List[Dict[str, Any]] | Dict[str, Any] | None:
+    """处理单个 JSON-RPC 请求或批量请求（数组）"""
+    if isinstance(message, list):
+        return handle_mcp_batch(message)
+    return handle_mcp_request(message)
+
+
+class StdioServer:
+    """
+    stdio 传输：tools/call 分发到有界线程池并发执行，完成即写回（JSON-RPC 以 id 对应，允许乱序）。
+    - stdout 写入加锁，保证每行是一条完整消息
+    - 排队中的任务不超过 workers * 4，满了暂停读取 stdin（背压）
+    - notifications/cancelled：排队中的请求直接丢弃；执行中的请求在下一次上游请求前中止，且不再写回响应
+    - 批量请求（数组）整体占一个任务，批内请求再由 handle_mcp_batch 并发执行，响应作为数组一次写回；
+      批内的 notifications/cancelled 与单条消息一样在读取线程内立即生效（可取消同一批或之前的请求）
+    """
+
+    def __init__(self, workers: int = MCP_STDIO_WORKERS, output: IO[str] = None) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="binance-mcp-stdio")
+        self._slots = threading.BoundedSemaphore(workers * 4)
+        self._output = output or sys.stdout
+        self._write_lock = threading.Lock()
+        self._inflight: Dict[Any, RequestContext] = {}
+        self._inflight_lock = threading.Lock()
+
+    def write(self, message: Dict[str, Any] | List[Dict[str, Any]]) -> None:
+        self.write_text(json.dumps(message, ensure_ascii=False))
+
+    def write_text(self, line: str) -> None:
+        with self._write_lock:
+            self._output.write(line + "\n")
+            self._output.flush()
+
+    def cancel(self, request_id: Any) -> None:
+        with self._inflight_lock:
+            ctx = self._inflight.get(request_id)
+        if ctx is not None:
+            ctx.cancel()
+
+    def dispatch(self, request: Dict[str, Any] | List[Any]) -> None:
+        """处理一条消息：取消通知和轻量方法在读取线程内完成，tools/call 与批量请求交给线程池"""
+        if isinstance(request, list):
+            self._submit_batch(request)
+            return
+
+        method = request.get("method")
+        if method == "notifications/cancelled":
+            self.cancel((request.get("params") or {}).get("requestId"))
+            return
+        if method != "tools/call" or request.get("id") is None:
+            text = handle_mcp_request_text(request)
+            if text is not None:
+                self.write_text(text)
+            return
+
+        ctx = RequestContext(request["id"])
+        with self._inflight_lock:
+            self._inflight[ctx.request_id] = ctx
+        self._slots.acquire()
+        self._executor.submit(self._run, request, ctx)
+
+    def _submit_batch(self, batch: List[Any]) -> None:
+        contexts = {}
+        cancels = []
+        requests = []
+        for request in batch:
+            if isinstance(request, dict) and request.get("method") == "notifications/cancelled":
+                cancels.append((request.get("params") or {}).get("requestId"))
+                continue
+            requests.append(request)
+            request_id = request.get("id") if isinstance(request, dict) else None
+            if isinstance(request_id, (str, int, float)) and request_id not in contexts:  # 重复 id 由 handle_mcp_batch 拒绝
+                contexts[request_id] = RequestContext(request_id)
+        with self._inflight_lock:
+            self._inflight.update(contexts)
+        for request_id in cancels:
+            self.cancel(request_id)
+        if not requests:  # 全部为取消通知，无需响应
+            return
+        batch = requests
+        self._slots.acquire()
+        self._executor.submit(self._run_batch, batch, contexts)
+
+    def _run_batch(self, batch: List[Any], contexts: Dict[Any, RequestContext]) -> None:
+        try:
+            response = handle_mcp_batch(batch, contexts)
             if response is not None:
-                print(json.dumps(response, ensure_ascii=False), flush=True)
-        except json.JSONDecodeError:
-            pass
+                self.write(response)
+        finally:
+            with self._inflight_lock:
+                for request_id, ctx in contexts.items():
+                    if self._inflight.get(request_id) is ctx:
+                        del self._inflight[request_id]
+            self._slots.release()
+
+    def _run(self, request: Dict[str, Any], ctx: RequestContext) -> None:
+        try:
+            if ctx.cancelled:
+                return
+            with request_context(ctx):
+                response = handle_mcp_request(request)
+            if response is not None and not ctx.cancelled:
+                self.write(response)
         except Exception as e:
-            error_response = {
-                "jsonrpc": "2.0",
-                "id": None,
-                "error": {"code": -32603, "message": str(e)}
-            }
-            print(json.dumps(error_response), flush=True)
+            if not ctx.cancelled:
+                self.write({
+                    "jsonrpc": "2.0",
+                    "id": ctx.request_id,
+                    "error": {"code": -32603, "message": str(e)}
+                })
+        finally:
+            with self._inflight_lock:
+                if self._inflight.get(ctx.request_id) is ctx:
+                    del self._inflight[ctx.request_id]
+            self._slots.release()
+
+    def serve(self, stream: IO[str]) -> None:
+        for line in stream:
+            try:
+                line = line.strip()
+                if not line:
+                    continue
+                self.dispatch(json.loads(line))
+            except json.JSONDecodeError:
+                pass
+            except Exception as e:
+                self.write({
+                    "jsonrpc": "2.0",
+                    "id": None,
+                    "error": {"code": -32603, "message": str(e)}
+                })
+        self._executor.shutdown(wait=True)
+
+
+def main():
+    """MCP服务器主循环：后台服务在独立线程中启动，stdin 立即开始处理（blocking 预热模式除外）"""
+    if STDIO_WARMUP_MODE == "blocking":
+        start_background_services(stdio=True)
+    else:
+        threading.Thread(target=start_background_services, kwargs={"stdio": True},
+                         name="binance-mcp-services", daemon=True).start()
+    StdioServer().serve(sys.stdin)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+后台服务启动 - 各入口（stdio / unified_server / mcp_http_server）启动时调用一次
+
+HTTP 入口在模块导入时调用：gunicorn 每个 worker 导入 app 模块时各启动一次，
+直接运行脚本时同样经过这里。后台线程不会随 fork 复制，gunicorn 不要使用 --preload。
+
+写本地库的同步任务（资金费率历史、合约数据、竞赛成交统计）按本机锁（host_lock）只在一个进程中运行，
+其他 stdio 会话 / worker 只读同一个库，不重复消耗上游权重。
+预热快照所有进程都载入，但只有一个进程定期写入。
+"""
+
+import os
+import threading
+
+from .host_lock import acquire_host_lock
+from .config import (
+    FUNDING_STORE_ENABLED, FUTURES_DATA_STORE_ENABLED, STREAMS_ENABLED, HOT_KEY_REFRESH_ENABLED, SNAPSHOT_ENABLED,
+    WARMUP_MODE, COMPETITION_VOLUME_ENABLED, STDIO_SNAPSHOT_ENABLED, STDIO_WARMUP_MODE,
+)
+
+
+_started_pid = None
+_started_lock = threading.Lock()
+
+
+def start_background_services(stdio: bool = False) -> None:
+    """按配置启动后台服务（每个进程一次，重复调用无副作用）；stdio 入口默认不载入快照、不预热"""
+    global _started_pid
+    with _started_lock:
+        if _started_pid == os.getpid():
+            return
+        _started_pid = os.getpid()
+    if STDIO_SNAPSHOT_ENABLED if stdio else SNAPSHOT_ENABLED:
+        from .snapshot import start_snapshots
+        start_snapshots()  # 先载入快照，后续服务启动时即可命中缓存
+    warmup_mode = STDIO_WARMUP_MODE if stdio else WARMUP_MODE
+    if warmup_mode != "off":
+        from .warmup import start_warmup
+        start_warmup(warmup_mode)  # blocking 模式下在此等待预热完成
+    if STREAMS_ENABLED:
+        from .streams import start_streams
+        start_streams()
+    if FUNDING_STORE_ENABLED and acquire_host_lock("funding_sync"):
+        from .funding_store import start_funding_sync
+        start_funding_sync()
+    if FUTURES_DATA_STORE_ENABLED and acquire_host_lock("futures_data_collect"):
+        from .futures_data_store import start_futures_data_collector
+        start_futures_data_collector()
+    if COMPETITION_VOLUME_ENABLED and acquire_host_lock("competition_volume"):
+        from .competition_volume import start_competition_volume_collector
+        start_competition_volume_collector()
+    if HOT_KEY_REFRESH_ENABLED:
+        from .request_pool import start_hot_key_refresh
+        start_hot_key_refresh()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+跨进程共享缓存与权重账本 - 同一台机器上多个 worker（gunicorn / supervisor）共用
+
+请求池（request_pool）的进程内字典仍作为 L1，本模块作为 L2：
+1. 共享缓存：各进程请求到的结果写入 SQLite（WAL），其他进程 L1 未命中时先读 L2，
+   数据时间戳沿用写入时的时间，TTL 在所有进程间一致
+2. 最近成功结果：失败响应不覆盖 good_data，供 stale-if-error 跨进程使用
+3. 请求租约：某个键正在由一个进程请求时，其他进程短暂等待其结果写入 L2，而不是同时请求上游
+4. 全局权重账本：所有进程共用一个 60s 窗口的已用权重，合计不超过 1200/min
+
+存储：SQLite（SHARED_CACHE_PATH，默认 DATA_DIR/request_pool.db），autocommit + BEGIN IMMEDIATE 保证原子性。
+连接在首次使用时按进程创建（fork 后自动重连）。
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from .config import SHARED_CACHE_PATH, SHARED_CACHE_RETENTION, SHARED_CACHE_LEASE_SECONDS
+
+# 每写入多少次清理一次过期行
+_PRUNE_EVERY = 1000
+
+
+class SharedCache:
+    """跨进程 L2 缓存 + 权重账本（线程安全，多进程安全）"""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self._path = path or SHARED_CACHE_PATH
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._writes = 0
+
+    # ---------- 存储 ----------
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self._path, check_same_thread=False, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, data TEXT NOT NULL, timestamp REAL NOT NULL, "
+                "good_data TEXT, good_timestamp REAL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS lease (key TEXT PRIMARY KEY, expires REAL NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ledger ("
+                "id INTEGER PRIMARY KEY CHECK (id = 1), window_start REAL NOT NULL, weight_used INTEGER NOT NULL)"
+            )
+            conn.execute("INSERT OR IGNORE INTO ledger (id, window_start, weight_used) VALUES (1, ?, 0)", (time.time(),))
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    # ---------- 缓存 ----------
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取最近一次结果：{"data", "timestamp"}，不存在时返回 None"""
+        with self._lock:
+            row = self._db().execute("SELECT data, timestamp FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return {"data": json.loads(row[0]), "timestamp": row[1]}
+
+    def last_good(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取最近一次成功的结果：{"data", "timestamp"}"""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT good_data, good_timestamp FROM cache WHERE key = ? AND good_data IS NOT NULL", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"data": json.loads(row[0]), "timestamp": row[1]}
+
+    def put(self, key: str, data: Dict[str, Any], timestamp: float) -> None:
+        """写入结果；成功结果同时更新最近成功值，并释放该键的租约"""
+        text = json.dumps(data, ensure_ascii=False)
+        good = text if data.get("success") else None
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT INTO cache (key, data, timestamp, good_data, good_timestamp) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET data = excluded.data, timestamp = excluded.timestamp, "
+                "good_data = COALESCE(excluded.good_data, cache.good_data), "
+                "good_timestamp = COALESCE(excluded.good_timestamp, cache.good_timestamp)",
+                (key, text, timestamp, good, timestamp if good else None),
+            )
+            db.execute("DELETE FROM lease WHERE key = ?", (key,))
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY == 0:
+                self._prune(db)
+
+    def _prune(self, db: sqlite3.Connection) -> None:
+        now = time.time()
+        db.execute(
+            "DELETE FROM cache WHERE timestamp < ? AND COALESCE(good_timestamp, 0) < ?",
+            (now - SHARED_CACHE_RETENTION, now - SHARED_CACHE_RETENTION),
+        )
+        db.execute("DELETE FROM lease WHERE expires < ?", (now,))
+
+    # ---------- 租约 ----------
+
+    def claim(self, key: str) -> bool:
+        """取得某个键的请求租约；其他进程持有未过期的租约时返回 False"""
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT expires FROM lease WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[0] > now:
+                    return False
+                db.execute(
+                    "INSERT OR REPLACE INTO lease (key, expires) VALUES (?, ?)",
+                    (key, now + SHARED_CACHE_LEASE_SECONDS),
+                )
+                return True
+            finally:
+                db.execute("COMMIT")
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._db().execute("DELETE FROM lease WHERE key = ?", (key,))
+
+    def wait_for(self, key: str, since: float, timeout: float = SHARED_CACHE_LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+        """等待其他进程写入时间戳不早于 since 的结果；租约释放或超时后返回 None"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            entry = self.get(key)
+            if entry is not None and entry["timestamp"] >= since:
+                return entry
+            with self._lock:
+                row = self._db().execute("SELECT expires FROM lease WHERE key = ?", (key,)).fetchone()
+            if row is None or row[0] <= time.time():
+                return None
+            time.sleep(0.05)
+        return None
+
+    # ---------- 权重账本 ----------
+
+    def acquire_weight(self, weight: int, limit: int, window: float, bucket: str = "spot") -> float:
+        """
+        在全局账本中登记 weight。
+        返回 0 表示已登记；否则返回需等待的秒数（未登记，窗口重置后重试）。
+        本机账本不分桶（现货与合约合计不超过 limit，比分别计数更保守），bucket 仅为与 BudgetClient 签名一致。
+        """
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                window_start, used = db.execute("SELECT window_start, weight_used FROM ledger WHERE id = 1").fetchone()
+                if now - window_start >= window:
+                    window_start, used = now, 0
+                elif used + weight > limit:
+                    return window - (now - window_start)
+                db.execute(
+                    "UPDATE ledger SET window_start = ?, weight_used = ? WHERE id = 1",
+                    (window_start, used + weight),
+                )
+                return 0.0
+            finally:
+                db.execute("COMMIT")
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            db = self._db()
+            window_start, used = db.execute("SELECT window_start, weight_used FROM ledger WHERE id = 1").fetchone()
+            entries = db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        return {"path": self._path, "entries": entries, "window_start": window_start, "weight_used": used}
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+预热快照 - 重启后不必从空缓存开始
+
+每次部署 / 重启后，请求池、Alpha 代币列表和 exchangeInfo 都是空的，第一分钟集中请求币安，用户看到的是冷启动延迟。
+本模块定期把长 TTL 的缓存写入磁盘，启动时载入：
+
+1. 请求池：TTL ≥ SNAPSHOT_MIN_TTL 的条目（exchangeInfo、K线、合约数据序列等）及其最近成功值
+2. Alpha：代币列表与 Alpha exchangeInfo（api 模块内的 5 分钟缓存）
+3. 格式：gzip 压缩的 JSON，先写临时文件（按进程区分）再原子替换
+4. 载入时沿用原时间戳：仍在 TTL 内的直接命中，在 swr / sie 窗口内的按对应规则使用，更旧的丢弃
+5. 同一台机器上所有进程都载入快照，只有持有本机锁（host_lock）的一个进程定期写入
+"""
+
+import gzip
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from .config import SNAPSHOT_PATH, SNAPSHOT_INTERVAL, SNAPSHOT_MIN_TTL
+from .host_lock import acquire_host_lock
+from .request_pool import snapshot_entries, restore_entries
+
+SNAPSHOT_VERSION = 1
+
+# api 模块中需要保存的 (数据, 时间) 全局缓存
+_ALPHA_CACHES = {
+    "alpha_token_list": ("_alpha_token_list_cache", "_alpha_token_list_cache_time"),
+    "alpha_exchange_info": ("_alpha_symbols_cache", "_alpha_symbols_cache_time"),
+}
+
+# 启动时载入的统计（None 表示尚未载入）
+_loaded: Optional[Dict[str, Any]] = None
+
+
+def save_snapshot(path: Optional[str] = None) -> Dict[str, Any]:
+    """写入快照，返回条目统计"""
+    from . import api
+
+    path = path or SNAPSHOT_PATH
+    alpha = {}
+    for name, (data_attr, time_attr) in _ALPHA_CACHES.items():
+        data, cached_at = getattr(api, data_attr), getattr(api, time_attr)
+        if data and cached_at:
+            alpha[name] = {"t": cached_at.timestamp(), "d": data}
+
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": time.time(),
+        "pool": snapshot_entries(SNAPSHOT_MIN_TTL),
+        "alpha": alpha,
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=5) as f:
+        json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return {"pool": len(snapshot["pool"]), "alpha": len(alpha)}
+
+
+def load_snapshot(path: Optional[str] = None) -> Dict[str, Any]:
+    """载入快照（文件不存在、损坏或版本不符时忽略），返回载入统计"""
+    from . import api
+
+    path = path or SNAPSHOT_PATH
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError, EOFError):
+        return {"pool": 0, "alpha": 0}
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        return {"pool": 0, "alpha": 0}
+
+    restored_alpha = 0
+    for name, item in snapshot.get("alpha", {}).items():
+        attrs = _ALPHA_CACHES.get(name)
+        if attrs is None:
+            continue
+        data_attr, time_attr = attrs
+        current = getattr(api, time_attr)
+        if current is None or current.timestamp() < item["t"]:
+            setattr(api, data_attr, item["d"])
+            setattr(api, time_attr, datetime.fromtimestamp(item["t"]))
+            restored_alpha += 1
+
+    return {"pool": restore_entries(snapshot.get("pool", [])), "alpha": restored_alpha}
+
+
+def start_snapshots() -> Dict[str, Any]:
+    """启动时载入快照，本机写入进程再注册定期保存任务（重复调用只载入一次）"""
+    from .scheduler import scheduler
+
+    global _loaded
+    if _loaded is None:
+        _loaded = load_snapshot()
+    if acquire_host_lock("warm_snapshot"):
+        scheduler.add_job("warm_snapshot", save_snapshot, SNAPSHOT_INTERVAL, initial_delay=SNAPSHOT_INTERVAL)
+        scheduler.start()
+    return _loaded
+
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+行情 WebSocket 推流 - 用币安 combined stream 维护全市场最新值，替代价格/行情/标记价格的 REST 轮询
+
+核心思路：
+1. 现货、合约各一条 combined stream 长连接（后台守护线程），订阅全市场推流：
+   !miniTicker@arr（24h 迷你行情）、!markPrice@arr@1s（标记价格/资金费率），
+   以及按需开启的 !bookTicker（最优挂单，BINANCE_MCP_STREAM_BOOK_TICKER=1）
+   和单标的 K 线流 <symbol>@kline_<interval>（BINANCE_MCP_STREAM_KLINES，K 线接口用其更新最后一根）
+2. 推送数据转换成与 REST 接口相同字段名的 dict 存入内存表，api 层拿到后走原有格式化逻辑
+3. 断线指数退避重连，重连时按当前订阅集合重建 URL（即重新订阅）；运行中新增订阅发送 SUBSCRIBE
+4. 超过 STREAM_STALE_SECONDS 未收到任何消息视为过期：读取返回 None（调用方回退 REST），并主动断开重连；
+   单个标的超过 STREAM_STALE_SECONDS 未出现在推送中（如迷你行情数组只含有变化的标的）时，该标的同样回退 REST
+5. 默认关闭（BINANCE_MCP_STREAMS=1 开启）：每个进程各自建立连接，多 worker 部署时按需开启
+
+websocket-client 为可选依赖，未安装时推流不启动，所有读取返回 None。
+"""
+
+import json
+import threading
+import time
+from typing import Dict, List, Any, Optional, Iterable
+
+from .config import (
+    SPOT_STREAM_URL, FUTURES_STREAM_URL, SPOT_STREAMS, FUTURES_STREAMS,
+    STREAM_KLINES, STREAM_STALE_SECONDS,
+)
+
+# 重连退避（秒）
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 30.0
+
+
+def websocket_available() -> bool:
+    """是否安装了 websocket-client"""
+    try:
+        import websocket  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _ticker_record(d: Dict[str, Any]) -> Dict[str, Any]:
+    """24hrMiniTicker / 24hrTicker 事件 → /ticker/24hr 字段"""
+    last = float(d["c"])
+    open_price = float(d["o"])
+    volume = float(d["v"])
+    quote_volume = float(d["q"])
+    record = {
+        "symbol": d["s"],
+        "lastPrice": d["c"],
+        "openPrice": d["o"],
+        "highPrice": d["h"],
+        "lowPrice": d["l"],
+        "volume": d["v"],
+        "quoteVolume": d["q"],
+        "priceChange": d.get("p", str(last - open_price)),
+        "priceChangePercent": d.get("P", str((last - open_price) / open_price * 100 if open_price else 0.0)),
+        "weightedAvgPrice": d.get("w", str(quote_volume / volume if volume else last)),
+        "closeTime": d.get("E"),
+    }
+    if "n" in d:
+        record["count"] = d["n"]  # 迷你行情不含成交笔数
+    return record
+
+
+def _mark_price_record(d: Dict[str, Any]) -> Dict[str, Any]:
+    """markPriceUpdate 事件 → /premiumIndex 字段"""
+    return {
+        "symbol": d["s"],
+        "markPrice": d["p"],
+        "indexPrice": d["i"],
+        "estimatedSettlePrice": d.get("P", "0"),
+        "lastFundingRate": d.get("r", "0"),
+        "nextFundingTime": d.get("T", 0),
+        "time": d.get("E"),
+    }
+
+
+def _book_ticker_record(d: Dict[str, Any]) -> Dict[str, Any]:
+    """bookTicker 事件 → /ticker/bookTicker 字段"""
+    return {
+        "symbol": d["s"],
+        "bidPrice": d["b"],
+        "bidQty": d["B"],
+        "askPrice": d["a"],
+        "askQty": d["A"],
+    }
+
+
+def _kline_row(k: Dict[str, Any]) -> List[Any]:
+    """kline 事件 → /klines 原始数组"""
+    return [k["t"], k["o"], k["h"], k["l"], k["c"], k["v"], k["T"], k["q"], k["n"], k["V"], k["Q"], "0"]
+
+
+class StreamFeed:
+    """一条 combined stream 连接及其最新值表（线程安全）"""
+
+    def __init__(self, name: str, base_url: str, streams: Iterable[str]) -> None:
+        self.name = name
+        self._base_url = base_url.rstrip("/")
+        self._streams = list(dict.fromkeys(streams))
+        self._lock = threading.Lock()
+        self._ws = None
+        self._thread = None
+        self._stopped = threading.Event()
+        self._request_id = 0
+
+        # 最新值表：key → (收到时间, 记录)
+        self._tickers: Dict[str, tuple] = {}
+        self._marks: Dict[str, tuple] = {}
+        self._books: Dict[str, tuple] = {}
+        self._klines: Dict[tuple, tuple] = {}
+
+        self.connected = False
+        self.last_message = 0.0
+        self.connect_count = 0
+        self.message_count = 0
+        self.last_error = None
+
+    # ---------- 读取 ----------
+
+    def is_fresh(self) -> bool:
+        return self.connected and time.time() - self.last_message < STREAM_STALE_SECONDS
+
+    def _read(self, table: Dict[Any, tuple], key: Any) -> Any:
+        """读取最新值：推流过期、无数据或该条超过 STREAM_STALE_SECONDS 未更新时返回 None"""
+        if not self.is_fresh():
+            return None
+        entry = table.get(key)
+        if entry is None or time.time() - entry[0] >= STREAM_STALE_SECONDS:
+            return None
+        return entry[1]
+
+    def ticker(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """/ticker/24hr 字段；无数据或已过期时返回 None"""
+        return self._read(self._tickers, symbol)
+
+    def mark_price(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """/premiumIndex 字段；无数据或已过期时返回 None"""
+        return self._read(self._marks, symbol)
+
+    def book_ticker(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """/ticker/bookTicker 字段；未订阅 !bookTicker、无数据或已过期时返回 None"""
+        return self._read(self._books, symbol)
+
+    def kline(self, symbol: str, interval: str) -> Optional[List[Any]]:
+        """最新一根（可能未收盘）K线原始数组；未订阅该标的/周期、无数据或已过期时返回 None"""
+        return self._read(self._klines, (symbol, interval))
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "url": self._base_url,
+            "streams": list(self._streams),
+            "connected": self.connected,
+            "fresh": self.is_fresh(),
+            "last_message_age": round(time.time() - self.last_message, 1) if self.last_message else None,
+            "connect_count": self.connect_count,
+            "message_count": self.message_count,
+            "symbols": {"ticker": len(self._tickers), "mark_price": len(self._marks), "book_ticker": len(self._books)},
+            "last_error": self.last_error,
+        }
+
+    # ---------- 订阅与连接 ----------
+
+    def subscribe(self, streams: Iterable[str]) -> None:
+        """新增订阅；已连接时立即发送 SUBSCRIBE，之后重连也会带上"""
+        with self._lock:
+            new = [s for s in streams if s not in self._streams]
+            if not new:
+                return
+            self._streams.extend(new)
+            ws = self._ws
+            self._request_id += 1
+            request_id = self._request_id
+        if ws is not None:
+            try:
+                ws.send(json.dumps({"method": "SUBSCRIBE", "params": new, "id": request_id}))
+            except Exception as e:
+                self.last_error = str(e)  # 连接已断，重连时按完整订阅集合重建
+
+    def start(self) -> None:
+        """启动后台连接线程（重复调用无副作用）"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name=f"binance-mcp-stream-{self.name}", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+    def _url(self) -> str:
+        with self._lock:
+            return f"{self._base_url}?streams={'/'.join(self._streams)}"
+
+    def _run(self) -> None:
+        import websocket
+
+        delay = RECONNECT_MIN_DELAY
+        while not self._stopped.is_set():
+            try:
+                ws = websocket.create_connection(self._url(), timeout=STREAM_STALE_SECONDS)
+                with self._lock:
+                    self._ws = ws
+                self.connected = True
+                self.connect_count += 1
+                self.last_message = time.time()
+                delay = RECONNECT_MIN_DELAY
+
+                while not self._stopped.is_set():
+                    try:
+                        message = ws.recv()
+                    except websocket.WebSocketTimeoutException:
+                        raise RuntimeError(f"{STREAM_STALE_SECONDS}秒未收到推送，重新连接")
+                    if not message:
+                        raise RuntimeError("连接已关闭")
+                    self._handle(message)
+            except Exception as e:
+                self.last_error = str(e)
+            finally:
+                self._disconnect()
+
+            if self._stopped.wait(delay):
+                return
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def _disconnect(self) -> None:
+        """断线后清空最新值表：断线期间的变化无法补齐，宁可回退 REST"""
+        with self._lock:
+            ws, self._ws = self._ws, None
+            self.connected = False
+            self._tickers = {}
+            self._marks = {}
+            self._books = {}
+            self._klines = {}
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+    def _handle(self, message: str) -> None:
+        now = time.time()
+        self.last_message = now
+        self.message_count += 1
+
+        payload = json.loads(message)
+        data = payload.get("data") if isinstance(payload, dict) else None
+        if data is None:
+            return  # SUBSCRIBE 应答等
+
+        events = data if isinstance(data, list) else [data]
+        for d in events:
+            event_type = d.get("e")
+            if event_type in ("24hrMiniTicker", "24hrTicker"):
+                self._tickers[d["s"]] = (now, _ticker_record(d))
+            elif event_type == "markPriceUpdate":
+                self._marks[d["s"]] = (now, _mark_price_record(d))
+            elif event_type == "kline":
+                k = d["k"]
+                self._klines[(d["s"], k["i"])] = (now, _kline_row(k))
+            elif "b" in d and "a" in d and "s" in d:
+                self._books[d["s"]] = (now, _book_ticker_record(d))  # 现货 bookTicker 事件不带 "e"
+
+
+def _kline_streams(entries: Iterable[str]) -> List[str]:
+    """配置项 BTCUSDT@1m → 流名称 btcusdt@kline_1m"""
+    streams = []
+    for entry in entries:
+        symbol, _, interval = entry.partition("@")
+        if symbol and interval:
+            streams.append(f"{symbol.lower()}@kline_{interval}")
+    return streams
+
+
+# 全局单例
+spot_stream = StreamFeed("spot", SPOT_STREAM_URL, SPOT_STREAMS + _kline_streams(STREAM_KLINES))
+futures_stream = StreamFeed("futures", FUTURES_STREAM_URL, FUTURES_STREAMS + _kline_streams(STREAM_KLINES))
+
+
+def start_streams() -> bool:
+    """启动现货、合约推流；未安装 websocket-client 时返回 False"""
+    if not websocket_available():
+        return False
+    spot_stream.start()
+    futures_stream.start()
+    return True
+
+
+def streams_status() -> Dict[str, Any]:
+    return {
+        "available": websocket_available(),
+        "spot": spot_stream.status(),
+        "futures": futures_stream.status(),
+    }
@@ -6,9 +6,13 @@
 from typing import Any
 from datetime import datetime
 
+from .context import is_compact
 
-def format_number(num: float, decimals: int = 2) -> str:
-    """格式化数字显示"""
+
+def format_number(num: float, decimals: int = 2) -> str | float:
+    """格式化数字显示（紧凑输出时返回原始数值，不做格式化）"""
+    if is_compact():
+        return num
     if num >= 1_000_000_000:
         return f"{num / 1_000_000_000:.{decimals}f}B"
     elif num >= 1_000_000:
@@ -18,8 +22,31 @@ def format_number(num: float, decimals: int = 2) -> str:
     return f"{num:.{decimals}f}"
 
 
-def timestamp_to_datetime(ts: int) -> str:
-    """时间戳转日期时间字符串"""
+def format_usd(value: float, decimals: int = 4, grouping: bool = True) -> str | float:
+    """美元金额显示，如 $1,234.5678（紧凑输出时返回按精度取整的原始数值）"""
+    if is_compact():
+        return round(value, decimals)
+    return f"${value:,.{decimals}f}" if grouping else f"${value:.{decimals}f}"
+
+
+def format_usd_short(num: float, decimals: int = 2) -> str | float:
+    """美元金额缩写显示，如 $1.23B（紧凑输出时返回原始数值）"""
+    if is_compact():
+        return num
+    return f"${format_number(num, decimals)}"
+
+
+def format_percent(value: float, decimals: int = 2, signed: bool = True) -> str | float:
+    """百分比显示，如 +1.23%；value 已是百分数（紧凑输出时返回按精度取整的原始数值）"""
+    if is_compact():
+        return round(value, decimals)
+    return f"{value:+.{decimals}f}%" if signed else f"{value:.{decimals}f}%"
+
+
+def timestamp_to_datetime(ts: int) -> str | int:
+    """时间戳转日期时间字符串（紧凑输出时原样返回毫秒时间戳，不做格式化）"""
+    if is_compact():
+        return int(ts)
     return datetime.fromtimestamp(ts / 1000).strftime("%Y-%m-%d %H:%M:%S")
 
 
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+启动预热 - 服务开始处理请求前（或同时）并发预加载大体积 / 高频数据
+
+预热内容：
+1. 现货、合约 exchangeInfo（search_symbols、合约排行、资金费率极值等依赖的交易对路由信息）
+2. Alpha 代币列表与 Alpha exchangeInfo（Alpha 代币识别、搜索）
+3. 观察列表中各交易对的现货 K 线（WARMUP_SYMBOLS × WARMUP_KLINE_INTERVALS）
+
+模式（WARMUP_MODE；stdio 入口用 STDIO_WARMUP_MODE，默认 off）：
+- background：后台预热，服务立即开始处理请求（HTTP 入口默认）
+- blocking：start_background_services 等待预热完成（最多 WARMUP_TIMEOUT 秒）后再返回
+- off：不预热
+
+预热结果写入请求池 / Alpha 缓存，与正常请求共用；进度与就绪状态见 warmup_status()（/health）。
+状态：not_started（已启用但本进程尚未启动，通常说明入口没有调用 start_background_services）→ warming → ready / degraded。
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Any, Callable, Tuple
+
+from .config import (
+    WARMUP_MODE, WARMUP_SYMBOLS, WARMUP_KLINE_INTERVALS, WARMUP_KLINE_LIMIT,
+    WARMUP_WORKERS, WARMUP_TIMEOUT,
+)
+
+
+def _warmup_tasks() -> List[Tuple[str, Callable[[], Dict[str, Any]]]]:
+    """(名称, 无参调用) 列表"""
+    from .api import make_spot_request, make_futures_request, get_alpha_token_list, get_alpha_exchange_info
+
+    tasks = [
+        ("spot_exchange_info", lambda: make_spot_request("/exchangeInfo", {})),
+        ("futures_exchange_info", lambda: make_futures_request("/exchangeInfo", {})),
+        ("alpha_token_list", get_alpha_token_list),
+        ("alpha_exchange_info", get_alpha_exchange_info),
+    ]
+    for symbol in WARMUP_SYMBOLS:
+        for interval in WARMUP_KLINE_INTERVALS:
+            params = {"symbol": symbol, "interval": interval, "limit": WARMUP_KLINE_LIMIT}
+            tasks.append((f"klines:{symbol}:{interval}", lambda params=params: make_spot_request("/klines", params)))
+    return tasks
+
+
+class Warmup:
+    """预热过程与状态（线程安全）"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._state = "not_started"
+        self._started_at = None
+        self._finished_at = None
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self.mode = WARMUP_MODE  # 入口启动时按其配置设置（stdio 为 STDIO_WARMUP_MODE）
+
+    def _run_task(self, name: str, func: Callable[[], Dict[str, Any]]) -> None:
+        start = time.time()
+        try:
+            result = func()
+            ok = bool(result.get("success"))
+            error = None if ok else result.get("error")
+        except Exception as e:
+            ok, error = False, str(e)
+        with self._lock:
+            self._tasks[name] = {"ok": ok, "seconds": round(time.time() - start, 3), "error": error}
+
+    def run(self) -> None:
+        """并发执行全部预热任务；部分失败时状态为 degraded（服务仍可用，只是对应数据按需加载）"""
+        with self._lock:
+            if self._state != "not_started":
+                return
+            self._state = "warming"
+            self._started_at = time.time()
+
+        tasks = _warmup_tasks()
+        with ThreadPoolExecutor(max_workers=WARMUP_WORKERS, thread_name_prefix="binance-mcp-warmup") as executor:
+            futures = [executor.submit(self._run_task, name, func) for name, func in tasks]
+            wait(futures)
+
+        with self._lock:
+            failed = [name for name, task in self._tasks.items() if not task["ok"]]
+            self._state = "degraded" if failed else "ready"
+            self._finished_at = time.time()
+        self._done.set()
+
+    def start(self, block: bool = False, timeout: float = WARMUP_TIMEOUT) -> None:
+        """后台启动预热；block=True 时等待完成（最多 timeout 秒）"""
+        with self._lock:
+            started = self._state != "not_started"
+        if not started:
+            threading.Thread(target=self.run, name="binance-mcp-warmup", daemon=True).start()
+        if block:
+            self._done.wait(timeout)
+
+    @property
+    def ready(self) -> bool:
+        """预热已结束（包括部分失败）或未启用"""
+        return self._done.is_set() or self.mode == "off"
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            finished = self._finished_at or time.time()
+            return {
+                "mode": self.mode,
+                "state": self._state if self.mode != "off" else "off",
+                "ready": self.ready,
+                "seconds": round(finished - self._started_at, 3) if self._started_at else None,
+                "tasks": dict(self._tasks),
+            }
+
+
+# 全局单例
+warmup = Warmup()
+
+
+def start_warmup(mode: str = WARMUP_MODE) -> None:
+    """按 mode（默认 WARMUP_MODE）启动预热（重复调用无副作用）"""
+    warmup.mode = mode
+    if mode == "off":
+        return
+    warmup.start(block=mode == "blocking")
+
+
+def warmup_status() -> Dict[str, Any]:
+    return warmup.status()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+权重预算协调服务 - 多台 unified_server 主机经同一个 NAT 出口访问币安时统一发放权重
+- POST /lease  {"node", "bucket", "want", "used_weight", "window_start"} → {"bucket", "granted", "window_start", "window_end", "remaining"}
+  bucket 为 spot（现货）或 futures（合约），两者在币安是独立的限频计数，默认 spot
+- GET  /status 当前窗口的发放情况
+各主机设置 BINANCE_MCP_BUDGET_COORDINATOR=http://<本服务地址>:8090 后生效（见 binance_mcp/budget.py）
+"""
+from flask import Flask, request, jsonify
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from binance_mcp.budget import BudgetLedger, BUDGET_BUCKETS
+
+app = Flask(__name__)
+ledger = BudgetLedger()
+
+
+@app.route('/lease', methods=['POST'])
+def lease():
+    data = request.get_json(silent=True) or {}
+    node = data.get('node')
+    if not node:
+        return jsonify({"error": "缺少 node"}), 400
+    try:
+        want = int(data.get('want', 0))
+    except (TypeError, ValueError):
+        return jsonify({"error": "want 应为整数"}), 400
+    bucket = data.get('bucket', 'spot')
+    if bucket not in BUDGET_BUCKETS:
+        return jsonify({"error": f"不支持的权重桶: {bucket}，支持: {list(BUDGET_BUCKETS)}"}), 400
+    return jsonify(ledger.lease(node, want, data.get('used_weight'), data.get('window_start'), bucket))
+
+
+@app.route('/status', methods=['GET'])
+def status():
+    return jsonify(ledger.status())
+
+
+@app.route('/health', methods=['GET'])
+def health_check():
+    return jsonify({"status": "ok", "service": "Binance Weight Budget Coordinator"})
+
+
+if __name__ == '__main__':
+    port = int(os.environ.get('PORT', 8090))
+    app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
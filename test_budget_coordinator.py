@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""测试集群权重预算：BudgetClient 对接本机启动的协调服务（budget_coordinator.py）"""
+
+import logging
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+import budget_coordinator
+from binance_mcp.budget import BudgetClient, BudgetLedger, BUDGET_WINDOW
+from binance_mcp.config import BUDGET_FALLBACK_WEIGHT
+
+LIMIT = 1200
+logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+
+class SlowLedger(BudgetLedger):
+    """每次租用延迟 delay 秒并计数，模拟较慢的协调服务"""
+
+    def __init__(self, delay: float, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.delay = delay
+        self.calls = 0
+
+    def lease(self, *args, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        return super().lease(*args, **kwargs)
+
+
+def start_coordinator(ledger: BudgetLedger):
+    """在随机端口启动协调服务，返回 (server, url)"""
+    budget_coordinator.ledger = ledger
+    server = make_server("127.0.0.1", 0, budget_coordinator.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def acquire_until_wait(client: BudgetClient, counter: list) -> None:
+    """持续租用 weight=1，直到需要等待到下一个窗口"""
+    while True:
+        wait_time = client.acquire_weight(1, LIMIT, BUDGET_WINDOW)
+        if wait_time == 0:
+            counter.append(1)
+        elif wait_time > 1:
+            return
+        else:
+            time.sleep(wait_time)
+
+
+# 避开整分钟边界（窗口重置会让计数失真）
+if time.time() % BUDGET_WINDOW > BUDGET_WINDOW - 5:
+    time.sleep(6)
+
+print("=" * 60)
+print("测试 1: 两个节点并发租用，合计不超过集群上限")
+print("=" * 60)
+server, url = start_coordinator(BudgetLedger(limit=300, max_chunk=40))
+clients = [BudgetClient(url, chunk=20), BudgetClient(url, chunk=20)]
+counter: list = []
+threads = [threading.Thread(target=acquire_until_wait, args=(c, counter)) for c in clients for _ in range(4)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+print(f"  实际发放: {len(counter)}（上限 300）")
+print(f"  协调服务: {budget_coordinator.ledger.status()['buckets']['spot']['issued']} issued")
+print(f"  结果: {'✅' if len(counter) <= 300 and len(counter) >= 280 else '❌'}")
+server.shutdown()
+
+print("\n" + "=" * 60)
+print("测试 2: 租用期间不阻塞其他线程，且同一时刻只有一个租用请求")
+print("=" * 60)
+ledger = SlowLedger(0.3, limit=1000)
+server, url = start_coordinator(ledger)
+client = BudgetClient(url, chunk=10)
+client.acquire_weight(1, LIMIT, BUDGET_WINDOW)  # 先租到 10，剩余 9
+ledger.calls = 0
+
+leasers = [threading.Thread(target=client.acquire_weight, args=(20, LIMIT, BUDGET_WINDOW)) for _ in range(5)]
+for t in leasers:
+    t.start()
+time.sleep(0.05)
+start = time.time()
+wait_time = client.acquire_weight(1, LIMIT, BUDGET_WINDOW)
+elapsed = time.time() - start
+for t in leasers:
+    t.join()
+print(f"  租用期间扣减本地权重: wait={wait_time}, 耗时 {elapsed * 1000:.1f}ms")
+print(f"  协调服务收到的租用请求: {ledger.calls}")
+print(f"  结果: {'✅' if wait_time == 0 and elapsed < 0.05 and ledger.calls == 1 else '❌'}")
+server.shutdown()
+
+print("\n" + "=" * 60)
+print("测试 3: 现货与合约分桶校准，合约用量接近上限不影响现货")
+print("=" * 60)
+ledger = BudgetLedger(limit=300)
+server, url = start_coordinator(ledger)
+client = BudgetClient(url, chunk=20)
+client.observe_used_weight(LIMIT - 5, "futures")
+futures_wait = client.acquire_weight(10, LIMIT, BUDGET_WINDOW, "futures")
+spot_wait = client.acquire_weight(10, LIMIT, BUDGET_WINDOW, "spot")
+client.observe_used_weight(290, "futures")
+client.acquire_weight(10, 2000, BUDGET_WINDOW, "futures")  # 租用时上报合约实际用量
+buckets = ledger.status()["buckets"]
+print(f"  合约等待: {futures_wait:.1f}s，现货等待: {spot_wait}")
+print(f"  协调服务剩余: spot={buckets['spot']['remaining']}, futures={buckets['futures']['remaining']}")
+print(f"  结果: {'✅' if futures_wait > 0 and spot_wait == 0 and buckets['spot']['remaining'] == 280 and buckets['futures']['remaining'] == 0 else '❌'}")
+server.shutdown()
+
+print("\n" + "=" * 60)
+print("测试 4: 协调服务不可达时降级为本地份额")
+print("=" * 60)
+client = BudgetClient(url)  # 服务已关闭（测试 3 的地址）
+used = 0
+while client.acquire_weight(10, LIMIT, BUDGET_WINDOW) == 0:
+    used += 10
+status = client.status()
+print(f"  降级期间可用: {used}（BUDGET_FALLBACK_WEIGHT={BUDGET_FALLBACK_WEIGHT}）")
+print(f"  degraded: {status['degraded']}, last_error: {(status['last_error'] or '')[:60]}")
+print(f"  结果: {'✅' if used == BUDGET_FALLBACK_WEIGHT and status['degraded'] else '❌'}")
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""测试 stdio 冷启动导入耗时：binance_mcp.server 的导入时间不超过 IMPORT_TIME_BUDGET_MS（超出时退出码为 1）"""
+
+import sys
+
+from binance_mcp.config import IMPORT_TIME_BUDGET_MS
+from binance_mcp.import_bench import measure_import_time
+
+print("=" * 60)
+print("测试 binance_mcp.server 导入耗时")
+print("=" * 60)
+result = measure_import_time()
+print(f"  导入耗时: {result['total_ms']:.1f} ms（{result['runs']} 次取最小）")
+print(f"  预算: {IMPORT_TIME_BUDGET_MS:.0f} ms（BINANCE_MCP_IMPORT_BUDGET_MS）")
+print("  自身耗时最多的模块:")
+for item in result["slowest"][:5]:
+    print(f"    {item['self_ms']:8.2f} ms  {item['module']}")
+
+passed = result["total_ms"] <= IMPORT_TIME_BUDGET_MS
+print(f"  结果: {'✅' if passed else '❌'}")
+sys.exit(0 if passed else 1)
@@ -4,7 +4,7 @@
 - REST API: http://server/binance/spot/price?symbol=BTC
 - MCP协议: http://server/mcp (POST JSON-RPC 2.0)
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import json
 import sys
@@ -16,31 +16,30 @@ app = Flask(__name__)
 CORS(app)
 
 # 导入MCP服务器处理函数
-from binance_mcp.server import handle_mcp_request
-
-# 导入业务逻辑
-from binance_mcp.api import (
-    get_spot_price, get_ticker_24h, get_klines,
-    get_futures_price, get_funding_rate, get_realtime_funding_rate,
-    get_extreme_funding_rates, analyze_spot_vs_futures,
-    search_symbols, get_top_gainers_losers
-)
-from binance_mcp.analysis import (
-    comprehensive_analysis, analyze_kline_patterns, analyze_market_factors
-)
-from binance_mcp.alpha import (
-    get_alpha_tokens_list, analyze_alpha_token, get_active_alpha_competitions
-)
-from binance_mcp.alpha_realtime import get_realtime_alpha_airdrops
+from binance_mcp.server import handle_mcp_message, handle_mcp_request_text
+from binance_mcp.rest import register_rest_routes, rest_endpoint_index
+from binance_mcp.services import start_background_services
+from binance_mcp.streams import streams_status
+from binance_mcp.request_pool import circuit_status, hot_key_status, shared_cache_status, budget_status
+from binance_mcp.warmup import warmup, warmup_status
 from coingecko_mcp import get_price, get_coin_data, search_coins, get_trending
 
+# 后台服务随应用模块启动：gunicorn 的每个 worker 导入本模块时各调用一次，直接运行脚本时同样经过这里；
+# 写本地库的同步任务按本机锁只在其中一个 worker 中运行
+start_background_services()
+
 # ============ MCP 协议端点 ============
 @app.route('/mcp', methods=['POST'])
 def mcp_endpoint():
-    """MCP协议端点 - Binance工具"""
+    """MCP协议端点 - Binance工具（支持 JSON-RPC 批量请求，批内并发执行）"""
     try:
         mcp_request = request.get_json()
-        response = handle_mcp_request(mcp_request)
+        if isinstance(mcp_request, dict):
+            text = handle_mcp_request_text(mcp_request)
+            if text is None:
+                return '', 204
+            return Response(text, mimetype='application/json')
+        response = handle_mcp_message(mcp_request)
         if response:
             return jsonify(response)
         return '', 204
@@ -76,114 +75,24 @@ def health_check():
         "status": "ok",
         "service": "Unified Crypto API Server",
         "protocols": ["REST", "MCP"],
-        "mcp_endpoint": "/mcp"
+        "mcp_endpoint": "/mcp",
+        "streams": streams_status(),
+        "circuits": circuit_status(),
+        "hot_keys": hot_key_status(),
+        "shared_cache": shared_cache_status(),
+        "budget": budget_status(),
+        "ready": warmup.ready,
+        "warmup": warmup_status()
     })
 
-# ============ REST API - Binance ============
-@app.route('/binance/spot/price', methods=['GET'])
-def binance_spot_price():
-    symbol = request.args.get('symbol', 'BTC')
-    result = get_spot_price(symbol)
-    return jsonify(result)
-
-@app.route('/binance/ticker/24h', methods=['GET'])
-def binance_ticker_24h():
-    symbol = request.args.get('symbol', 'BTC')
-    result = get_ticker_24h(symbol)
-    return jsonify(result)
-
-@app.route('/binance/klines', methods=['GET'])
-def binance_klines():
-    symbol = request.args.get('symbol', 'BTC')
-    interval = request.args.get('interval', '1h')
-    limit = int(request.args.get('limit', 100))
-    result = get_klines(symbol, interval, limit)
-    return jsonify(result)
-
-@app.route('/binance/analysis/comprehensive', methods=['GET'])
-def binance_comprehensive_analysis():
-    symbol = request.args.get('symbol', 'BTC')
-    result = comprehensive_analysis(symbol)
-    return jsonify(result)
 
-@app.route('/binance/analysis/kline-patterns', methods=['GET'])
-def binance_kline_patterns():
-    symbol = request.args.get('symbol', 'BTC')
-    interval = request.args.get('interval', '4h')
-    result = analyze_kline_patterns(symbol, interval)
-    return jsonify(result)
+@app.route('/health/ready', methods=['GET'])
+def readiness_check():
+    """就绪检查：启动预热结束前返回 503（供负载均衡 / 探针使用）"""
+    return jsonify({"ready": warmup.ready, "warmup": warmup_status()}), (200 if warmup.ready else 503)
 
-@app.route('/binance/futures/price', methods=['GET'])
-def binance_futures_price():
-    symbol = request.args.get('symbol', 'BTC')
-    result = get_futures_price(symbol)
-    return jsonify(result)
-
-@app.route('/binance/funding-rate', methods=['GET'])
-def binance_funding_rate():
-    symbol = request.args.get('symbol', 'BTC')
-    result = get_funding_rate(symbol)
-    return jsonify(result)
-
-@app.route('/binance/funding-rate/realtime', methods=['GET'])
-def binance_realtime_funding_rate():
-    symbol = request.args.get('symbol', 'BTC')
-    result = get_realtime_funding_rate(symbol)
-    return jsonify(result)
-
-@app.route('/binance/funding-rate/extreme', methods=['GET'])
-def binance_extreme_funding_rates():
-    threshold = float(request.args.get('threshold', 0.1))
-    limit = int(request.args.get('limit', 20))
-    result = get_extreme_funding_rates(threshold, limit)
-    return jsonify(result)
-
-@app.route('/binance/analysis/spot-vs-futures', methods=['GET'])
-def binance_spot_vs_futures():
-    symbol = request.args.get('symbol', 'BTC')
-    result = analyze_spot_vs_futures(symbol)
-    return jsonify(result)
-
-@app.route('/binance/alpha/airdrops', methods=['GET'])
-def binance_alpha_airdrops():
-    result = get_realtime_alpha_airdrops()
-    return jsonify(result)
-
-@app.route('/binance/alpha/tokens', methods=['GET'])
-def binance_alpha_tokens():
-    result = get_alpha_tokens_list()
-    return jsonify(result)
-
-@app.route('/binance/alpha/analyze', methods=['GET'])
-def binance_analyze_alpha():
-    symbol = request.args.get('symbol')
-    if not symbol:
-        return jsonify({"error": "symbol parameter required"}), 400
-    result = analyze_alpha_token(symbol)
-    return jsonify(result)
-
-@app.route('/binance/alpha/competitions', methods=['GET'])
-def binance_alpha_competitions():
-    result = get_active_alpha_competitions()
-    return jsonify(result)
-
-@app.route('/binance/search', methods=['GET'])
-def binance_search():
-    keyword = request.args.get('keyword', '')
-    result = search_symbols(keyword)
-    return jsonify(result)
-
-@app.route('/binance/top-movers', methods=['GET'])
-def binance_top_movers():
-    limit = int(request.args.get('limit', 10))
-    result = get_top_gainers_losers(limit)
-    return jsonify(result)
-
-@app.route('/binance/analysis/market-factors', methods=['GET'])
-def binance_market_factors():
-    symbol = request.args.get('symbol', 'BTC')
-    result = analyze_market_factors(symbol)
-    return jsonify(result)
+# ============ REST API - Binance ============
+register_rest_routes(app)
 
 # ============ REST API - CoinGecko ============
 @app.route('/coingecko/price', methods=['GET'])
@@ -225,25 +134,7 @@ def api_docs():
         },
         "rest_endpoints": {
             "health": "GET /health",
-            "binance": {
-                "spot_price": "GET /binance/spot/price?symbol=BTC",
-                "ticker_24h": "GET /binance/ticker/24h?symbol=BTC",
-                "klines": "GET /binance/klines?symbol=BTC&interval=1h&limit=100",
-                "comprehensive_analysis": "GET /binance/analysis/comprehensive?symbol=BTC",
-                "kline_patterns": "GET /binance/analysis/kline-patterns?symbol=BTC&interval=4h",
-                "futures_price": "GET /binance/futures/price?symbol=BTC",
-                "funding_rate": "GET /binance/funding-rate?symbol=BTC",
-                "realtime_funding_rate": "GET /binance/funding-rate/realtime?symbol=BTC",
-                "extreme_funding_rates": "GET /binance/funding-rate/extreme?threshold=0.1&limit=20",
-                "spot_vs_futures": "GET /binance/analysis/spot-vs-futures?symbol=BTC",
-                "alpha_airdrops": "GET /binance/alpha/airdrops",
-                "alpha_tokens": "GET /binance/alpha/tokens",
-                "analyze_alpha": "GET /binance/alpha/analyze?symbol=TIMI",
-                "alpha_competitions": "GET /binance/alpha/competitions",
-                "search": "GET /binance/search?keyword=BTC",
-                "top_movers": "GET /binance/top-movers?limit=10",
-                "market_factors": "GET /binance/analysis/market-factors?symbol=BTC"
-            },
+            "binance": rest_endpoint_index(),
             "coingecko": {
                 "price": "GET /coingecko/price?coin_ids=bitcoin,ethereum",
                 "coin_data": "GET /coingecko/coin?coin_id=bitcoin",